@@ -6,9 +6,24 @@ This module handles the initialization and configuration of event triggers syste
 from fastapi import APIRouter
 from typing import Dict, List, Optional
 from pydantic import BaseModel
+import asyncio
+import logging
+import os
 
-from app.core.event_system import EventSystem
+from app.core.event_execution import ExecutionMode
+from app.core.event_system import EventSystem, event_system
 from app.services.trigger_service import TriggerService
+from app.api.event_triggers.router import trigger_controller
+
+logger = logging.getLogger(__name__)
+
+# Crossing trigger state persisted across restarts
+TRIGGER_STATE_PATH = os.getenv("TRIGGER_STATE_PATH", "data/trigger_state.npz")
+# Seconds between periodic crossing state snapshots (0 disables them)
+TRIGGER_STATE_INTERVAL = float(os.getenv("TRIGGER_STATE_INTERVAL", "60"))
+
+# Background task that snapshots crossing state while the application runs
+_state_task: Optional[asyncio.Task] = None
 
 # Initialize router
 router = APIRouter()
@@ -63,6 +78,42 @@ def setup_listeners() -> None:
     EventSystem.add_listener("technical_indicator", trigger_service.handle_technical_trigger)
     EventSystem.add_listener("market_status", trigger_service.handle_market_status_trigger)
     EventSystem.add_listener("news_alert", trigger_service.handle_news_trigger)
+    
+    # Feed live ticks into the in-memory matcher on the running event system.
+    # INLINE keeps on_tick on the event loop, so the matcher needs no lock
+    # against create/update/delete syncs and state snapshots
+    event_system.register_handler("price_change", trigger_controller.on_market_event, mode=ExecutionMode.INLINE)
+    event_system.register_handler("volume_spike", trigger_controller.on_market_event, mode=ExecutionMode.INLINE)
+
+def load_matching_state(configurations: List) -> None:
+    """
+    Build the in-memory matching structures from saved triggers
+    Failures are logged separately so the rest of the trigger system still starts
+    """
+    try:
+        loaded = trigger_controller.load_triggers(configurations)
+        logger.info(f"Registered {loaded} triggers for matching")
+    except Exception as e:
+        logger.error(f"Failed to load triggers for matching: {str(e)}")
+        return
+    
+    # Restore crossing state so triggers do not fire spuriously after a restart
+    try:
+        trigger_controller.trigger_matcher.load_state(TRIGGER_STATE_PATH)
+    except Exception as e:
+        logger.error(f"Failed to restore trigger state: {str(e)}")
+
+async def snapshot_trigger_state(interval: float) -> None:
+    """
+    Periodically persist crossing state so a crash loses at most one interval
+    Each snapshot is copied on the event loop and written atomically in an executor
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await trigger_controller.trigger_matcher.save_state_async(TRIGGER_STATE_PATH)
+        except Exception as e:
+            logger.error(f"Failed to snapshot trigger state: {str(e)}")
 
 async def initialize_triggers() -> None:
     """
@@ -76,8 +127,15 @@ async def initialize_triggers() -> None:
         # Setup event listeners
         setup_listeners()
         
-        # Load saved trigger configurations
-        await TriggerService.load_trigger_configurations()
+        # Load saved trigger configurations and build the in-memory registry once;
+        # later changes through the router are applied as single-trigger diffs
+        configurations = await TriggerService.load_trigger_configurations()
+        load_matching_state(configurations or [])
+        
+        # Start periodic crossing state snapshots
+        global _state_task
+        if TRIGGER_STATE_INTERVAL > 0 and _state_task is None:
+            _state_task = asyncio.create_task(snapshot_trigger_state(TRIGGER_STATE_INTERVAL))
         
         # Initialize monitoring systems
         await TriggerService.initialize_monitoring()
@@ -87,11 +145,40 @@ async def initialize_triggers() -> None:
         logger.error(f"Failed to initialize trigger system: {str(e)}")
         raise
 
+async def shutdown_triggers() -> None:
+    """
+    Persist trigger state before the application stops
+    This function should be called during application shutdown
+    """
+    global _state_task
+    if _state_task is not None:
+        _state_task.cancel()
+        try:
+            await _state_task
+        except asyncio.CancelledError:
+            pass
+        _state_task = None
+    
+    # Let already fired actions finish and close their pooled connections
+    try:
+        await trigger_controller.action_runner.drain()
+        await trigger_controller.action_runner.dispatcher.close()
+    except Exception as e:
+        logger.error(f"Failed to finish trigger actions: {str(e)}")
+    
+    try:
+        await trigger_controller.trigger_matcher.save_state_async(TRIGGER_STATE_PATH)
+    except Exception as e:
+        logger.error(f"Failed to save trigger state: {str(e)}")
+        raise
+
 # Export necessary components
 __all__ = [
     "router",
     "TriggerConfig",
     "register_event_types",
     "setup_listeners",
-    "initialize_triggers"
+    "initialize_triggers",
+    "snapshot_trigger_state",
+    "shutdown_triggers"
 ]
\ No newline at end of file
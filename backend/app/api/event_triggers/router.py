@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import os
 from app.services import trigger_service
 from app.schemas.trigger import (
     TriggerCreate,
@@ -8,15 +11,143 @@ from app.schemas.trigger import (
     Message
 )
 from app.core.auth import get_current_user
+from app.core.trigger_actions import TriggerActionRunner
+from app.core.trigger_backtest import run_backtest
+from app.core.trigger_compiler import TriggerEvaluator
+from app.core.trigger_matcher import TriggerMatcher
+from app.core.trigger_registry import TriggerRegistry
+from app.core.trigger_table import TriggerTable
+
+# バックテストに使う過去のティック（CSVファイルまたは列指向ファイルのディレクトリ）
+BACKTEST_DATA_PATH = os.getenv("BACKTEST_DATA_PATH", "data/ticks")
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/triggers",
     tags=["triggers"]
 )
 
+def _has_conditions(trigger: Any) -> bool:
+    """条件のリストを持つ（models.trigger.Triggerの形の）トリガーかどうか"""
+    return getattr(trigger, "conditions", None) is not None
+
 class TriggerController:
-    def __init__(self, trigger_service=trigger_service):
+    def __init__(
+        self,
+        trigger_service=trigger_service,
+        trigger_registry: Optional[TriggerRegistry] = None,
+        trigger_table: Optional[TriggerTable] = None,
+        action_runner: Optional[TriggerActionRunner] = None
+    ):
         self.trigger_service = trigger_service
+        # ティックごとの照合に使う閾値条件のレジストリとクロス条件の状態
+        # （作成・更新・削除のたびにそのトリガーだけを差分で反映し、照合は止めない）
+        self.trigger_registry = trigger_registry if trigger_registry is not None else TriggerRegistry()
+        self.trigger_matcher = TriggerMatcher(self.trigger_registry)
+        self.trigger_index = self.trigger_matcher.index
+        # 全トリガーの一括再評価に使う列指向テーブル
+        self.trigger_table = trigger_table if trigger_table is not None else TriggerTable()
+        # 複数条件（conditionsのリスト）を持つトリガーはコンパイル済みの評価関数で照合する
+        self.trigger_evaluator = TriggerEvaluator()
+        self.condition_triggers: Dict[str, Any] = {}
+        # 発火したトリガーのアクションを優先度レーン経由で送る
+        self.action_runner = action_runner if action_runner is not None else TriggerActionRunner()
+
+    def load_triggers(self, triggers: Iterable[Trigger]) -> int:
+        """
+        起動時に保存済みの全トリガーを照合対象と列指向テーブルに読み込む
+
+        Args:
+            triggers: 保存済みのトリガー
+
+        Returns:
+            照合対象に登録したトリガー数
+        """
+        triggers = list(triggers)
+        self.action_runner.load_triggers(triggers)
+        compound = [trigger for trigger in triggers if _has_conditions(trigger)]
+        triggers = [trigger for trigger in triggers if not _has_conditions(trigger)]
+        registered = self.trigger_matcher.load_triggers(triggers)
+        for trigger in triggers:
+            self.trigger_table.sync_trigger(trigger)
+        for trigger in compound:
+            if trigger.is_active:
+                self.condition_triggers[str(trigger.id)] = trigger
+        return registered + sum(1 for trigger in compound if trigger.is_active)
+
+    def on_market_event(self, event: Any) -> List[str]:
+        """
+        価格・出来高などのイベントをティックとして照合に流す
+
+        単一条件のトリガーは閾値の索引とクロス状態で照合し、複数条件のトリガーは
+        ペイロード全体をコンパイル済みの評価関数で評価する（条件を満たす間は毎回発火する）。
+
+        Args:
+            event: payloadに"symbol"と数値のフィールド（price / volume など）を持つイベント
+
+        Returns:
+            発火したトリガーIDのリスト
+        """
+        payload = event.payload
+        symbol = payload.get("symbol")
+        fired: List[str] = []
+        values = {
+            field: float(value)
+            for field, value in payload.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        if symbol is not None and values:
+            fired = self.trigger_matcher.on_tick(symbol, values, event.ingress_ns / 1e9)
+        if self.condition_triggers:
+            fired = fired + [
+                str(trigger.id)
+                for trigger in self.trigger_evaluator.matching(list(self.condition_triggers.values()), payload)
+            ]
+        for trigger_id in fired:
+            logger.info(f"Trigger {trigger_id} fired on {event.type} for {symbol}")
+            try:
+                self.action_runner.fire(trigger_id, {"trigger_id": trigger_id, "event_type": event.type, "data": payload})
+            except Exception as e:
+                logger.error(f"Failed to schedule actions for trigger {trigger_id}: {str(e)}")
+        return fired
+
+    def _sync_trigger(self, trigger: Trigger) -> None:
+        """
+        保存済みのトリガーを照合対象と列指向テーブルに反映する
+        （保存は完了しているため、反映の失敗はリクエストのエラーにせずログに残す）
+
+        Args:
+            trigger: 保存済みのトリガー
+        """
+        try:
+            self.action_runner.sync_trigger(trigger)
+            if _has_conditions(trigger):
+                # 複数条件のトリガーはupdated_atが変わると評価関数を再コンパイルする
+                if trigger.is_active:
+                    self.condition_triggers[str(trigger.id)] = trigger
+                else:
+                    self.condition_triggers.pop(str(trigger.id), None)
+                return
+            self.trigger_matcher.sync_trigger(trigger)
+            self.trigger_table.sync_trigger(trigger)
+        except Exception as e:
+            logger.error(f"Failed to sync trigger {getattr(trigger, 'id', None)}: {str(e)}")
+
+    def _remove_trigger(self, trigger_id: str) -> None:
+        """
+        削除済みのトリガーを照合対象と列指向テーブルから外す
+
+        Args:
+            trigger_id: 削除したトリガーのID
+        """
+        try:
+            self.condition_triggers.pop(str(trigger_id), None)
+            self.action_runner.remove(trigger_id)
+            self.trigger_matcher.remove(trigger_id)
+            self.trigger_table.remove(trigger_id)
+        except Exception as e:
+            logger.error(f"Failed to remove trigger {trigger_id} from matching: {str(e)}")
 
     async def create_trigger(self, trigger_data: TriggerCreate, user_id: str) -> Trigger:
         """
@@ -30,9 +161,11 @@ class TriggerController:
             作成されたトリガーオブジェクト
         """
         try:
-            return await self.trigger_service.create_trigger(trigger_data, user_id)
+            trigger = await self.trigger_service.create_trigger(trigger_data, user_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
+        self._sync_trigger(trigger)
+        return trigger
 
     async def list_triggers(self, user_id: str) -> List[Trigger]:
         """
@@ -62,9 +195,11 @@ class TriggerController:
             更新されたトリガーオブジェクト
         """
         try:
-            return await self.trigger_service.update_trigger(trigger_id, trigger_data, user_id)
+            trigger = await self.trigger_service.update_trigger(trigger_id, trigger_data, user_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
+        self._sync_trigger(trigger)
+        return trigger
 
     async def delete_trigger(self, trigger_id: str, user_id: str) -> Message:
         """
@@ -78,7 +213,28 @@ class TriggerController:
             削除完了メッセージ
         """
         try:
-            return await self.trigger_service.delete_trigger(trigger_id, user_id)
+            message = await self.trigger_service.delete_trigger(trigger_id, user_id)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self._remove_trigger(trigger_id)
+        return message
+
+    async def backtest_triggers(self, triggers: List[TriggerCreate]) -> Dict[str, Any]:
+        """
+        過去のティックでトリガーがどれだけ発火したかを求める
+
+        Args:
+            triggers: 評価するトリガーのデータ
+
+        Returns:
+            発火回数・発火時刻・1時間ごとのアクション数
+        """
+        if not os.path.exists(BACKTEST_DATA_PATH):
+            raise HTTPException(status_code=404, detail="Backtest data not found")
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, run_backtest, triggers, BACKTEST_DATA_PATH)
+            return result.to_dict()
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
@@ -91,6 +247,13 @@ async def create_trigger(
 ):
     return await trigger_controller.create_trigger(trigger_data, current_user.id)
 
+@router.post("/backtest")
+async def backtest_triggers(
+    triggers: List[TriggerCreate],
+    current_user = Depends(get_current_user)
+):
+    return await trigger_controller.backtest_triggers(triggers)
+
 @router.get("/list", response_model=List[Trigger])
 async def list_triggers(
     current_user = Depends(get_current_user)
@@ -0,0 +1,3 @@
+from app.api.monitoring.router import router
+
+__all__ = ["router"]
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from typing import Any, Dict, List
+from datetime import datetime
+import asyncio
+import os
+import tempfile
+
+from app.core.event_system import event_system
+from app.core.tracing import tracer
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+@router.get("/latency")
+async def get_latency() -> Dict[str, Any]:
+    """
+    イベント取り込みからMinecraft送信までのステージ別レイテンシを取得します
+
+    Returns:
+        ステージごとのp50/p95/p99と優先度レーンごとの統計
+    """
+    try:
+        return {
+            "stages": tracer.stage_stats(),
+            "scheduler": event_system.scheduler_stats(),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/latency/export")
+async def export_spans() -> FileResponse:
+    """
+    記録済みのスパンをCSVファイルとしてダウンロードします
+
+    Returns:
+        trace_id, stage, start_ns, end_ns, duration_nsを列に持つCSV
+    """
+    # 同時に呼ばれても衝突しない一時ファイルに書き出し、送信後に削除する
+    with tempfile.NamedTemporaryFile(prefix="spans_", suffix=".csv", delete=False) as f:
+        path = f.name
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, tracer.export, path)
+        filename = f"spans_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        return FileResponse(
+            path,
+            media_type="text/csv",
+            filename=filename,
+            background=BackgroundTask(os.unlink, path)
+        )
+    except Exception as e:
+        os.unlink(path)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/dead-letters")
+async def list_dead_letters(limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    リトライを使い切ったハンドラー・アクションの一覧を取得します
+
+    Args:
+        limit: 取得する最大件数
+
+    Returns:
+        デッドレターのリスト（古い順）
+    """
+    return [letter.to_dict() for letter in event_system.dead_letters(limit)]
+
+@router.post("/dead-letters/{letter_id}/replay")
+async def replay_dead_letter(letter_id: int) -> Dict[str, Any]:
+    """
+    デッドレターを再実行します
+
+    Args:
+        letter_id: デッドレターのID
+
+    Returns:
+        再実行の結果
+    """
+    try:
+        await event_system.replay_dead_letter(letter_id)
+        return {"id": letter_id, "replayed": True}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/handlers")
+async def get_handler_health() -> List[Dict[str, Any]]:
+    """
+    登録済みハンドラーの健全性を取得します
+
+    Returns:
+        ハンドラーごとのサーキットブレーカーの状態・失敗数・タイムアウト数など
+    """
+    return event_system.handler_health()
@@ -0,0 +1,483 @@
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from functools import partial
+from urllib.parse import urlsplit
+import asyncio
+import http.client
+import json
+import logging
+import queue
+import smtplib
+import threading
+
+from app.core.event_batching import BatchingHandler
+
+logger = logging.getLogger(__name__)
+
+# アクションタイプ（ActionType の値）
+ACTION_WEBHOOK = "webhook"
+ACTION_API_CALL = "api_call"
+ACTION_EMAIL = "email"
+
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_LATENCY = 0.02
+DEFAULT_TIMEOUT = 10.0
+
+# 再利用した接続がサーバー側で閉じられていた場合に出る例外（新しい接続で1回だけやり直す）
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ActionDeliveryError(Exception):
+    """アクションの送信に失敗したことを表す例外"""
+
+
+@dataclass(frozen=True)
+class Destination:
+    """接続先（プールと同時実行数の単位）"""
+    scheme: str
+    host: str
+    port: int
+
+    @classmethod
+    def from_url(cls, url: str) -> Tuple["Destination", str]:
+        """URLを接続先とパス（クエリを含む）に分ける"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return cls(parts.scheme, parts.hostname, port), path
+
+
+@dataclass(frozen=True)
+class SMTPServer:
+    """SMTPサーバーと認証情報（接続プールの単位。パスワードは統計やログのreprに出さない）"""
+    host: str
+    port: int
+    username: Optional[str] = None
+    password: Optional[str] = field(default=None, repr=False)
+    starttls: bool = False
+
+
+class HTTPConnectionPool:
+    """
+    1つの接続先に対するkeep-alive接続のプール（スレッドセーフ）
+
+    使い終わった接続は応答を読み切ってから戻し、次のリクエストで再利用する。
+    """
+
+    def __init__(self, destination: Destination, max_idle: int = DEFAULT_MAX_PER_HOST, timeout: float = DEFAULT_TIMEOUT):
+        self.destination = destination
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(max_idle)
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        self.created += 1
+        connection_class = (
+            http.client.HTTPSConnection if self.destination.scheme == "https" else http.client.HTTPConnection
+        )
+        return connection_class(self.destination.host, self.destination.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        """
+        リクエストを送り、ステータスコードと本文を返す
+
+        Args:
+            method: HTTPメソッド
+            path: パス
+            body: 本文
+            headers: ヘッダー
+
+        Returns:
+            (ステータスコード, 本文)
+        """
+        try:
+            connection = self._idle.get_nowait()
+            reused = True
+            self.reused += 1
+        except queue.Empty:
+            connection = self._connect()
+            reused = False
+        try:
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection = self._connect()
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                self._idle.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        return response.status, data
+
+    def close(self) -> None:
+        """待機中の接続を全て閉じる"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SMTPConnectionPool:
+    """
+    1つのSMTPサーバーに対する接続のプール（スレッドセーフ）
+
+    1回のセッションで複数のメッセージを送り、終わった接続は次の送信で再利用する。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_idle: int = 2,
+        timeout: float = DEFAULT_TIMEOUT,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        local_hostname: str = "localhost"
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        # 既定のgetfqdn()はDNS解決で遅くなるため固定の名前を使う
+        self.local_hostname = local_hostname
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(max_idle)
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        self.created += 1
+        connection = smtplib.SMTP(self.host, self.port, local_hostname=self.local_hostname, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if connection.noop()[0] == 250:
+                    self.reused += 1
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            connection.close()
+
+    def send_batch(self, messages: List[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        1つの接続でメッセージをまとめて送る
+
+        Args:
+            messages: 送信するメッセージ
+
+        Returns:
+            メッセージごとの送信エラー（成功した場合はNone）
+        """
+        connection = self._acquire()
+        errors: List[Optional[Exception]] = []
+        try:
+            for index, message in enumerate(messages):
+                try:
+                    try:
+                        connection.send_message(message)
+                    except smtplib.SMTPServerDisconnected:
+                        connection.close()
+                        connection = self._connect()
+                        connection.send_message(message)
+                    errors.append(None)
+                except smtplib.SMTPException as e:
+                    errors.append(e)
+                except OSError as e:
+                    # 接続が使えなくなった場合は送信済みの結果を残し、未送信分だけを失敗にする
+                    connection.close()
+                    errors.extend([e] * (len(messages) - index))
+                    return errors
+        except BaseException:
+            connection.close()
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.quit()
+        return errors
+
+    def close(self) -> None:
+        """待機中の接続を全て閉じる"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+
+class ActionDispatcher:
+    """
+    Webhook・API呼び出し・メールのアクションを送るディスパッチャー
+
+    接続先ごとにkeep-alive接続をプールし、同時実行数をセマフォで制限する。
+    parametersに"batch": Trueを持つWebhookは、batch_size件またはmax_latency秒ごとに
+    JSON配列へまとめて1回のリクエストで送る。メールはSMTPサーバーごとにまとめ、再利用する接続の
+    1セッションで複数通ずつ送る。SMTPの認証情報とSTARTTLSはコンストラクターで指定し、
+    アクションのparameters（smtp_username / smtp_password / smtp_starttls）で上書きできる。
+    ブロッキングな送信処理はエグゼキューターで実行する。
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        smtp_host: str = "localhost",
+        smtp_port: int = 25,
+        sender: str = "alerts@localhost",
+        timeout: float = DEFAULT_TIMEOUT,
+        smtp_username: Optional[str] = None,
+        smtp_password: Optional[str] = None,
+        smtp_starttls: bool = False
+    ):
+        if max_per_host <= 0:
+            raise ValueError(f"max_per_host must be positive: {max_per_host}")
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=32, thread_name_prefix="action")
+        self.max_per_host = max_per_host
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.sender = sender
+        self.timeout = timeout
+        self.smtp_username = smtp_username
+        self.smtp_password = smtp_password
+        self.smtp_starttls = smtp_starttls
+        self._http_pools: Dict[Destination, HTTPConnectionPool] = {}
+        self._smtp_pools: Dict[SMTPServer, SMTPConnectionPool] = {}
+        self._limits: Dict[Any, asyncio.Semaphore] = {}
+        self._batchers: Dict[Any, BatchingHandler] = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.requests = 0
+
+    async def dispatch(self, action: Any, payload: Any) -> Any:
+        """
+        アクションを送る
+
+        Args:
+            action: TriggerAction（action_typeとparametersを参照する）
+            payload: 送信する内容（発火したトリガーやティックの情報）
+
+        Returns:
+            HTTPの場合はステータスコード、メールの場合はNone
+        """
+        action_type = getattr(action.action_type, "value", action.action_type)
+        parameters = action.parameters or {}
+        try:
+            if action_type in (ACTION_WEBHOOK, ACTION_API_CALL):
+                result = await self._dispatch_http(parameters, payload)
+            elif action_type == ACTION_EMAIL:
+                result = await self._dispatch_email(parameters, payload)
+            else:
+                raise ValueError(f"Unsupported action type: {action_type}")
+            self.sent += 1
+            return result
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error dispatching {action_type} action: {str(e)}")
+            raise
+
+    def _limit(self, key: Any) -> asyncio.Semaphore:
+        semaphore = self._limits.get(key)
+        if semaphore is None:
+            semaphore = self._limits[key] = asyncio.Semaphore(self.max_per_host)
+        return semaphore
+
+    def _http_pool(self, destination: Destination) -> HTTPConnectionPool:
+        with self._lock:
+            pool = self._http_pools.get(destination)
+            if pool is None:
+                pool = self._http_pools[destination] = HTTPConnectionPool(
+                    destination, self.max_per_host, self.timeout
+                )
+            return pool
+
+    def _smtp_pool(self, server: SMTPServer) -> SMTPConnectionPool:
+        with self._lock:
+            pool = self._smtp_pools.get(server)
+            if pool is None:
+                pool = self._smtp_pools[server] = SMTPConnectionPool(
+                    server.host, server.port, self.max_per_host, self.timeout,
+                    username=server.username, password=server.password, starttls=server.starttls
+                )
+            return pool
+
+    async def _request(self, destination: Destination, method: str, path: str, body: bytes, headers: Dict[str, str]) -> int:
+        pool = self._http_pool(destination)
+        async with self._limit(destination):
+            self.requests += 1
+            status, data = await asyncio.get_running_loop().run_in_executor(
+                self._executor, pool.request, method, path, body, headers
+            )
+        if status >= 400:
+            raise ActionDeliveryError(f"{method} {destination.host}{path} returned {status}: {data[:200]!r}")
+        return status
+
+    async def _send_email(self, server: SMTPServer, messages: List[EmailMessage]) -> List[Optional[Exception]]:
+        pool = self._smtp_pool(server)
+        async with self._limit((server.host, server.port)):
+            return await asyncio.get_running_loop().run_in_executor(self._executor, pool.send_batch, messages)
+
+    async def _dispatch_http(self, parameters: Dict[str, Any], payload: Any) -> int:
+        url = parameters["url"]
+        method = parameters.get("method", "POST").upper()
+        headers = {"Content-Type": "application/json", **parameters.get("headers", {})}
+        if parameters.get("batch") and method == "POST":
+            return await self._enqueue(("http", url, tuple(sorted(headers.items()))), payload)
+        destination, path = Destination.from_url(url)
+        body = json.dumps(payload, default=str).encode()
+        return await self._request(destination, method, path, body, headers)
+
+    async def _dispatch_email(self, parameters: Dict[str, Any], payload: Any) -> None:
+        message = build_email(self.sender, parameters, payload)
+        server = SMTPServer(
+            parameters.get("smtp_host", self.smtp_host),
+            int(parameters.get("smtp_port", self.smtp_port)),
+            parameters.get("smtp_username", self.smtp_username),
+            parameters.get("smtp_password", self.smtp_password),
+            bool(parameters.get("smtp_starttls", self.smtp_starttls)),
+        )
+        return await self._enqueue(("smtp", server), message)
+
+    async def _enqueue(self, key: Tuple, item: Any) -> Any:
+        """バッチに追加し、そのバッチの送信結果を待つ"""
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = self._batchers[key] = BatchingHandler(
+                partial(self._send_batch, key), self.batch_size, self.max_latency
+            )
+        future = asyncio.get_running_loop().create_future()
+        await batcher.submit((item, future))
+        return await future
+
+    async def _send_batch(self, key: Tuple, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            if key[0] == "http":
+                _, url, headers = key
+                destination, path = Destination.from_url(url)
+                body = json.dumps([item for item, _ in batch], default=str).encode()
+                status = await self._request(destination, "POST", path, body, dict(headers))
+                results: List[Any] = [status] * len(batch)
+            else:
+                _, server = key
+                # SMTPは1通ごとに往復が必要なため、バッチを同時実行数の上限まで分けて複数の接続で送る
+                messages = [item for item, _ in batch]
+                size = -(-len(messages) // self.max_per_host)
+                chunks = [messages[i:i + size] for i in range(0, len(messages), size)]
+                # 1つの接続が失敗しても他の接続で送れたメッセージの結果は残す
+                outcomes = await asyncio.gather(
+                    *(self._send_email(server, chunk) for chunk in chunks), return_exceptions=True
+                )
+                results = []
+                for chunk, errors in zip(chunks, outcomes):
+                    if isinstance(errors, BaseException):
+                        errors = [errors] * len(chunk)
+                    results.extend(error if error is None else ActionDeliveryError(str(error)) for error in errors)
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def flush(self) -> None:
+        """溜まっているバッチを全て送り出し、完了を待つ"""
+        await asyncio.gather(*(batcher.flush() for batcher in list(self._batchers.values())))
+
+    async def close(self) -> None:
+        """バッチを送り出してから全ての接続を閉じる"""
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        pools = list(self._http_pools.values()) + list(self._smtp_pools.values())
+        await asyncio.gather(*(loop.run_in_executor(self._executor, pool.close) for pool in pools))
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        送信の統計情報を返す
+
+        Returns:
+            送信数・失敗数・リクエスト数と、接続先ごとの新規接続数と再利用数
+        """
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "requests": self.requests,
+            "http_pools": {
+                f"{d.scheme}://{d.host}:{d.port}": {"created": p.created, "reused": p.reused}
+                for d, p in self._http_pools.items()
+            },
+            "smtp_pools": {
+                f"{server.username + '@' if server.username else ''}{server.host}:{server.port}": {
+                    "created": p.created, "reused": p.reused
+                }
+                for server, p in self._smtp_pools.items()
+            },
+            "batches": {repr(key): batcher.stats() for key, batcher in self._batchers.items()},
+        }
+
+
+def build_email(sender: str, parameters: Dict[str, Any], payload: Any) -> EmailMessage:
+    """
+    メールアクションのメッセージを作る
+
+    Args:
+        sender: 既定の送信元アドレス
+        parameters: アクションのparameters（to / from / subject / message）
+        payload: 本文が無い場合にJSONで本文にする内容
+
+    Returns:
+        送信するメッセージ
+    """
+    recipients = parameters["to"]
+    message = EmailMessage()
+    message["From"] = parameters.get("from", sender)
+    message["To"] = recipients if isinstance(recipients, str) else ", ".join(recipients)
+    message["Subject"] = parameters.get("subject", "Trigger alert")
+    message.set_content(parameters.get("message") or json.dumps(payload, default=str, ensure_ascii=False))
+    return message
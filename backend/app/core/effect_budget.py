@@ -0,0 +1,199 @@
+from typing import Any, Callable, Dict, Optional
+from dataclasses import replace
+import time
+import numpy as np
+
+from app.core.effect_buffer import EffectBuffer, EffectRecord, KIND_PARTICLE, KIND_SOUND, KIND_LIGHT
+from app.core.effect_timeline import TICK_INTERVAL
+
+
+class EffectBudget:
+    """
+    tickごとのパーティクル・サウンド・光エフェクトの送信予算を管理するフィルタ
+
+    EffectEngineとMinecraftConnection.send_effectの間に置き（add_effect_filterで登録）、
+    予算を超えたパーティクルはparticle_countとintensityを残り予算に合わせて比例縮小する。
+    サウンドと光は件数で管理し、予算を使い切ったtickでは送信しない。
+    """
+
+    def __init__(
+        self,
+        particles_per_tick: int = 20000,
+        sounds_per_tick: int = 64,
+        lights_per_tick: int = 32,
+        tick_interval: float = TICK_INTERVAL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limits = {
+            "particles": particles_per_tick,
+            "sounds": sounds_per_tick,
+            "lights": lights_per_tick,
+        }
+        self.tick_interval = tick_interval
+        self._clock = clock
+        self._tick = -1
+        self._used = {"particles": 0, "sounds": 0, "lights": 0}
+        self.scaled = 0
+        self.dropped = 0
+
+    def _roll_window(self) -> None:
+        """tickが進んでいれば使用量をリセットする"""
+        tick = int(self._clock() / self.tick_interval)
+        if tick != self._tick:
+            self._tick = tick
+            for key in self._used:
+                self._used[key] = 0
+
+    def _remaining(self, key: str) -> int:
+        return self.limits[key] - self._used[key]
+
+    def __call__(self, effect: Any) -> Any:
+        """
+        エフェクトに予算を適用する
+
+        Args:
+            effect: 辞書・EffectRecord・EffectBufferのいずれか
+
+        Returns:
+            予算内に縮小したエフェクト（予算切れで送信しない場合はNone）
+        """
+        self._roll_window()
+        if isinstance(effect, EffectBuffer):
+            admitted = self._admit_buffer(effect)
+            return admitted if len(admitted) else None
+        if isinstance(effect, EffectRecord):
+            return self._admit_record(effect)
+        if effect.get("type") == "combined":
+            return self._admit_combined(effect)
+        return self._admit_dict(effect)
+
+    def _particle_scale(self, requested: int) -> float:
+        """要求パーティクル数に対する縮小率を求め、使用量を加算する"""
+        remaining = self._remaining("particles")
+        if requested <= remaining:
+            self._used["particles"] += requested
+            return 1.0
+        if remaining <= 0:
+            return 0.0
+        self._used["particles"] += remaining
+        return remaining / requested
+
+    def _admit_count(self, key: str) -> bool:
+        if self._remaining(key) <= 0:
+            return False
+        self._used[key] += 1
+        return True
+
+    def _admit_record(self, record: EffectRecord) -> Optional[EffectRecord]:
+        if record.kind == "particle":
+            scale = self._particle_scale(record.particle_count)
+            if scale == 1.0:
+                return record
+            count = int(record.particle_count * scale)
+            if count <= 0:
+                self.dropped += 1
+                return None
+            self.scaled += 1
+            return replace(record, particle_count=count, intensity=record.intensity * scale)
+        if not self._admit_count("sounds" if record.kind == "sound" else "lights"):
+            self.dropped += 1
+            return None
+        return record
+
+    def _admit_dict(self, effect: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        effect_type = effect.get("type")
+        if effect_type == "particle":
+            scale = self._particle_scale(effect.get("particle_count", 0))
+            if scale == 1.0:
+                return effect
+            count = int(effect["particle_count"] * scale)
+            if count <= 0:
+                self.dropped += 1
+                return None
+            self.scaled += 1
+            return dict(effect, particle_count=count, intensity=effect["intensity"] * scale)
+        if effect_type in ("sound", "light"):
+            if not self._admit_count("sounds" if effect_type == "sound" else "lights"):
+                self.dropped += 1
+                return None
+        return effect
+
+    def _admit_combined(self, combined: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        effects = combined["effects"]
+        offsets = combined.get("start_offsets")
+        if isinstance(effects, EffectBuffer):
+            effects = effects.take(np.arange(len(effects)))
+            keep = self._buffer_mask(effects)
+            if not keep.any():
+                return None
+            admitted = dict(combined, effects=effects.take(keep))
+            if offsets is not None:
+                admitted["start_offsets"] = np.asarray(offsets)[keep].tolist()
+            return admitted
+
+        kept, kept_offsets = [], []
+        for index, effect in enumerate(effects):
+            result = self(effect)
+            if result is not None:
+                kept.append(result)
+                if offsets is not None:
+                    kept_offsets.append(offsets[index])
+        if not kept:
+            return None
+        admitted = dict(combined, effects=kept)
+        if offsets is not None:
+            admitted["start_offsets"] = kept_offsets
+        return admitted
+
+    def _buffer_mask(self, buffer: EffectBuffer) -> np.ndarray:
+        """
+        バッファ全体に予算を適用する
+        パーティクル行は全行同じ比率で縮小し（bufferを直接更新）、
+        サウンド・光行は残り件数分だけ先頭から残す
+        """
+        keep = np.ones(len(buffer), dtype=bool)
+
+        is_particle = buffer.kind == KIND_PARTICLE
+        if is_particle.any():
+            requested = int(buffer.particle_count[is_particle].sum())
+            scale = self._particle_scale(requested)
+            if scale < 1.0:
+                counts = (buffer.particle_count * scale).astype(np.int64)
+                buffer.particle_count = np.where(is_particle, counts, buffer.particle_count)
+                buffer.intensity = np.where(is_particle, buffer.intensity * scale, buffer.intensity)
+                emptied = is_particle & (counts <= 0)
+                keep &= ~emptied
+                self.dropped += int(emptied.sum())
+                self.scaled += int((is_particle & ~emptied).sum())
+
+        for kind, key in ((KIND_SOUND, "sounds"), (KIND_LIGHT, "lights")):
+            rows = np.flatnonzero(buffer.kind == kind)
+            allowed = max(0, min(len(rows), self._remaining(key)))
+            self._used[key] += allowed
+            keep[rows[allowed:]] = False
+            self.dropped += len(rows) - allowed
+
+        return keep
+
+    def _admit_buffer(self, buffer: EffectBuffer) -> EffectBuffer:
+        # 元のバッファを書き換えないよう複製してから予算を適用する
+        admitted = buffer.take(np.arange(len(buffer)))
+        return admitted.take(self._buffer_mask(admitted))
+
+    def utilization(self) -> Dict[str, Any]:
+        """
+        現在のtickにおける予算の使用率を返す
+
+        Returns:
+            種別ごとの使用率（0.0〜1.0）と累計の縮小・破棄件数
+        """
+        self._roll_window()
+        return {
+            "tick": self._tick,
+            **{
+                key: self._used[key] / self.limits[key] if self.limits[key] else 1.0
+                for key in self._used
+            },
+            "scaled": self.scaled,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,384 @@
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import numpy as np
+
+# エフェクト種別のコード（type列に格納する値）
+EFFECT_KINDS = ("particle", "sound", "light")
+KIND_PARTICLE = 0
+KIND_SOUND = 1
+KIND_LIGHT = 2
+
+# 種別ごとのデフォルトサブタイプ（各create_*_effectのデフォルト引数と同じ）
+DEFAULT_SUBTYPES = ("sparkle", "magic", "point")
+
+
+@dataclass(slots=True)
+class EffectRecord:
+    """
+    単一エフェクトのコンパクトな表現
+    辞書への変換はAPI境界でto_dict()を呼んだ時点で行う
+    """
+    kind: str
+    subtype: str
+    color: Optional[str]
+    duration: float
+    intensity: float
+    position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    particle_count: int = 0
+    spread_radius: Optional[float] = None
+    falloff_distance: Optional[float] = None
+    pitch: Optional[float] = None
+    radius: Optional[float] = None
+    attenuation: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        create_*_effectが返す形式の辞書に変換する
+
+        Returns:
+            エフェクト種別ごとのキーを持つ辞書
+        """
+        if self.kind == "particle":
+            return {
+                "type": "particle",
+                "particle_type": self.subtype,
+                "color": self.color,
+                "duration": self.duration,
+                "intensity": self.intensity,
+                "position": self.position,
+                "particle_count": self.particle_count,
+                "spread_radius": self.spread_radius
+            }
+        if self.kind == "sound":
+            return {
+                "type": "sound",
+                "sound_type": self.subtype,
+                "volume": self.intensity,
+                "duration": self.duration,
+                "position": self.position,
+                "falloff_distance": self.falloff_distance,
+                "pitch": self.pitch
+            }
+        return {
+            "type": "light",
+            "light_type": self.subtype,
+            "color": self.color,
+            "intensity": self.intensity,
+            "duration": self.duration,
+            "position": self.position,
+            "radius": self.radius,
+            "attenuation": self.attenuation
+        }
+
+
+@dataclass
+class EffectBuffer:
+    """
+    Struct-of-Arrays形式で保持されたエフェクト群
+    1行が1エフェクトに対応し、種別に該当しない派生値はNaN（particle_countは0）となる
+    """
+    kind: np.ndarray
+    subtype: np.ndarray
+    color: np.ndarray
+    duration: np.ndarray
+    intensity: np.ndarray
+    position: np.ndarray
+    particle_count: np.ndarray
+    spread_radius: np.ndarray
+    falloff_distance: np.ndarray
+    pitch: np.ndarray
+    radius: np.ndarray
+    attenuation: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.kind.shape[0])
+
+    def __getitem__(self, index: int) -> EffectRecord:
+        """指定行をEffectRecordとして取り出す"""
+        return EffectRecord(
+            kind=EFFECT_KINDS[int(self.kind[index])],
+            subtype=self.subtype[index],
+            color=self.color[index],
+            duration=float(self.duration[index]),
+            intensity=float(self.intensity[index]),
+            position=tuple(self.position[index].tolist()),
+            particle_count=int(self.particle_count[index]),
+            spread_radius=_optional(self.spread_radius[index]),
+            falloff_distance=_optional(self.falloff_distance[index]),
+            pitch=_optional(self.pitch[index]),
+            radius=_optional(self.radius[index]),
+            attenuation=_optional(self.attenuation[index]),
+        )
+
+    def __iter__(self) -> Iterator[EffectRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @classmethod
+    def from_records(cls, records: Sequence[EffectRecord]) -> "EffectBuffer":
+        """
+        EffectRecordの列からバッファを構築する
+
+        Args:
+            records: 変換元のエフェクト
+
+        Returns:
+            同じ内容のEffectBuffer
+        """
+        kind_lookup = {name: code for code, name in enumerate(EFFECT_KINDS)}
+        n = len(records)
+        return cls(
+            kind=np.fromiter((kind_lookup[r.kind] for r in records), dtype=np.int8, count=n),
+            subtype=np.array([r.subtype for r in records], dtype=object),
+            color=np.array([r.color for r in records], dtype=object),
+            duration=np.fromiter((r.duration for r in records), dtype=np.float64, count=n),
+            intensity=np.fromiter((r.intensity for r in records), dtype=np.float64, count=n),
+            position=np.array([r.position for r in records], dtype=np.float64).reshape(n, 3),
+            particle_count=np.fromiter((r.particle_count for r in records), dtype=np.int64, count=n),
+            spread_radius=_column(records, "spread_radius"),
+            falloff_distance=_column(records, "falloff_distance"),
+            pitch=_column(records, "pitch"),
+            radius=_column(records, "radius"),
+            attenuation=_column(records, "attenuation"),
+        )
+
+    @classmethod
+    def concat(cls, buffers: Iterable["EffectBuffer"]) -> "EffectBuffer":
+        """
+        複数のバッファを連結する
+
+        Args:
+            buffers: 連結するバッファ群
+
+        Returns:
+            連結後のEffectBuffer
+        """
+        buffers = list(buffers)
+        if not buffers:
+            return cls.from_records([])
+        return cls(**{
+            name: np.concatenate([getattr(b, name) for b in buffers])
+            for name in cls.__dataclass_fields__
+        })
+
+    def take(self, indices: np.ndarray) -> "EffectBuffer":
+        """
+        指定した行（インデックス配列または真偽値マスク）だけを持つバッファを返す
+
+        Args:
+            indices: 取り出す行
+
+        Returns:
+            選択した行からなるEffectBuffer
+        """
+        return type(self)(**{
+            name: getattr(self, name)[indices]
+            for name in self.__dataclass_fields__
+        })
+
+    def to_columns(self) -> Dict[str, Any]:
+        """
+        JSONへ直接シリアライズ可能なカラム形式の辞書を返す
+
+        Returns:
+            カラム名をキー、値のリストを値とする辞書
+        """
+        return {
+            "type": [EFFECT_KINDS[k] for k in self.kind.tolist()],
+            "subtype": self.subtype.tolist(),
+            "color": self.color.tolist(),
+            "duration": self.duration.tolist(),
+            "intensity": self.intensity.tolist(),
+            "position": self.position.tolist(),
+            "particle_count": self.particle_count.tolist(),
+            "spread_radius": _nan_to_none(self.spread_radius),
+            "falloff_distance": _nan_to_none(self.falloff_distance),
+            "pitch": _nan_to_none(self.pitch),
+            "radius": _nan_to_none(self.radius),
+            "attenuation": _nan_to_none(self.attenuation),
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        行ごとに個別生成メソッドと同じ形式の辞書へ変換する
+
+        Returns:
+            create_particle_effect等と同一キー・同一値のエフェクト辞書のリスト
+        """
+        kinds = self.kind.tolist()
+        subtypes = self.subtype.tolist()
+        colors = self.color.tolist()
+        durations = self.duration.tolist()
+        intensities = self.intensity.tolist()
+        positions = [tuple(p) for p in self.position.tolist()]
+        particle_counts = self.particle_count.tolist()
+        spread_radii = self.spread_radius.tolist()
+        falloffs = self.falloff_distance.tolist()
+        pitches = self.pitch.tolist()
+        radii = self.radius.tolist()
+        attenuations = self.attenuation.tolist()
+
+        effects = []
+        for i, kind in enumerate(kinds):
+            if kind == KIND_PARTICLE:
+                effects.append({
+                    "type": "particle",
+                    "particle_type": subtypes[i],
+                    "color": colors[i],
+                    "duration": durations[i],
+                    "intensity": intensities[i],
+                    "position": positions[i],
+                    "particle_count": particle_counts[i],
+                    "spread_radius": spread_radii[i]
+                })
+            elif kind == KIND_SOUND:
+                effects.append({
+                    "type": "sound",
+                    "sound_type": subtypes[i],
+                    "volume": intensities[i],
+                    "duration": durations[i],
+                    "position": positions[i],
+                    "falloff_distance": falloffs[i],
+                    "pitch": pitches[i]
+                })
+            else:
+                effects.append({
+                    "type": "light",
+                    "light_type": subtypes[i],
+                    "color": colors[i],
+                    "intensity": intensities[i],
+                    "duration": durations[i],
+                    "position": positions[i],
+                    "radius": radii[i],
+                    "attenuation": attenuations[i]
+                })
+        return effects
+
+
+def encode_effect(obj: Any) -> Any:
+    """
+    json.dumpsのdefaultに渡すエンコーダ
+    EffectRecord / EffectBufferをシリアライズ時にはじめて辞書へ変換する
+    """
+    if isinstance(obj, EffectRecord):
+        return obj.to_dict()
+    if isinstance(obj, EffectBuffer):
+        return obj.to_dicts()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def effect_duration(effect: Any) -> float:
+    """辞書・EffectRecord・EffectBufferのいずれからも最大継続時間を取得する"""
+    if isinstance(effect, EffectBuffer):
+        return float(effect.duration.max()) if len(effect) else 0.0
+    if isinstance(effect, EffectRecord):
+        return effect.duration
+    if effect.get("type") == "combined":
+        return effect["total_duration"]
+    return effect["duration"]
+
+
+def _optional(value: float) -> Optional[float]:
+    """NaNをNoneに変換したfloatを返す"""
+    value = float(value)
+    return None if value != value else value
+
+
+def _column(records: Sequence[EffectRecord], name: str) -> np.ndarray:
+    """Optionalな派生値の列をNaN埋めの配列にする"""
+    return np.array(
+        [np.nan if getattr(r, name) is None else getattr(r, name) for r in records],
+        dtype=np.float64
+    )
+
+
+def _nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    """NaNをNoneに置き換えたリストを返す（JSONにNaNを出さないため）"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def build_effect_buffer(
+    effect_types: Sequence[str],
+    colors: Sequence[Optional[str]],
+    durations: Sequence[float],
+    intensities: Sequence[float],
+    positions: Optional[Sequence[Sequence[float]]],
+    subtypes: Optional[Sequence[Optional[str]]],
+    pitches: Sequence[float],
+) -> EffectBuffer:
+    """
+    入力配列からEffectBufferを構築し、派生パラメータを一括計算する
+
+    Args:
+        effect_types: 各行のエフェクト種別（particle / sound / light）
+        colors: 各行の色
+        durations: 各行の継続時間
+        intensities: 各行の強度
+        positions: 各行の座標（Noneの場合は原点）
+        subtypes: 各行のサブタイプ（Noneの要素は種別のデフォルト）
+        pitches: サウンド行のピッチ（サウンド行の出現順）
+
+    Returns:
+        派生値を計算済みのEffectBuffer
+    """
+    n = len(effect_types)
+    kind_lookup = {name: code for code, name in enumerate(EFFECT_KINDS)}
+    try:
+        kind = np.fromiter((kind_lookup[t] for t in effect_types), dtype=np.int8, count=n)
+    except KeyError as e:
+        raise ValueError(f"Unsupported effect type: {e.args[0]}")
+
+    for name, column in (("colors", colors), ("durations", durations), ("intensities", intensities)):
+        if len(column) != n:
+            raise ValueError(f"Length of {name} ({len(column)}) does not match effect_types ({n})")
+
+    duration = np.asarray(durations, dtype=np.float64)
+    intensity = np.asarray(intensities, dtype=np.float64)
+    if positions is None:
+        position = np.zeros((n, 3), dtype=np.float64)
+    else:
+        position = np.asarray(positions, dtype=np.float64).reshape(n, 3)
+
+    if subtypes is None:
+        subtype = np.array([DEFAULT_SUBTYPES[k] for k in kind.tolist()], dtype=object)
+    else:
+        if len(subtypes) != n:
+            raise ValueError(f"Length of subtypes ({len(subtypes)}) does not match effect_types ({n})")
+        subtype = np.array(
+            [s if s is not None else DEFAULT_SUBTYPES[k] for s, k in zip(subtypes, kind.tolist())],
+            dtype=object
+        )
+
+    is_particle = kind == KIND_PARTICLE
+    is_sound = kind == KIND_SOUND
+    is_light = kind == KIND_LIGHT
+
+    # 個別メソッドと同じ演算順序で計算し、結果をビット単位で一致させる
+    particle_count = np.where(is_particle, intensity * 100, 0.0).astype(np.int64)
+    spread_radius = np.where(is_particle, intensity * 2.0, np.nan)
+    falloff_distance = np.where(is_sound, intensity * 10.0, np.nan)
+    radius = np.where(is_light, intensity * 5.0, np.nan)
+    with np.errstate(divide="ignore"):
+        attenuation = np.where(is_light, 1.0 / (intensity + 1.0), np.nan)
+
+    pitch = np.full(n, np.nan)
+    pitch[is_sound] = np.asarray(pitches, dtype=np.float64)
+
+    # サウンドは色を持たない
+    color = np.array(colors, dtype=object)
+    color[is_sound] = None
+
+    return EffectBuffer(
+        kind=kind,
+        subtype=subtype,
+        color=color,
+        duration=duration,
+        intensity=intensity,
+        position=position,
+        particle_count=particle_count,
+        spread_radius=spread_radius,
+        falloff_distance=falloff_distance,
+        pitch=pitch,
+        radius=radius,
+        attenuation=attenuation,
+    )
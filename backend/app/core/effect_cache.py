@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import threading
+
+
+class EffectTemplateCache:
+    """
+    エフェクトテンプレートのLRUキャッシュ
+    正規化済みパラメータをキーに、位置や乱数に依存しない部分を保持する
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        テンプレートを取得する
+
+        Args:
+            key: 正規化済みのキャッシュキー
+
+        Returns:
+            キャッシュ済みのテンプレート（存在しない場合はNone）
+        """
+        with self._lock:
+            template = self._entries.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return template
+
+    def put(self, key: Hashable, template: Any) -> None:
+        """
+        テンプレートを登録し、上限を超えた場合は最も古いものを破棄する
+
+        Args:
+            key: 正規化済みのキャッシュキー
+            template: 登録するテンプレート
+        """
+        with self._lock:
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        テンプレートを取得し、存在しない場合はfactoryで生成して登録する
+
+        Args:
+            key: 正規化済みのキャッシュキー
+            factory: テンプレートを生成する関数
+
+        Returns:
+            キャッシュ済みまたは新規生成したテンプレート
+        """
+        template = self.get(key)
+        if template is None:
+            template = factory()
+            self.put(key, template)
+        return template
+
+    def clear(self) -> None:
+        """キャッシュと統計情報をクリアする"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> Dict[str, int]:
+        """
+        キャッシュの統計情報を返す
+
+        Returns:
+            hits / misses / evictions / size / maxsize を含む辞書
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,377 @@
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from dataclasses import replace
+import logging
+import math
+import numpy as np
+
+from app.core.effect_buffer import EffectBuffer, EffectRecord, KIND_PARTICLE, KIND_SOUND
+from app.core.minecraft_bridge import MinecraftConnection
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[float, float, float]
+
+
+class PlayerSpatialIndex:
+    """
+    プレイヤー位置の一様グリッドインデックス
+    Minecraftのワールドは水平方向に広いため、x/z平面で分割し高さは距離計算のみに使う
+    """
+
+    def __init__(self, cell_size: float = 64.0):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive: {cell_size}")
+        self.cell_size = cell_size
+        self._players: Dict[str, Position] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._positions: Optional[np.ndarray] = None
+        self._grid: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def _cell(self, position: Position) -> Tuple[int, int]:
+        return (
+            math.floor(position[0] / self.cell_size),
+            math.floor(position[2] / self.cell_size)
+        )
+
+    def update(self, player_id: str, position: Iterable[float]) -> None:
+        """
+        プレイヤーの位置を登録・更新する
+
+        Args:
+            player_id: プレイヤーID
+            position: (x, y, z)座標
+        """
+        position = tuple(float(v) for v in position)
+        cell = self._cell(position)
+        previous = self._cell_of.get(player_id)
+        if previous != cell:
+            if previous is not None:
+                self._discard_from_cell(player_id, previous)
+            self._cells.setdefault(cell, set()).add(player_id)
+            self._cell_of[player_id] = cell
+        self._players[player_id] = position
+        self._positions = None
+        self._grid = None
+
+    def remove(self, player_id: str) -> None:
+        """
+        プレイヤーをインデックスから削除する
+
+        Args:
+            player_id: プレイヤーID
+        """
+        cell = self._cell_of.pop(player_id, None)
+        if cell is not None:
+            self._discard_from_cell(player_id, cell)
+        self._players.pop(player_id, None)
+        self._positions = None
+        self._grid = None
+
+    def _discard_from_cell(self, player_id: str, cell: Tuple[int, int]) -> None:
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(player_id)
+            if not members:
+                del self._cells[cell]
+
+    def nearest_distance(self, position: Position, max_distance: float) -> Optional[float]:
+        """
+        max_distance以内で最も近いプレイヤーまでの距離を返す
+
+        Args:
+            position: 基準座標
+            max_distance: 探索半径
+
+        Returns:
+            最近傍プレイヤーまでの距離（半径内にいない場合はNone）
+        """
+        x, y, z = position
+        reach = math.ceil(max_distance / self.cell_size)
+        cx, cz = self._cell(position)
+        best = max_distance * max_distance
+        found = False
+        players = self._players
+        for gx in range(cx - reach, cx + reach + 1):
+            for gz in range(cz - reach, cz + reach + 1):
+                members = self._cells.get((gx, gz))
+                if not members:
+                    continue
+                for player_id in members:
+                    px, py, pz = players[player_id]
+                    d2 = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+                    if d2 <= best:
+                        best = d2
+                        found = True
+        return math.sqrt(best) if found else None
+
+    def positions_array(self) -> np.ndarray:
+        """全プレイヤー座標を(n, 3)の配列で返す（更新があるまで再利用する）"""
+        if self._positions is None:
+            self._positions = np.array(list(self._players.values()), dtype=np.float64).reshape(-1, 3)
+        return self._positions
+
+    def grid_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        グリッドを配列で返す（更新があるまで再利用する）
+
+        Returns:
+            (セルキーの昇順配列, セルごとの先頭位置, セルごとの人数, セル順に並べたプレイヤー座標)
+            セルキーは cell_key() で求める
+        """
+        if self._grid is None:
+            cells = sorted(self._cells.items(), key=lambda item: cell_key(*item[0]))
+            keys = np.array([cell_key(*cell) for cell, _ in cells], dtype=np.int64)
+            counts = np.array([len(members) for _, members in cells], dtype=np.int64)
+            starts = np.cumsum(counts) - counts
+            players = self._players
+            positions = np.array(
+                [players[player_id] for _, members in cells for player_id in members], dtype=np.float64
+            ).reshape(-1, 3)
+            self._grid = (keys, starts, counts, positions)
+        return self._grid
+
+    def attach(self, connection: MinecraftConnection) -> None:
+        """
+        ブリッジのプレイヤーイベントでインデックスを更新するよう登録する
+        （既存のハンドラーは置き換えずに追加で登録する）
+
+        Args:
+            connection: Minecraftサーバーとの接続
+        """
+        connection.register_event_handler("player_join", self._handle_player_update)
+        connection.register_event_handler("player_move", self._handle_player_update)
+        connection.register_event_handler("player_quit", self._handle_player_quit)
+
+    def detach(self, connection: MinecraftConnection) -> None:
+        """
+        attachで登録したハンドラーを解除する
+
+        Args:
+            connection: Minecraftサーバーとの接続
+        """
+        connection.unregister_event_handler("player_join", self._handle_player_update)
+        connection.unregister_event_handler("player_move", self._handle_player_update)
+        connection.unregister_event_handler("player_quit", self._handle_player_quit)
+
+    async def _handle_player_update(self, data: Dict[str, Any]) -> None:
+        player_id = data.get("player")
+        position = _extract_position(data)
+        if player_id is None or position is None:
+            logger.warning(f"Invalid player event: {data}")
+            return
+        self.update(player_id, position)
+
+    async def _handle_player_quit(self, data: Dict[str, Any]) -> None:
+        player_id = data.get("player")
+        if player_id is not None:
+            self.remove(player_id)
+
+
+def cell_key(cx: Any, cz: Any) -> Any:
+    """(x, z)のセル座標を1つの整数キーにする（スカラーとint64配列のどちらにも使える）"""
+    return cx * (1 << 32) + cz
+
+
+def _extract_position(data: Dict[str, Any]) -> Optional[Position]:
+    """イベントデータから座標を取り出す（position配列またはx/y/zキー）"""
+    if "position" in data:
+        return tuple(data["position"])
+    if all(axis in data for axis in ("x", "y", "z")):
+        return (data["x"], data["y"], data["z"])
+    return None
+
+
+class EffectCuller:
+    """
+    どのプレイヤーからも見えない・聞こえないエフェクトを送信前に除外するフィルタ
+
+    サウンドはfalloff_distance、それ以外はview_distanceを可視半径とする。
+    パーティクルは最近傍プレイヤーがlod_distanceより遠い場合、距離に応じて
+    particle_countを最小min_lod_scale倍まで減らす。
+    MinecraftConnection.add_effect_filterに登録して使う。
+    """
+
+    def __init__(
+        self,
+        index: PlayerSpatialIndex,
+        view_distance: float = 64.0,
+        lod_distance: float = 32.0,
+        min_lod_scale: float = 0.25
+    ):
+        self.index = index
+        self.view_distance = view_distance
+        self.lod_distance = lod_distance
+        self.min_lod_scale = min_lod_scale
+        self.culled = 0
+        self.downgraded = 0
+
+    def __call__(self, effect: Any) -> Any:
+        """
+        エフェクトを間引く
+
+        Args:
+            effect: 辞書・EffectRecord・EffectBufferのいずれか
+
+        Returns:
+            送信するエフェクト（全て除外された場合はNone）
+        """
+        if isinstance(effect, EffectBuffer):
+            culled = self.cull_buffer(effect)
+            return culled if len(culled) else None
+        if isinstance(effect, EffectRecord):
+            return self.cull_record(effect)
+        if effect.get("type") == "combined":
+            return self._cull_combined(effect)
+        return self.cull_dict(effect)
+
+    def _lod_scale(self, distance: float, radius: float) -> float:
+        if distance <= self.lod_distance or radius <= self.lod_distance:
+            return 1.0
+        ratio = (distance - self.lod_distance) / (radius - self.lod_distance)
+        return max(self.min_lod_scale, 1.0 - ratio)
+
+    def cull_record(self, record: EffectRecord) -> Optional[EffectRecord]:
+        """EffectRecordを可視判定し、必要に応じて間引いたコピーを返す"""
+        radius = self.view_distance
+        if record.kind == "sound" and record.falloff_distance is not None:
+            radius = record.falloff_distance
+        distance = self.index.nearest_distance(record.position, radius)
+        if distance is None:
+            self.culled += 1
+            return None
+        if record.kind == "particle":
+            scale = self._lod_scale(distance, radius)
+            if scale < 1.0:
+                self.downgraded += 1
+                return replace(record, particle_count=max(1, int(record.particle_count * scale)))
+        return record
+
+    def cull_dict(self, effect: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """エフェクト辞書を可視判定し、必要に応じて間引いたコピーを返す"""
+        position = effect.get("position")
+        if position is None:
+            return effect
+        radius = self.view_distance
+        if effect.get("type") == "sound" and effect.get("falloff_distance") is not None:
+            radius = effect["falloff_distance"]
+        distance = self.index.nearest_distance(position, radius)
+        if distance is None:
+            self.culled += 1
+            return None
+        if effect.get("type") == "particle":
+            scale = self._lod_scale(distance, radius)
+            if scale < 1.0:
+                self.downgraded += 1
+                return dict(effect, particle_count=max(1, int(effect["particle_count"] * scale)))
+        return effect
+
+    def _cull_combined(self, combined: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        effects = combined["effects"]
+        offsets = combined.get("start_offsets")
+        if isinstance(effects, EffectBuffer):
+            radii = self._radii(effects)
+            distances = self._nearest_distances(effects, radii)
+            keep = distances <= radii
+            self.culled += int(len(effects) - keep.sum())
+            if not keep.any():
+                return None
+            culled = dict(combined, effects=self._apply_lod(effects.take(keep), distances[keep]))
+            if offsets is not None:
+                culled["start_offsets"] = np.asarray(offsets)[keep].tolist()
+            return culled
+
+        kept, kept_offsets = [], []
+        for index, effect in enumerate(effects):
+            result = self(effect)
+            if result is not None:
+                kept.append(result)
+                if offsets is not None:
+                    kept_offsets.append(offsets[index])
+        if not kept:
+            return None
+        culled = dict(combined, effects=kept)
+        if offsets is not None:
+            culled["start_offsets"] = kept_offsets
+        return culled
+
+    def _radii(self, buffer: EffectBuffer) -> np.ndarray:
+        use_falloff = (buffer.kind == KIND_SOUND) & ~np.isnan(buffer.falloff_distance)
+        return np.where(use_falloff, buffer.falloff_distance, self.view_distance)
+
+    def _nearest_distances(self, buffer: EffectBuffer, radii: np.ndarray) -> np.ndarray:
+        """
+        各行について可視半径内で最も近いプレイヤーまでの距離を求める（半径内にいない場合はinf）
+
+        nearest_distanceと同じくグリッドの近傍セルだけを調べる。近傍セルのずらし量ごとに
+        (行, そのセルのプレイヤー)の組を配列で作り、行ごとの最小値をreduceatで求める。
+        """
+        distances = np.full(len(buffer), np.inf)
+        keys, starts, counts, players = self.index.grid_arrays()
+        if not len(buffer) or not len(keys):
+            return distances
+        cell_size = self.index.cell_size
+        positions = buffer.position
+        cx = np.floor(positions[:, 0] / cell_size).astype(np.int64)
+        cz = np.floor(positions[:, 2] / cell_size).astype(np.int64)
+        max_radius = float(radii.max())
+        reach = math.ceil(max_radius / cell_size)
+        best = np.full(len(buffer), np.inf)
+        for dx in range(-reach, reach + 1):
+            for dz in range(-reach, reach + 1):
+                # セル同士の最短距離が最大半径を超えるずらし量は調べない
+                gap_x = max(abs(dx) - 1, 0) * cell_size
+                gap_z = max(abs(dz) - 1, 0) * cell_size
+                if gap_x * gap_x + gap_z * gap_z > max_radius * max_radius:
+                    continue
+                key = cell_key(cx + dx, cz + dz)
+                slot = np.searchsorted(keys, key)
+                np.minimum(slot, len(keys) - 1, out=slot)
+                rows = np.flatnonzero(keys[slot] == key)
+                if not len(rows):
+                    continue
+                slot = slot[rows]
+                count = counts[slot]
+                first = np.cumsum(count) - count
+                pair_rows = np.repeat(rows, count)
+                pair_players = np.repeat(starts[slot] - first, count) + np.arange(int(count.sum()))
+                delta = positions[pair_rows] - players[pair_players]
+                d2 = np.einsum("ij,ij->i", delta, delta)
+                best[rows] = np.minimum(best[rows], np.minimum.reduceat(d2, first))
+        found = np.isfinite(best)
+        distances[found] = np.sqrt(best[found])
+        return distances
+
+    def _apply_lod(self, buffer: EffectBuffer, distances: np.ndarray) -> EffectBuffer:
+        """遠方のパーティクル行のparticle_countを距離に応じて減らす（bufferを直接更新する）"""
+        radii = self._radii(buffer)
+        span = np.maximum(radii - self.lod_distance, 1e-9)
+        scale = np.clip(1.0 - (distances - self.lod_distance) / span, self.min_lod_scale, 1.0)
+        lod = (buffer.kind == KIND_PARTICLE) & (distances > self.lod_distance) & (radii > self.lod_distance)
+        if lod.any():
+            self.downgraded += int(lod.sum())
+            buffer.particle_count = np.where(
+                lod,
+                np.maximum(1, (buffer.particle_count * scale).astype(np.int64)),
+                buffer.particle_count
+            )
+        return buffer
+
+    def cull_buffer(self, buffer: EffectBuffer) -> EffectBuffer:
+        """
+        EffectBufferを一括で可視判定し、不可視行の除外と遠方パーティクルの間引きを行う
+
+        Args:
+            buffer: 判定するエフェクト群
+
+        Returns:
+            送信対象の行だけを持つ新しいEffectBuffer
+        """
+        radii = self._radii(buffer)
+        distances = self._nearest_distances(buffer, radii)
+        keep = distances <= radii
+        self.culled += int(len(buffer) - keep.sum())
+        return self._apply_lod(buffer.take(keep), distances[keep])
@@ -1,10 +1,28 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Union
 import random
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+from app.core.effect_buffer import (
+    EffectBuffer,
+    EffectRecord,
+    EFFECT_KINDS,
+    build_effect_buffer,
+    effect_duration,
+)
+from app.core.effect_cache import EffectTemplateCache
+from app.core.tracing import STAGE_EFFECT_ENGINE, traced
+from app.core.particle_simulation import (
+    SimulatedParticleEffect,
+    SimulationSettings,
+    TrajectoryCache,
+)
+
+# エンジンが扱うエフェクト表現（API境界では辞書、内部ではコンパクト表現）
+EffectLike = Union[Dict[str, Any], EffectRecord, EffectBuffer]
 
 # エフェクトのパラメータを定義するデータクラス
-@dataclass
+@dataclass(slots=True)
 class EffectParameters:
     color: str
     duration: float
@@ -17,11 +35,56 @@ class EffectEngine:
     様々な視覚・聴覚エフェクトを生成する機能を提供
     """
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, cache_size: int = 1024):
+        """
+        Args:
+            seed: 乱数ストリームのシード（Noneの場合は非決定的）
+            cache_size: エフェクトテンプレートキャッシュの最大件数
+        """
         self.logger = logging.getLogger(__name__)
         self._particle_types = ["sparkle", "smoke", "fire", "bubble"]
         self._sound_types = ["explosion", "magic", "ambient", "music"]
         self._light_types = ["point", "spot", "ambient", "directional"]
+        self._rng = random.Random(seed)
+        self._template_cache = EffectTemplateCache(cache_size)
+        self._trajectory_cache = TrajectoryCache()
+
+    def spawn_rng(self, seed: Optional[int] = None) -> random.Random:
+        """
+        リクエスト単位の乱数ストリームを生成する
+
+        Args:
+            seed: 明示的なシード（省略時はエンジンの乱数ストリームから導出）
+
+        Returns:
+            独立した乱数生成器
+        """
+        if seed is None:
+            seed = self._rng.getrandbits(64)
+        return random.Random(seed)
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        エフェクトテンプレートキャッシュの統計情報を返す
+
+        Returns:
+            hits / misses / evictions / size / maxsize を含む辞書
+        """
+        return self._template_cache.info()
+
+    def _get_template(self, key: tuple, factory) -> EffectRecord:
+        """
+        正規化済みキーに対応するテンプレートを取得する（未登録なら生成して登録）
+
+        テンプレートは位置やピッチなど呼び出しごとに変わる値を含まないため、
+        ログ出力は新規生成時のみ行う。
+        """
+        template = self._template_cache.get(key)
+        if template is None:
+            template = factory()
+            self._template_cache.put(key, template)
+            self.logger.info(f"Created {key[0]} effect template: {template}")
+        return template
 
     def create_particle_effect(
         self, 
@@ -38,23 +101,42 @@ class EffectEngine:
         Returns:
             生成されたパーティクルエフェクトの情報
         """
+        return self.create_particle_record(params, particle_type).to_dict()
+
+    @traced(STAGE_EFFECT_ENGINE)
+    def create_particle_record(
+        self,
+        params: EffectParameters,
+        particle_type: str = "sparkle"
+    ) -> EffectRecord:
+        """
+        パーティクルエフェクトをEffectRecordとして生成する
+
+        Args:
+            params: エフェクトのパラメータ
+            particle_type: パーティクルの種類
+
+        Returns:
+            生成されたパーティクルエフェクト
+        """
         try:
             if particle_type not in self._particle_types:
                 raise ValueError(f"Unsupported particle type: {particle_type}")
 
-            effect = {
-                "type": "particle",
-                "particle_type": particle_type,
-                "color": params.color,
-                "duration": params.duration,
-                "intensity": params.intensity,
-                "position": params.position,
-                "particle_count": int(params.intensity * 100),
-                "spread_radius": params.intensity * 2.0
-            }
-            
-            self.logger.info(f"Created particle effect: {effect}")
-            return effect
+            duration, intensity = float(params.duration), float(params.intensity)
+            template = self._get_template(
+                ("particle", particle_type, params.color, duration, intensity),
+                lambda: EffectRecord(
+                    kind="particle",
+                    subtype=particle_type,
+                    color=params.color,
+                    duration=duration,
+                    intensity=intensity,
+                    particle_count=int(intensity * 100),
+                    spread_radius=intensity * 2.0
+                )
+            )
+            return replace(template, position=params.position)
             
         except Exception as e:
             self.logger.error(f"Failed to create particle effect: {str(e)}")
@@ -63,7 +145,8 @@ class EffectEngine:
     def create_sound_effect(
         self,
         params: EffectParameters,
-        sound_type: str = "magic"
+        sound_type: str = "magic",
+        rng: Optional[random.Random] = None
     ) -> Dict[str, Any]:
         """
         サウンドエフェクトを生成する
@@ -71,26 +154,53 @@ class EffectEngine:
         Args:
             params: エフェクトのパラメータ
             sound_type: サウンドの種類
+            rng: ピッチに使う乱数ストリーム（省略時はエンジンのストリーム）
 
         Returns:
             生成されたサウンドエフェクトの情報
         """
+        return self.create_sound_record(params, sound_type, rng).to_dict()
+
+    @traced(STAGE_EFFECT_ENGINE)
+    def create_sound_record(
+        self,
+        params: EffectParameters,
+        sound_type: str = "magic",
+        rng: Optional[random.Random] = None
+    ) -> EffectRecord:
+        """
+        サウンドエフェクトをEffectRecordとして生成する
+
+        Args:
+            params: エフェクトのパラメータ
+            sound_type: サウンドの種類
+            rng: ピッチに使う乱数ストリーム（省略時はエンジンのストリーム）
+
+        Returns:
+            生成されたサウンドエフェクト
+        """
         try:
             if sound_type not in self._sound_types:
                 raise ValueError(f"Unsupported sound type: {sound_type}")
 
-            effect = {
-                "type": "sound",
-                "sound_type": sound_type,
-                "volume": params.intensity,
-                "duration": params.duration,
-                "position": params.position,
-                "falloff_distance": params.intensity * 10.0,
-                "pitch": random.uniform(0.8, 1.2)
-            }
-
-            self.logger.info(f"Created sound effect: {effect}")
-            return effect
+            duration, intensity = float(params.duration), float(params.intensity)
+            template = self._get_template(
+                ("sound", sound_type, None, duration, intensity),
+                lambda: EffectRecord(
+                    kind="sound",
+                    subtype=sound_type,
+                    color=None,
+                    duration=duration,
+                    intensity=intensity,
+                    falloff_distance=intensity * 10.0
+                )
+            )
+            # キャッシュ済みテンプレートに乱数部分のみを適用する
+            return replace(
+                template,
+                position=params.position,
+                pitch=(rng or self._rng).uniform(0.8, 1.2)
+            )
 
         except Exception as e:
             self.logger.error(f"Failed to create sound effect: {str(e)}")
@@ -111,40 +221,204 @@ class EffectEngine:
         Returns:
             生成された光エフェクトの情報
         """
+        return self.create_light_record(params, light_type).to_dict()
+
+    @traced(STAGE_EFFECT_ENGINE)
+    def create_light_record(
+        self,
+        params: EffectParameters,
+        light_type: str = "point"
+    ) -> EffectRecord:
+        """
+        光エフェクトをEffectRecordとして生成する
+
+        Args:
+            params: エフェクトのパラメータ
+            light_type: 光の種類
+
+        Returns:
+            生成された光エフェクト
+        """
         try:
             if light_type not in self._light_types:
                 raise ValueError(f"Unsupported light type: {light_type}")
 
-            effect = {
-                "type": "light",
-                "light_type": light_type,
-                "color": params.color,
-                "intensity": params.intensity,
-                "duration": params.duration,
-                "position": params.position,
-                "radius": params.intensity * 5.0,
-                "attenuation": 1.0 / (params.intensity + 1.0)
-            }
-
-            self.logger.info(f"Created light effect: {effect}")
-            return effect
+            duration, intensity = float(params.duration), float(params.intensity)
+            template = self._get_template(
+                ("light", light_type, params.color, duration, intensity),
+                lambda: EffectRecord(
+                    kind="light",
+                    subtype=light_type,
+                    color=params.color,
+                    duration=duration,
+                    intensity=intensity,
+                    radius=intensity * 5.0,
+                    attenuation=1.0 / (intensity + 1.0)
+                )
+            )
+            return replace(template, position=params.position)
 
         except Exception as e:
             self.logger.error(f"Failed to create light effect: {str(e)}")
             raise
 
-    def combine_effects(self, *effects: Dict[str, Any]) -> Dict[str, Any]:
+    @traced(STAGE_EFFECT_ENGINE)
+    def create_simulated_particle_effect(
+        self,
+        params: EffectParameters,
+        particle_type: str = "sparkle",
+        settings: Optional[SimulationSettings] = None
+    ) -> SimulatedParticleEffect:
+        """
+        パーティクルの軌道をサーバー側で計算したエフェクトを生成する
+
+        軌道はparticle_count・spread_radius・設定が同じプリセットごとにキャッシュされ、
+        位置の違いは平行移動で適用する。
+
+        Args:
+            params: エフェクトのパラメータ
+            particle_type: パーティクルの種類
+            settings: エミッタ形状・重力・抗力などのシミュレーション設定
+
+        Returns:
+            (particles, frames, 3)の軌道を持つシミュレーション済みエフェクト
+        """
+        settings = settings or SimulationSettings()
+        record = self.create_particle_record(params, particle_type)
+        try:
+            trajectories = self._trajectory_cache.get(
+                record.particle_count, record.position, record.spread_radius, settings
+            )
+            return SimulatedParticleEffect(
+                record=record,
+                trajectories=trajectories,
+                frame_interval=settings.frame_interval
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to simulate particle effect: {str(e)}")
+            raise
+
+    @traced(STAGE_EFFECT_ENGINE)
+    def create_effect_batch(
+        self,
+        effect_types: Sequence[str],
+        colors: Sequence[str],
+        durations: Sequence[float],
+        intensities: Sequence[float],
+        positions: Optional[Sequence[Sequence[float]]] = None,
+        subtypes: Optional[Sequence[Optional[str]]] = None,
+        rng: Optional[random.Random] = None
+    ) -> EffectBuffer:
+        """
+        複数のエフェクトをNumPyで一括生成する
+
+        各行の派生パラメータ（particle_count, spread_radius, falloff_distance,
+        radius, attenuation）はcreate_*_effectと同じ計算式で一度に求める。
+
+        Args:
+            effect_types: 各行のエフェクト種別（particle / sound / light）
+            colors: 各行の色
+            durations: 各行の継続時間
+            intensities: 各行の強度
+            positions: 各行の座標（省略時は原点）
+            subtypes: 各行のサブタイプ（省略時は種別ごとのデフォルト）
+            rng: ピッチに使う乱数ストリーム（省略時はエンジンのストリーム）
+
+        Returns:
+            Struct-of-Arrays形式のエフェクト群
+        """
+        try:
+            supported = (self._particle_types, self._sound_types, self._light_types)
+            if subtypes is not None:
+                for effect_type, subtype in zip(effect_types, subtypes):
+                    if subtype is None or effect_type not in EFFECT_KINDS:
+                        continue
+                    if subtype not in supported[EFFECT_KINDS.index(effect_type)]:
+                        raise ValueError(f"Unsupported {effect_type} type: {subtype}")
+
+            # ピッチは個別生成と同じ乱数列になるよう行順に引く
+            uniform = (rng or self._rng).uniform
+            pitches = [
+                uniform(0.8, 1.2)
+                for effect_type in effect_types if effect_type == "sound"
+            ]
+            batch = build_effect_buffer(
+                effect_types, colors, durations, intensities,
+                positions, subtypes, pitches
+            )
+
+            self.logger.info(f"Created effect batch: {len(batch)} effects")
+            return batch
+
+        except Exception as e:
+            self.logger.error(f"Failed to create effect batch: {str(e)}")
+            raise
+
+    @traced(STAGE_EFFECT_ENGINE)
+    def combine_effects(
+        self,
+        *effects: EffectLike,
+        offsets: Optional[Sequence[float]] = None
+    ) -> Dict[str, Any]:
         """
         複数のエフェクトを組み合わせる
 
+        辞書・EffectRecord・EffectBufferを混在して受け付ける。辞書を含まない場合は
+        1つのEffectBufferに連結し、辞書への変換はシリアライズ時まで遅延する。
+        offsetsを指定した場合は展開後のエフェクトごとの開始オフセットを
+        "start_offsets"に保持する（effect_timeline.compile_timelineで使用）。
+
         Args:
             effects: 組み合わせるエフェクト群
+            offsets: 各引数の開始オフセット（秒）
 
         Returns:
             組み合わされたエフェクト情報
         """
+        if offsets is not None and len(offsets) != len(effects):
+            raise ValueError(f"Length of offsets ({len(offsets)}) does not match effects ({len(effects)})")
+
+        combined: Union[EffectBuffer, list]
+        if effects and not any(isinstance(effect, dict) for effect in effects):
+            # 連続するEffectRecordはまとめて1つのバッファにしてから連結する
+            buffers, pending = [], []
+            for effect in effects:
+                if isinstance(effect, EffectBuffer):
+                    if pending:
+                        buffers.append(EffectBuffer.from_records(pending))
+                        pending = []
+                    buffers.append(effect)
+                else:
+                    pending.append(effect)
+            if pending:
+                buffers.append(EffectBuffer.from_records(pending))
+            combined = EffectBuffer.concat(buffers)
+        else:
+            combined = []
+            for effect in effects:
+                if isinstance(effect, EffectBuffer):
+                    combined.extend(effect)
+                else:
+                    combined.append(effect)
+
+        if offsets is None:
+            return {
+                "type": "combined",
+                "effects": combined,
+                "total_duration": max(effect_duration(effect) for effect in effects)
+            }
+
+        start_offsets: list = []
+        for effect, offset in zip(effects, offsets):
+            count = len(effect) if isinstance(effect, EffectBuffer) else 1
+            start_offsets.extend([float(offset)] * count)
+
         return {
             "type": "combined",
-            "effects": list(effects),
-            "total_duration": max(effect["duration"] for effect in effects)
+            "effects": combined,
+            "start_offsets": start_offsets,
+            "total_duration": max(
+                offset + effect_duration(effect)
+                for effect, offset in zip(effects, offsets)
+            )
         }
\ No newline at end of file
@@ -0,0 +1,245 @@
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import asyncio
+import heapq
+import itertools
+import logging
+import numpy as np
+
+from app.core.effect_buffer import EffectBuffer
+from app.core.minecraft_bridge import MinecraftConnection
+
+logger = logging.getLogger(__name__)
+
+# Minecraftサーバーの1tick（20tick/秒）
+TICK_INTERVAL = 0.05
+
+
+@dataclass
+class Timeline:
+    """
+    tick順に整列済みのエフェクトスケジュール
+    ticks[i]のtickでgroups[i]のエフェクトをまとめて送信する
+    """
+    ticks: np.ndarray
+    groups: List[List[Any]]
+    tick_interval: float
+    total_duration: float
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    @property
+    def effect_count(self) -> int:
+        """スケジュールに含まれるエフェクト数（EffectBufferは行数で数える）"""
+        return sum(
+            len(effect) if isinstance(effect, EffectBuffer) else 1
+            for group in self.groups for effect in group
+        )
+
+
+def compile_timeline(
+    combined: Dict[str, Any],
+    tick_interval: float = TICK_INTERVAL
+) -> Timeline:
+    """
+    組み合わせエフェクトを開始オフセット順のスケジュールに変換する
+
+    入れ子のcombinedは親のオフセットを加算して展開し、EffectBufferは
+    同じtickに属する行ごとに部分バッファへ分割する。
+
+    Args:
+        combined: EffectEngine.combine_effectsの戻り値
+        tick_interval: 1tickの長さ（秒）
+
+    Returns:
+        tick順に整列したTimeline
+    """
+    items: List[Any] = []
+    offsets: List[float] = []
+    buffers: List[Tuple[EffectBuffer, np.ndarray]] = []
+    _flatten(combined, 0.0, items, offsets, buffers)
+
+    schedule: Dict[int, List[Any]] = {}
+    if items:
+        ticks = np.rint(np.asarray(offsets) / tick_interval).astype(np.int64)
+        for index in np.argsort(ticks, kind="stable").tolist():
+            schedule.setdefault(int(ticks[index]), []).append(items[index])
+
+    for buffer, row_offsets in buffers:
+        row_ticks = np.rint(row_offsets / tick_interval).astype(np.int64)
+        order = np.argsort(row_ticks, kind="stable")
+        unique_ticks, starts = np.unique(row_ticks[order], return_index=True)
+        for tick, rows in zip(unique_ticks.tolist(), np.split(order, starts[1:])):
+            schedule.setdefault(tick, []).append(buffer.take(rows))
+
+    sorted_ticks = sorted(schedule)
+    return Timeline(
+        ticks=np.asarray(sorted_ticks, dtype=np.int64),
+        groups=[schedule[tick] for tick in sorted_ticks],
+        tick_interval=tick_interval,
+        total_duration=float(combined.get("total_duration", 0.0))
+    )
+
+
+def _flatten(
+    combined: Dict[str, Any],
+    base_offset: float,
+    items: List[Any],
+    offsets: List[float],
+    buffers: List[Tuple[EffectBuffer, np.ndarray]]
+) -> None:
+    """combinedを再帰的に展開し、エフェクトと絶対オフセットを収集する"""
+    effects = combined["effects"]
+    start_offsets = combined.get("start_offsets")
+
+    if isinstance(effects, EffectBuffer):
+        row_offsets = (
+            np.zeros(len(effects)) if start_offsets is None
+            else np.asarray(start_offsets, dtype=np.float64)
+        )
+        buffers.append((effects, row_offsets + base_offset))
+        return
+
+    for index, effect in enumerate(effects):
+        offset = base_offset + (start_offsets[index] if start_offsets is not None else 0.0)
+        if isinstance(effect, dict) and effect.get("type") == "combined":
+            _flatten(effect, offset, items, offsets, buffers)
+        else:
+            items.append(effect)
+            offsets.append(offset)
+
+
+@dataclass
+class _Composition:
+    """再生中のコンポジションの状態"""
+    timeline: Timeline
+    start_time: float
+    position: int = 0
+
+
+class EffectScheduler:
+    """
+    単一のasyncioタスクとmin-heapでTimelineを再生するスケジューラ
+
+    heapにはコンポジションごとに「次に送信するtick」のエントリを1つだけ置くため、
+    スケジュール済みエフェクト数に関わらずタスクは1つで済む。
+    キャンセルされたコンポジションのエントリは取り出し時に破棄する。
+    """
+
+    def __init__(self, connection: MinecraftConnection):
+        self.connection = connection
+        self._heap: List[Tuple[float, int, int]] = []
+        self._compositions: Dict[int, _Composition] = {}
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """再生ループを開始する"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Effect scheduler started")
+
+    async def stop(self) -> None:
+        """再生ループを停止し、未再生のコンポジションを破棄する"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._heap.clear()
+        self._compositions.clear()
+        logger.info("Effect scheduler stopped")
+
+    def schedule(self, timeline: Timeline, delay: float = 0.0) -> int:
+        """
+        Timelineの再生を予約する
+
+        Args:
+            timeline: compile_timelineで生成したスケジュール
+            delay: 再生開始までの待ち時間（秒）
+
+        Returns:
+            キャンセルに使うコンポジションID
+        """
+        composition_id = next(self._ids)
+        if not len(timeline):
+            return composition_id
+
+        start_time = asyncio.get_running_loop().time() + delay
+        self._compositions[composition_id] = _Composition(timeline, start_time)
+        self._push(composition_id, start_time + int(timeline.ticks[0]) * timeline.tick_interval)
+        if self._wakeup:
+            self._wakeup.set()
+        return composition_id
+
+    def cancel(self, composition_id: int) -> bool:
+        """
+        再生中のコンポジションを未送信分ごとキャンセルする
+
+        Args:
+            composition_id: scheduleが返したID
+
+        Returns:
+            bool: キャンセルした場合True（再生済み・未登録の場合False）
+        """
+        return self._compositions.pop(composition_id, None) is not None
+
+    @property
+    def active_compositions(self) -> int:
+        """再生中のコンポジション数"""
+        return len(self._compositions)
+
+    def _push(self, composition_id: int, due: float) -> None:
+        heapq.heappush(self._heap, (due, next(self._sequence), composition_id))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            due, _, composition_id = self._heap[0]
+            delay = due - loop.time()
+            if delay > 0:
+                # より早いエントリが追加された場合はwakeupで待機を打ち切る
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            composition = self._compositions.get(composition_id)
+            if composition is None:
+                continue
+
+            timeline = composition.timeline
+            group = timeline.groups[composition.position]
+            composition.position += 1
+            if composition.position < len(timeline):
+                next_tick = int(timeline.ticks[composition.position])
+                self._push(composition_id, composition.start_time + next_tick * timeline.tick_interval)
+            else:
+                del self._compositions[composition_id]
+
+            await self._release(group)
+
+    async def _release(self, group: List[Any]) -> None:
+        """同一tickのエフェクトをMinecraftサーバーに送信する"""
+        for effect in group:
+            try:
+                if isinstance(effect, EffectBuffer):
+                    await self.connection.send_effect_batch(effect)
+                else:
+                    await self.connection.send_effect(effect)
+            except Exception as e:
+                logger.error(f"Failed to release scheduled effect: {str(e)}")
@@ -0,0 +1,121 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from concurrent.futures import Executor
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingHandler:
+    """
+    イベントを溜めてリストでハンドラーに渡すラッパー
+
+    batch_size件に達するか、最初のイベントからmax_latency秒経過した時点で
+    ハンドラーを1回呼び出す。coalesce_keyを指定するとキーごとに最新の
+    イベントだけを残す（同じ銘柄の価格更新など）。
+    runnerを指定するとハンドラーを直接呼ばず、バッチをrunnerに渡して実行を任せる
+    （EventSystemがタイムアウト・リトライ・デッドレターを適用するため）。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Any],
+        batch_size: int,
+        max_latency: float,
+        coalesce_key: Optional[Callable[[Any], Hashable]] = None,
+        executor: Optional[Executor] = None,
+        runner: Optional[Callable[[List[Any]], Awaitable[Any]]] = None
+    ):
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive: {batch_size}")
+        if max_latency < 0:
+            raise ValueError(f"max_latency must not be negative: {max_latency}")
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.coalesce_key = coalesce_key
+        self._executor = executor
+        self._runner = runner
+        self._is_async = asyncio.iscoroutinefunction(handler)
+        self._pending: List[Any] = []
+        self._latest: Dict[Hashable, Any] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Future] = set()
+        self.received = 0
+        self.coalesced = 0
+        self.invocations = 0
+
+    def __repr__(self) -> str:
+        return f"BatchingHandler({getattr(self.handler, '__name__', self.handler)!r})"
+
+    def __len__(self) -> int:
+        return len(self._latest) if self.coalesce_key else len(self._pending)
+
+    async def submit(self, event: Any) -> None:
+        """イベントを受け取りバッファに追加する（ハンドラーの完了は待たない）"""
+        self.received += 1
+        if self.coalesce_key is not None:
+            key = self.coalesce_key(event)
+            if self._latest.pop(key, None) is not None:
+                self.coalesced += 1
+            self._latest[key] = event
+        else:
+            self._pending.append(event)
+
+        if len(self) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_latency, self._flush)
+
+    def _take_batch(self) -> List[Any]:
+        if self.coalesce_key is not None:
+            batch = list(self._latest.values())
+            self._latest = {}
+        else:
+            batch = self._pending
+            self._pending = []
+        return batch
+
+    def _flush(self) -> None:
+        """バッファの内容でハンドラーを呼び出す"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._take_batch()
+        if not batch:
+            return
+
+        self.invocations += 1
+        if self._runner is not None:
+            future = asyncio.ensure_future(self._runner(batch))
+        elif self._is_async:
+            future = asyncio.ensure_future(self.handler(batch))
+        else:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, self.handler, batch)
+        self._inflight.add(future)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: asyncio.Future) -> None:
+        self._inflight.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Batch handler {self!r} failed: {str(future.exception())}")
+
+    async def flush(self) -> None:
+        """バッファを即座に送り出し、実行中のバッチ処理の完了を待つ"""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        バッチ処理の統計情報を返す
+
+        Returns:
+            受信数・集約で捨てた数・ハンドラー呼び出し数・滞留数
+        """
+        return {
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "invocations": self.invocations,
+            "pending": len(self),
+        }
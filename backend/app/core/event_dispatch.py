@@ -0,0 +1,228 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import itertools
+import threading
+
+# パターン末尾のワイルドカード（"effect_*" は "effect_" で始まる全タイプ、"*" は全タイプ）
+WILDCARD = "*"
+
+# 具体的なイベントタイプごとの解決結果キャッシュの上限
+RESOLVE_CACHE_LIMIT = 65536
+
+
+@dataclass(frozen=True)
+class HandlerEntry:
+    """登録済みハンドラー（同期/非同期の判定は登録時に一度だけ行う）"""
+    handler: Callable
+    is_async: bool
+    pattern: str
+    order: int
+    priority: int = 3
+    mode: str = "thread"
+    retries: int = 0
+    guard: Optional[Any] = field(default=None, compare=False)
+
+
+@dataclass
+class _TrieNode:
+    """プレフィックス購読のトライ木ノード（スナップショット間で共有するため更新時はコピーする）"""
+    children: Dict[str, "_TrieNode"] = field(default_factory=dict)
+    entries: Tuple[HandlerEntry, ...] = ()
+
+
+class DispatchTable:
+    """
+    ハンドラーテーブルの不変スナップショット
+    完全一致の辞書とプレフィックスのトライ木を持ち、解決結果をイベントタイプごとにキャッシュする
+    """
+
+    def __init__(self, exact: Dict[str, Tuple[HandlerEntry, ...]], trie: _TrieNode):
+        self.exact = exact
+        self.trie = trie
+        self._cache: Dict[str, Tuple[HandlerEntry, ...]] = {}
+
+    def resolve(self, event_type: str) -> Tuple[HandlerEntry, ...]:
+        """
+        イベントタイプに一致するハンドラーを登録順で返す
+
+        Args:
+            event_type: 具体的なイベントタイプ
+
+        Returns:
+            一致したハンドラーのタプル
+        """
+        entries = self._cache.get(event_type)
+        if entries is not None:
+            return entries
+
+        matched = list(self.exact.get(event_type, ()))
+        node = self.trie
+        matched.extend(node.entries)
+        for char in event_type:
+            node = node.children.get(char)
+            if node is None:
+                break
+            matched.extend(node.entries)
+        matched.sort(key=lambda entry: entry.order)
+        entries = tuple(matched)
+
+        if len(self._cache) >= RESOLVE_CACHE_LIMIT:
+            self._cache.clear()
+        self._cache[event_type] = entries
+        return entries
+
+
+def _split_pattern(pattern: str) -> Tuple[str, bool]:
+    """パターンを(文字列, プレフィックス指定か)に分解する"""
+    if pattern.endswith(WILDCARD):
+        prefix = pattern[:-1]
+        if WILDCARD in prefix:
+            raise ValueError(f"Wildcard is only supported at the end of a pattern: {pattern}")
+        return prefix, True
+    if WILDCARD in pattern:
+        raise ValueError(f"Wildcard is only supported at the end of a pattern: {pattern}")
+    return pattern, False
+
+
+def _trie_update(
+    root: _TrieNode,
+    prefix: str,
+    update: Callable[[Tuple[HandlerEntry, ...]], Tuple[HandlerEntry, ...]]
+) -> _TrieNode:
+    """prefixに対応するノードのentriesを更新した新しいルートを返す（経路上のノードのみコピー）"""
+    new_root = _TrieNode(dict(root.children), root.entries)
+    node = new_root
+    for char in prefix:
+        child = node.children.get(char)
+        child = _TrieNode(dict(child.children), child.entries) if child else _TrieNode()
+        node.children[char] = child
+        node = child
+    node.entries = update(node.entries)
+    return new_root
+
+
+class HandlerRegistry:
+    """
+    Copy-on-Writeのハンドラーレジストリ
+
+    登録・解除はロック下で新しいDispatchTableを作って差し替え、
+    イベント処理側はロックを取らずに現在のスナップショットを参照する。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._table = DispatchTable({}, _TrieNode())
+
+    @property
+    def table(self) -> DispatchTable:
+        """現在のスナップショット"""
+        return self._table
+
+    def resolve(self, event_type: str) -> Tuple[HandlerEntry, ...]:
+        """イベントタイプに一致するハンドラーを返す"""
+        return self._table.resolve(event_type)
+
+    def register(
+        self,
+        pattern: str,
+        handler: Callable,
+        priority: int = 3,
+        mode: str = "thread",
+        retries: int = 0,
+        guard: Optional[Any] = None
+    ) -> HandlerEntry:
+        """
+        ハンドラーを登録する
+
+        Args:
+            pattern: イベントタイプ、または末尾に*を付けたプレフィックスパターン
+            handler: ハンドラー関数
+            priority: 同期ハンドラーを実行する優先度（1が最優先）
+            mode: 同期ハンドラーの実行方式（inline/thread/process）
+            retries: 失敗時のリトライ回数
+            guard: タイムアウト・同時実行数・サーキットブレーカーの制御（HandlerGuard）
+
+        Returns:
+            登録したエントリ
+        """
+        key, is_prefix = _split_pattern(pattern)
+        with self._lock:
+            entry = HandlerEntry(
+                handler=handler,
+                is_async=asyncio.iscoroutinefunction(handler),
+                pattern=pattern,
+                order=next(self._order),
+                priority=priority,
+                mode=mode,
+                retries=retries,
+                guard=guard
+            )
+            table = self._table
+            if is_prefix:
+                trie = _trie_update(table.trie, key, lambda entries: entries + (entry,))
+                self._table = DispatchTable(table.exact, trie)
+            else:
+                exact = dict(table.exact)
+                exact[key] = exact.get(key, ()) + (entry,)
+                self._table = DispatchTable(exact, table.trie)
+        return entry
+
+    def unregister(self, pattern: str, handler: Callable) -> bool:
+        """
+        ハンドラーの登録を解除する
+
+        Args:
+            pattern: 登録時のパターン
+            handler: 登録時のハンドラー関数
+
+        Returns:
+            bool: 解除した場合True
+        """
+        key, is_prefix = _split_pattern(pattern)
+        with self._lock:
+            table = self._table
+            if is_prefix:
+                removed = []
+
+                def _remove(entries: Tuple[HandlerEntry, ...]) -> Tuple[HandlerEntry, ...]:
+                    kept = tuple(entry for entry in entries if entry.handler != handler)
+                    removed.append(len(kept) != len(entries))
+                    return kept
+
+                trie = _trie_update(table.trie, key, _remove)
+                if not removed[0]:
+                    return False
+                self._table = DispatchTable(table.exact, trie)
+                return True
+
+            entries = table.exact.get(key, ())
+            kept = tuple(entry for entry in entries if entry.handler != handler)
+            if len(kept) == len(entries):
+                return False
+            exact = dict(table.exact)
+            if kept:
+                exact[key] = kept
+            else:
+                del exact[key]
+            self._table = DispatchTable(exact, table.trie)
+            return True
+
+    def entries(self) -> List[HandlerEntry]:
+        """登録済みの全エントリを登録順に返す"""
+        table = self._table
+        entries = [entry for group in table.exact.values() for entry in group]
+        stack = [table.trie]
+        while stack:
+            node = stack.pop()
+            entries.extend(node.entries)
+            stack.extend(node.children.values())
+        return sorted(entries, key=lambda entry: entry.order)
+
+    def patterns(self) -> Dict[str, int]:
+        """登録済みパターンごとのハンドラー数を返す"""
+        counts: Dict[str, int] = {}
+        for entry in self.entries():
+            counts[entry.pattern] = counts.get(entry.pattern, 0) + 1
+        return counts
@@ -0,0 +1,199 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from enum import Enum
+from multiprocessing import resource_tracker, shared_memory
+import asyncio
+import logging
+import multiprocessing
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# これより小さい配列は共有メモリを使わずそのままpickleで渡す
+SHARED_MEMORY_MIN_BYTES = 1 << 16
+
+
+class ExecutionMode(str, Enum):
+    """同期ハンドラーの実行方式"""
+    INLINE = "inline"    # イベントループ上で直接呼び出す（軽量な処理向け）
+    THREAD = "thread"    # 優先度レーン経由でスレッドプールで実行する
+    PROCESS = "process"  # ワーカープロセスで実行する（CPUバウンドな処理向け）
+
+
+@dataclass(frozen=True)
+class SharedArrayRef:
+    """共有メモリ上のNumPy配列への参照（ワーカープロセスへはこの参照だけを渡す）"""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _export_arrays(value: Any, segments: List[shared_memory.SharedMemory]) -> Any:
+    """ペイロード中の大きなNumPy配列を共有メモリへコピーし参照に置き換える"""
+    if isinstance(value, np.ndarray) and value.nbytes >= SHARED_MEMORY_MIN_BYTES:
+        segment = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        segments.append(segment)
+        np.ndarray(value.shape, value.dtype, buffer=segment.buf)[...] = value
+        return SharedArrayRef(segment.name, value.shape, value.dtype.str)
+    if isinstance(value, dict):
+        return {key: _export_arrays(item, segments) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_export_arrays(item, segments) for item in value]
+    return value
+
+
+def _import_arrays(value: Any, segments: List[shared_memory.SharedMemory]) -> Any:
+    """共有メモリ参照を配列ビューに戻す（ワーカープロセス側）"""
+    if isinstance(value, SharedArrayRef):
+        # ワーカーは親プロセスのリソーストラッカーを共有しており、解放は親が行う
+        segment = shared_memory.SharedMemory(name=value.name)
+        segments.append(segment)
+        return np.ndarray(value.shape, np.dtype(value.dtype), buffer=segment.buf)
+    if isinstance(value, dict):
+        return {key: _import_arrays(item, segments) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_import_arrays(item, segments) for item in value]
+    return value
+
+
+def _invoke(handler: Callable, event: Any) -> Any:
+    """ワーカープロセスでハンドラーを実行する"""
+    segments: List[shared_memory.SharedMemory] = []
+    try:
+        payload = _import_arrays(event.payload, segments)
+        return handler(replace(event, payload=payload))
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+def _warm_up() -> int:
+    """ワーカープロセスの起動を完了させるためのダミー処理"""
+    return os.getpid()
+
+
+class ProcessHandlerPool:
+    """
+    CPUバウンドな同期ハンドラー用のウォームなプロセスプール
+
+    起動時に全ワーカーを立ち上げておき、イベントペイロード中の大きな
+    NumPy配列は共有メモリ経由で渡す。ワーカーが異常終了してプールが
+    壊れた場合は新しいプールに差し替えて以降のイベントを処理する。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = None
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # イベントループ上での起動・再作成を1つずつに制限する
+        self._start_lock = asyncio.Lock()
+        self.submitted = 0
+        self.failed = 0
+        self.recycled = 0
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        if self.max_tasks_per_child is not None:
+            # ワーカーの定期的な入れ替えはfork以外の起動方式でのみ利用できる
+            return ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child
+            )
+        return ProcessPoolExecutor(self.max_workers)
+
+    def start(self) -> None:
+        """
+        プールを作成し、全ワーカーを起動しておく
+
+        ワーカーの起動完了まで呼び出し元をブロックするため、イベントループ上からは
+        ensure_started()を使う。
+        """
+        if self._pool is not None:
+            return
+        # ワーカーが親と同じリソーストラッカーを引き継ぐよう、プール作成前に起動しておく
+        resource_tracker.ensure_running()
+        self._pool = self._create_pool()
+        for future in [self._pool.submit(_warm_up) for _ in range(self.max_workers)]:
+            future.result()
+        logger.info(f"Started process handler pool with {self.max_workers} workers")
+
+    async def ensure_started(self) -> None:
+        """
+        イベントループを止めずにプールを起動する
+
+        ワーカーの起動はスレッドで待ち、同時に呼ばれても起動は1回だけ行う。
+        """
+        if self._pool is not None:
+            return
+        async with self._start_lock:
+            if self._pool is None:
+                await asyncio.get_running_loop().run_in_executor(None, self.start)
+
+    async def _recycle(self, broken: ProcessPoolExecutor) -> None:
+        """壊れたプールを新しいプールに差し替える（同じプールの再作成は1回だけ行う）"""
+        async with self._start_lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.recycled += 1
+            logger.warning("Process handler pool was broken by a crashed worker; recycling")
+        await self.ensure_started()
+
+    async def run(self, handler: Callable, event: Any) -> Any:
+        """
+        ハンドラーをワーカープロセスで実行する
+
+        Args:
+            handler: モジュールレベルで定義された（pickle可能な）同期関数
+            event: 処理するイベント
+
+        Returns:
+            ハンドラーの戻り値
+        """
+        if self._pool is None:
+            await self.ensure_started()
+        pool = self._pool
+        segments: List[shared_memory.SharedMemory] = []
+        self.submitted += 1
+        try:
+            shared_event = replace(event, payload=_export_arrays(event.payload, segments))
+            return await asyncio.wrap_future(pool.submit(_invoke, handler, shared_event))
+        except BrokenProcessPool:
+            self.failed += 1
+            await self._recycle(pool)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        プールの統計情報を返す
+
+        Returns:
+            ワーカー数・投入数・失敗数・プールの再作成回数
+        """
+        return {
+            "workers": self.max_workers,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "recycled": self.recycled,
+        }
+
+    def shutdown(self) -> None:
+        """プールを停止する"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
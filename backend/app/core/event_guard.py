@@ -0,0 +1,219 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from dataclasses import dataclass
+from enum import Enum
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """サーキットブレーカーの状態"""
+    CLOSED = "closed"        # 通常どおり呼び出す
+    OPEN = "open"            # 呼び出さずに即座にスキップする
+    HALF_OPEN = "half_open"  # 試行呼び出しを1件だけ通す
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているため呼び出しをスキップしたことを表す例外"""
+
+
+@dataclass(frozen=True)
+class HandlerLimits:
+    """ハンドラーごとの実行制限"""
+    timeout: Optional[float] = None              # 1回の呼び出しの制限時間（秒）
+    max_concurrency: Optional[int] = None        # 同時実行数の上限
+    failure_threshold: Optional[int] = 5         # ブレーカーを開く連続失敗数（Noneで無効）
+    slow_call_threshold: Optional[float] = None  # 遅い呼び出しとみなす所要時間（秒）
+    slow_call_limit: int = 5                     # ブレーカーを開く連続した遅い呼び出し数
+    reset_timeout: float = 30.0                  # OPENからHALF_OPENに移るまでの時間（秒）
+
+
+class CircuitBreaker:
+    """連続した失敗または遅い呼び出しで開くサーキットブレーカー"""
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = 5,
+        slow_call_threshold: Optional[float] = None,
+        slow_call_limit: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_limit = slow_call_limit
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_slow = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """
+        呼び出してよいかを判定する
+
+        Returns:
+            bool: 呼び出してよい場合True（HALF_OPENでは試行中の1件のみTrue）
+        """
+        if self.state is CircuitState.CLOSED:
+            return True
+        if self.state is CircuitState.OPEN:
+            if self._clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record(self, success: bool, duration: float) -> None:
+        """
+        呼び出し結果を記録する
+
+        Args:
+            success: 成功した場合True
+            duration: 所要時間（秒）
+        """
+        slow = self.slow_call_threshold is not None and duration >= self.slow_call_threshold
+        self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+        self.consecutive_slow = self.consecutive_slow + 1 if slow else 0
+
+        if self.state is CircuitState.HALF_OPEN:
+            self._probing = False
+            if success and not slow:
+                self.state = CircuitState.CLOSED
+                self.opened_at = None
+                logger.info("Circuit breaker closed after a successful probe")
+            else:
+                self._trip()
+            return
+
+        if (
+            (self.failure_threshold is not None and self.consecutive_failures >= self.failure_threshold)
+            or (slow and self.consecutive_slow >= self.slow_call_limit)
+        ):
+            self._trip()
+
+    def _trip(self) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = self._clock()
+        self.trips += 1
+
+
+class HandlerGuard:
+    """
+    ハンドラー1つ分のタイムアウト・同時実行数制限・サーキットブレーカー
+
+    タイムアウトした非同期ハンドラーはキャンセルし、その時点で実行枠を返す。
+    同期ハンドラーのスレッドやプロセスは止められないため結果を待たずに戻るが、
+    実行枠（セマフォ）は実際に処理が終わるまで保持する。
+    これにより応答しないハンドラーがスレッドを際限なく消費することを防ぐ。
+    """
+
+    def __init__(self, name: str, limits: HandlerLimits):
+        if limits.max_concurrency is not None and limits.max_concurrency <= 0:
+            raise ValueError(f"max_concurrency must be positive: {limits.max_concurrency}")
+        self.name = name
+        self.limits = limits
+        self.breaker = CircuitBreaker(
+            limits.failure_threshold,
+            limits.slow_call_threshold,
+            limits.slow_call_limit,
+            limits.reset_timeout
+        )
+        self._semaphore = (
+            asyncio.Semaphore(limits.max_concurrency) if limits.max_concurrency else None
+        )
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    async def call(self, start: Callable[[], Awaitable[Any]], cancellable: bool = False) -> Any:
+        """
+        制限を適用してハンドラーを呼び出す
+
+        Args:
+            start: ハンドラーを起動してAwaitableを返す関数
+            cancellable: タイムアウト時に処理をキャンセルできる場合True（コルーチンのハンドラー）。
+                Falseの場合（スレッド・プロセスで実行する処理）は処理を続けさせたまま戻る
+
+        Returns:
+            ハンドラーの戻り値
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit for handler {self.name} is {self.breaker.state.value}")
+
+        timeout = self.limits.timeout
+        started = time.perf_counter()
+        success = False
+        try:
+            # 実行枠の待ち時間も制限時間に含める
+            if self._semaphore is not None:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            try:
+                work = asyncio.ensure_future(start())
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+            self.calls += 1
+            self.in_flight += 1
+            work.add_done_callback(self._release)
+
+            remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - started))
+            # wait_forはタイムアウト時にworkをキャンセルするため、止められない処理だけshieldで守る
+            result = await asyncio.wait_for(work if cancellable else asyncio.shield(work), remaining)
+            success = True
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise asyncio.TimeoutError(
+                f"Handler {self.name} timed out after {timeout}s"
+            ) from None
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            previous = self.breaker.state
+            self.breaker.record(success, time.perf_counter() - started)
+            if self.breaker.state is CircuitState.OPEN and previous is not CircuitState.OPEN:
+                logger.warning(f"Circuit for handler {self.name} opened")
+
+    def _release(self, work: asyncio.Future) -> None:
+        self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if not work.cancelled():
+            # タイムアウト後に完了した呼び出しの例外を回収する
+            work.exception()
+
+    def health(self) -> Dict[str, Any]:
+        """
+        ハンドラーの健全性を返す
+
+        Returns:
+            ブレーカーの状態と呼び出し・失敗・タイムアウト・スキップの件数
+        """
+        breaker = self.breaker
+        return {
+            "state": breaker.state.value,
+            "consecutive_failures": breaker.consecutive_failures,
+            "consecutive_slow": breaker.consecutive_slow,
+            "trips": breaker.trips,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "timeout": self.limits.timeout,
+            "max_concurrency": self.limits.max_concurrency,
+        }
@@ -0,0 +1,386 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import json
+import logging
+import mmap
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# セグメントファイルのヘッダ: magic, バージョン
+SEGMENT_HEADER = struct.Struct("<4sI")
+SEGMENT_MAGIC = b"EVJ1"
+SEGMENT_VERSION = 1
+SEGMENT_SUFFIX = ".journal"
+
+# レコードのヘッダ: 本体長, 本体のCRC32, 取り込み時刻(monotonic_ns), タイムスタンプ(UNIX秒)
+# 本体長0はセグメント末尾（事前確保した未使用領域）を表す
+RECORD_HEADER = struct.Struct("<IIqd")
+TYPE_LENGTH = struct.Struct("<H")
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+# ライタースレッドに渡していないレコード数の上限（超えるとappendが空きを待つ）
+DEFAULT_MAX_PENDING = 100_000
+
+
+def _encode_default(value: Any) -> Any:
+    """ペイロード中のNumPy値やdatetimeをJSONに変換する"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_payload(payload: Dict[str, Any]) -> bytes:
+    """ペイロードをJSONにエンコードする（標準型のみの場合はjson.dumpsの高速経路を使う）"""
+    try:
+        return json.dumps(payload).encode("utf-8")
+    except TypeError:
+        return json.dumps(payload, default=_encode_default).encode("utf-8")
+
+# イベントタイプ名のエンコード結果（タイプ名の種類は少ないため使い回す）
+_type_prefixes: Dict[str, bytes] = {}
+
+
+def encode_event(event: Any) -> bytes:
+    """
+    イベントを長さ付きバイナリレコードにエンコードする
+
+    Args:
+        event: エンコードするEvent
+
+    Returns:
+        RECORD_HEADERに続きタイプ名とJSONペイロードを格納したバイト列
+    """
+    prefix = _type_prefixes.get(event.type)
+    if prefix is None:
+        encoded_type = event.type.encode("utf-8")
+        prefix = _type_prefixes.setdefault(
+            event.type, TYPE_LENGTH.pack(len(encoded_type)) + encoded_type
+        )
+    body = prefix + _encode_payload(event.payload)
+    return RECORD_HEADER.pack(
+        len(body), zlib.crc32(body), event.ingress_ns, event.timestamp.timestamp()
+    ) + body
+
+
+def decode_event(buffer: Union[bytes, memoryview], offset: int = 0) -> Optional[tuple]:
+    """
+    offsetの位置からレコードを1件デコードする
+
+    Args:
+        buffer: レコードを含むバッファ
+        offset: 読み出し開始位置
+
+    Returns:
+        (Event, 次のレコードの位置)。末尾または破損したレコードの場合None
+    """
+    from app.core.event_system import Event
+
+    if offset + RECORD_HEADER.size > len(buffer):
+        return None
+    length, crc, ingress_ns, timestamp = RECORD_HEADER.unpack_from(buffer, offset)
+    start = offset + RECORD_HEADER.size
+    end = start + length
+    if length == 0 or end > len(buffer):
+        return None
+    body = bytes(buffer[start:end])
+    if zlib.crc32(body) != crc:
+        # 書き込み途中でクラッシュした末尾のレコード
+        return None
+    (type_length,) = TYPE_LENGTH.unpack_from(body)
+    type_end = TYPE_LENGTH.size + type_length
+    event = Event(
+        type=body[TYPE_LENGTH.size:type_end].decode("utf-8"),
+        payload=json.loads(body[type_end:]),
+        timestamp=datetime.fromtimestamp(timestamp),
+        ingress_ns=ingress_ns
+    )
+    return event, end
+
+
+def iter_segment(path: Path) -> Iterator[Any]:
+    """
+    セグメントファイルのイベントを記録順に返す
+
+    Args:
+        path: セグメントファイルのパス
+
+    Yields:
+        記録されたEvent
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        magic, version = SEGMENT_HEADER.unpack_from(view)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            raise ValueError(f"Not an event journal segment: {path}")
+        offset = SEGMENT_HEADER.size
+        while True:
+            decoded = decode_event(view, offset)
+            if decoded is None:
+                return
+            event, offset = decoded
+            yield event
+
+
+def list_segments(directory: Path) -> List[Path]:
+    """ディレクトリ内のセグメントファイルを番号順に返す"""
+    return sorted(Path(directory).glob(f"*{SEGMENT_SUFFIX}"))
+
+
+class _Segment:
+    """事前確保してメモリマップしたセグメントファイル"""
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self.map = mmap.mmap(self._file.fileno(), size)
+        self.map[:SEGMENT_HEADER.size] = SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION)
+        self.offset = SEGMENT_HEADER.size
+        self.size = size
+
+    def remaining(self) -> int:
+        # 末尾の判定用に本体長0のヘッダ1つ分を残しておく
+        return self.size - self.offset - RECORD_HEADER.size
+
+    def write(self, data: bytes) -> None:
+        self.map[self.offset:self.offset + len(data)] = data
+        self.offset += len(data)
+
+    def close(self) -> None:
+        self.map.flush()
+        self.map.close()
+        self._file.close()
+
+
+class EventJournal:
+    """
+    追記専用のメモリマップ型イベントジャーナル
+
+    append()は呼び出し時点のイベントをレコードにエンコードしてdequeに積むだけで戻り、
+    ライタースレッドがcommit_interval秒ごとに溜まったレコードをまとめてセグメントに
+    書き込む（グループコミット）。エンコードを呼び出し元で行うため、後からハンドラーが
+    ペイロードを書き換えても記録される内容は変わらない。
+    appendはイベントループ上から呼ばれるため待つことはせず、未書き込みのレコードが
+    max_pending件に達している間に来たイベントはその場で破棄して数える。
+    書き込んだ内容はページキャッシュ上にあるためプロセスがクラッシュしても残り、
+    flush_interval秒ごとにディスクへ同期する。
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        commit_interval: float = 0.002,
+        flush_interval: float = 1.0,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        if segment_size <= SEGMENT_HEADER.size + RECORD_HEADER.size:
+            raise ValueError(f"segment_size is too small: {segment_size}")
+        if max_pending <= 0:
+            raise ValueError(f"max_pending must be positive: {max_pending}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.commit_interval = commit_interval
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: deque = deque()
+        existing = list_segments(self.directory)
+        self._next_index = int(existing[-1].stem) + 1 if existing else 0
+        self._segment: Optional[_Segment] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.commits = 0
+
+    def start(self) -> None:
+        """ライタースレッドを開始する"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+        self._thread.start()
+        logger.info(f"Event journal started: {self.directory}")
+
+    def append(self, event: Any) -> bool:
+        """
+        イベントをエンコードしてジャーナルに追加する（書き込みはライタースレッドで行う）
+
+        未書き込みのレコードがmax_pending件ある場合は待たずに破棄する
+        （ライタースレッドの遅れでイベントループを止めないため）。
+
+        Args:
+            event: 記録するEvent
+
+        Returns:
+            bool: 追加した場合True（エンコードできない・大きすぎる・空きが無い場合False）
+        """
+        try:
+            record = encode_event(event)
+        except Exception as e:
+            self.dropped += 1
+            logger.error(f"Failed to encode event {event.type} for journal: {str(e)}")
+            return False
+        if len(record) > self.segment_size - SEGMENT_HEADER.size - RECORD_HEADER.size:
+            self.dropped += 1
+            logger.error(f"Event {event.type} is larger than a journal segment; dropped")
+            return False
+        if len(self._pending) >= self.max_pending:
+            self.overflowed += 1
+            self.dropped += 1
+            logger.error(f"Event journal is full; dropped event {event.type}")
+            return False
+        self._pending.append(record)
+        return True
+
+    def _open_segment(self) -> _Segment:
+        path = self.directory / f"{self._next_index:08d}{SEGMENT_SUFFIX}"
+        self._next_index += 1
+        return _Segment(path, self.segment_size)
+
+    def _commit(self) -> int:
+        """溜まっているイベントをまとめて書き込む"""
+        pending = self._pending
+        count = len(pending)
+        if not count:
+            return 0
+        if self._segment is None:
+            self._segment = self._open_segment()
+        group = bytearray()
+        for _ in range(count):
+            record = pending.popleft()
+            if len(group) + len(record) > self._segment.remaining():
+                self._segment.write(group)
+                self._segment.close()
+                self._segment = self._open_segment()
+                group = bytearray()
+            group += record
+            self.written += 1
+        self._segment.write(group)
+        self.commits += 1
+        return count
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while not self._stop.wait(self.commit_interval):
+            try:
+                self._commit()
+                if self._segment is not None and time.monotonic() - last_flush >= self.flush_interval:
+                    self._segment.map.flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                logger.error(f"Event journal writer error: {str(e)}")
+        self._commit()
+
+    def flush(self) -> None:
+        """溜まっているイベントを書き込み、ディスクへ同期する（ライタースレッド停止中に使用）"""
+        self._commit()
+        if self._segment is not None:
+            self._segment.map.flush()
+
+    def close(self) -> None:
+        """ライタースレッドを停止し、残りのイベントを書き込んでセグメントを閉じる"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._commit()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        logger.info(f"Event journal closed: {self.written} events written")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        ジャーナルの統計情報を返す
+
+        Returns:
+            書き込み数・未書き込み数・破棄数・満杯で破棄した数・コミット回数
+        """
+        return {
+            "written": self.written,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "overflowed": self.overflowed,
+            "commits": self.commits,
+            "segment": str(self._segment.path) if self._segment is not None else None,
+        }
+
+
+def read_journal(directory: Union[str, Path]) -> Iterator[Any]:
+    """
+    ジャーナルディレクトリの全セグメントのイベントを記録順に返す
+
+    Args:
+        directory: ジャーナルのディレクトリ
+
+    Yields:
+        記録されたEvent
+    """
+    for path in list_segments(Path(directory)):
+        yield from iter_segment(path)
+
+
+async def replay(
+    event_system: Any,
+    events: Union[str, Path, Iterable[Any]],
+    speed: Optional[float] = 1.0,
+    max_gap: Optional[float] = 60.0
+) -> int:
+    """
+    記録したイベントをEventSystemで再処理する
+
+    間隔は記録時のtimestamp（壁時計）で決める。ingress_nsはmonotonic_nsで
+    同じプロセスの起動中しか比較できないため、再起動をまたぐジャーナルの再生には使えない。
+    時計が戻った場合は待たず、再起動中などの長い空白はmax_gap秒に詰める。
+
+    Args:
+        event_system: イベントを流し込むEventSystem
+        events: セグメントファイル、ジャーナルディレクトリ、またはEventの列
+        speed: 再生速度（1.0で記録時と同じ間隔、Nで N倍速、Noneで待ち時間なし）
+        max_gap: 連続する2件の間隔の上限（秒、Noneで上限なし）
+
+    Returns:
+        再処理したイベント数
+    """
+    from app.core.event_system import Event
+
+    if isinstance(events, (str, Path)):
+        path = Path(events)
+        events = read_journal(path) if path.is_dir() else iter_segment(path)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    previous: Optional[float] = None
+    offset = 0.0
+    count = 0
+    for recorded in events:
+        if speed:
+            timestamp = recorded.timestamp.timestamp()
+            if previous is not None:
+                gap = max(0.0, timestamp - previous)
+                offset += gap if max_gap is None else min(gap, max_gap)
+            previous = timestamp
+            delay = offset / speed - (loop.time() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # 取り込み時刻は再生時点で付け直し、元の時刻はtimestampに残す
+        await event_system.process_event(
+            Event(type=recorded.type, payload=recorded.payload, timestamp=recorded.timestamp)
+        )
+        count += 1
+    logger.info(f"Replayed {count} events (speed={speed or 'unthrottled'})")
+    return count
@@ -0,0 +1,204 @@
+from typing import Any, Callable, Deque, Dict, Optional
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+import asyncio
+import time
+
+# TriggerAction.priorityと同じ1〜5の範囲（1が最優先）
+PRIORITY_HIGHEST = 1
+PRIORITY_LOWEST = 5
+DEFAULT_PRIORITY = 3
+
+# レーンごとの重み（重みの比率で実行枠を配分する）
+DEFAULT_WEIGHTS = {1: 16, 2: 8, 3: 4, 4: 2, 5: 1}
+
+# レイテンシ統計に保持するサンプル数
+LATENCY_SAMPLES = 1024
+
+
+@dataclass
+class _Job:
+    """キューに積まれた実行待ちの処理"""
+    func: Callable
+    args: tuple
+    priority: int
+    future: asyncio.Future
+    enqueued: float
+
+
+@dataclass
+class _LaneStats:
+    """優先度レーンごとの統計"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    aged: int = 0
+    wait: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+    total: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    """サンプルのp50/p95/p99/最大値をミリ秒で返す"""
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "p50_ms": ordered[int(last * 0.50)] * 1000,
+        "p95_ms": ordered[int(last * 0.95)] * 1000,
+        "p99_ms": ordered[int(last * 0.99)] * 1000,
+        "max_ms": ordered[last] * 1000,
+    }
+
+
+class PriorityScheduler:
+    """
+    優先度レーン付きのスケジューラ
+
+    処理を優先度ごとのキューに積み、スムーズ重み付きラウンドロビンで取り出して
+    同期関数はExecutorで、コルーチン関数はイベントループ上のタスクとして実行する。同時実行数はmax_concurrencyで制限し、
+    max_wait秒以上待たされた処理は重みに関係なく次に実行する（低優先度の飢餓防止）。
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_concurrency: int = 4,
+        weights: Optional[Dict[int, int]] = None,
+        max_wait: float = 1.0
+    ):
+        if max_concurrency <= 0:
+            raise ValueError(f"max_concurrency must be positive: {max_concurrency}")
+        weights = dict(weights or DEFAULT_WEIGHTS)
+        priorities = list(range(PRIORITY_HIGHEST, PRIORITY_LOWEST + 1))
+        if sorted(weights) != priorities or min(weights.values()) <= 0:
+            raise ValueError(f"weights must assign a positive weight to priorities 1-5: {weights}")
+        self._executor = executor
+        self.max_concurrency = max_concurrency
+        self.weights = weights
+        self.max_wait = max_wait
+        self._lanes: Dict[int, Deque[_Job]] = {p: deque() for p in priorities}
+        self._credits: Dict[int, int] = {p: 0 for p in priorities}
+        self._stats: Dict[int, _LaneStats] = {p: _LaneStats() for p in priorities}
+        self._running = 0
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def submit(self, func: Callable, *args: Any, priority: int = DEFAULT_PRIORITY) -> asyncio.Future:
+        """
+        処理を優先度レーンに投入する
+
+        Args:
+            func: 実行する同期関数またはコルーチン関数
+            *args: 関数の引数
+            priority: 優先度（1が最優先、5が最低）
+
+        Returns:
+            処理結果を受け取るFuture
+        """
+        if not PRIORITY_HIGHEST <= priority <= PRIORITY_LOWEST:
+            raise ValueError(f"priority must be between 1 and 5: {priority}")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._lanes[priority].append(
+            _Job(func, args, priority, future, time.perf_counter())
+        )
+        self._stats[priority].submitted += 1
+        self._pump()
+        return future
+
+    def _next_job(self) -> _Job:
+        """次に実行する処理を選ぶ"""
+        now = time.perf_counter()
+        # 飢餓防止: 待ち時間の上限を超えた先頭要素があれば最も古いものを優先する
+        overdue: Optional[_Job] = None
+        for lane in self._lanes.values():
+            if lane and now - lane[0].enqueued >= self.max_wait:
+                if overdue is None or lane[0].enqueued < overdue.enqueued:
+                    overdue = lane[0]
+        if overdue is not None:
+            self._stats[overdue.priority].aged += 1
+            return self._lanes[overdue.priority].popleft()
+
+        # スムーズ重み付きラウンドロビン（空でないレーンだけでクレジットを配分する）
+        total = 0
+        chosen = None
+        for priority, lane in self._lanes.items():
+            if not lane:
+                self._credits[priority] = 0
+                continue
+            weight = self.weights[priority]
+            self._credits[priority] += weight
+            total += weight
+            if chosen is None or self._credits[priority] > self._credits[chosen]:
+                chosen = priority
+        self._credits[chosen] -= total
+        return self._lanes[chosen].popleft()
+
+    def _pump(self) -> None:
+        """空いている実行枠に処理を割り当てる"""
+        while self._running < self.max_concurrency and len(self):
+            job = self._next_job()
+            if job.future.cancelled():
+                continue
+            self._running += 1
+            started = time.perf_counter()
+            self._stats[job.priority].wait.append(started - job.enqueued)
+            if asyncio.iscoroutinefunction(job.func):
+                task = asyncio.ensure_future(job.func(*job.args))
+            else:
+                task = asyncio.get_running_loop().run_in_executor(self._executor, job.func, *job.args)
+            task.add_done_callback(lambda done, job=job: self._on_done(job, done))
+
+    def _on_done(self, job: _Job, done: asyncio.Future) -> None:
+        self._running -= 1
+        stats = self._stats[job.priority]
+        stats.total.append(time.perf_counter() - job.enqueued)
+        if done.cancelled():
+            job.future.cancel()
+        elif done.exception() is not None:
+            stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(done.exception())
+        else:
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(done.result())
+        self._pump()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        優先度ごとの統計情報を返す
+
+        Returns:
+            実行中の数と、レーンごとの投入数・完了数・待ち行列長・
+            キュー待ち時間と完了までの時間のパーセンタイル
+        """
+        lanes: Dict[int, Dict[str, Any]] = {}
+        for priority, stats in self._stats.items():
+            lanes[priority] = {
+                "depth": len(self._lanes[priority]),
+                "submitted": stats.submitted,
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "aged": stats.aged,
+                "wait": _percentiles(stats.wait),
+                "latency": _percentiles(stats.total),
+            }
+        return {"running": self._running, "lanes": lanes}
+
+    def cancel_pending(self) -> int:
+        """
+        実行待ちの処理を全てキャンセルする
+
+        Returns:
+            キャンセルした件数
+        """
+        cancelled = 0
+        for lane in self._lanes.values():
+            while lane:
+                lane.popleft().future.cancel()
+                cancelled += 1
+        return cancelled
@@ -0,0 +1,106 @@
+from typing import Any, Dict, Generic, TypeVar
+from enum import Enum
+import asyncio
+
+T = TypeVar("T")
+
+
+class OverflowPolicy(str, Enum):
+    """キューが満杯のときの挙動"""
+    BLOCK = "block"              # 空きができるまでpublish側を待たせる
+    DROP_OLDEST = "drop_oldest"  # 最も古い要素を捨てて新しい要素を入れる
+    DROP_NEWEST = "drop_newest"  # 新しい要素を捨てる
+
+
+class BoundedEventQueue(Generic[T]):
+    """
+    オーバーフローポリシーと統計情報を持つ有界asyncioキュー
+    """
+
+    def __init__(self, max_size: int, overflow: OverflowPolicy = OverflowPolicy.BLOCK):
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive: {max_size}")
+        self.max_size = max_size
+        self.overflow = OverflowPolicy(overflow)
+        self._queue: "asyncio.Queue[T]" = asyncio.Queue(maxsize=max_size)
+        self.published = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.high_watermark = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, item: T) -> bool:
+        """
+        要素を投入する（BLOCKの場合は空きができるまで待つ）
+
+        Args:
+            item: 投入する要素
+
+        Returns:
+            bool: 投入した場合True（DROP_NEWESTで破棄した場合False）
+        """
+        if self.overflow is OverflowPolicy.BLOCK:
+            await self._queue.put(item)
+            self._record_put()
+            return True
+        return self.put_nowait(item)
+
+    def put_nowait(self, item: T) -> bool:
+        """
+        待たずに要素を投入する
+        満杯の場合はポリシーに従って破棄する（BLOCKの場合は新しい要素を破棄する）
+
+        Args:
+            item: 投入する要素
+
+        Returns:
+            bool: 投入した場合True
+        """
+        if self._queue.full():
+            if self.overflow is OverflowPolicy.DROP_OLDEST:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped_oldest += 1
+            else:
+                self.dropped_newest += 1
+                return False
+        self._queue.put_nowait(item)
+        self._record_put()
+        return True
+
+    def _record_put(self) -> None:
+        self.published += 1
+        depth = self._queue.qsize()
+        if depth > self.high_watermark:
+            self.high_watermark = depth
+
+    async def get(self) -> T:
+        """要素を取り出す（空の場合は待つ）"""
+        return await self._queue.get()
+
+    def task_done(self) -> None:
+        """取り出した要素の処理完了を通知する"""
+        self._queue.task_done()
+
+    async def join(self) -> None:
+        """投入済みの要素が全て処理されるまで待つ"""
+        await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キューの統計情報を返す
+
+        Returns:
+            深さ・上限・投入数・破棄数などを含む辞書
+        """
+        return {
+            "depth": self._queue.qsize(),
+            "max_size": self.max_size,
+            "overflow": self.overflow.value,
+            "published": self.published,
+            "dropped_oldest": self.dropped_oldest,
+            "dropped_newest": self.dropped_newest,
+            "high_watermark": self.high_watermark,
+        }
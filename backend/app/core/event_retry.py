@@ -0,0 +1,261 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
+import itertools
+import logging
+import random
+
+from app.core.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# デッドレターストアに保持する最大件数（超えた場合は古いものから捨てる）
+DEFAULT_DEAD_LETTER_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """ジッター付き指数バックオフの設定"""
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        """
+        attempt回目の失敗後の待ち時間を返す（Full Jitter: 0〜base*2^(attempt-1)の一様分布）
+
+        Args:
+            attempt: 失敗回数（1始まり）
+            rng: 乱数ストリーム
+
+        Returns:
+            待ち時間（秒）
+        """
+        return rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+@dataclass
+class DeadLetter:
+    """リトライを使い切った処理"""
+    letter_id: int
+    name: str
+    payload: Any
+    error: str
+    attempts: int
+    failed_at: datetime = field(default_factory=datetime.now)
+    retry: Optional[Callable[[], Awaitable[Any]]] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """確認用の辞書に変換する"""
+        return {
+            "id": self.letter_id,
+            "name": self.name,
+            "payload": self.payload,
+            "error": self.error,
+            "attempts": self.attempts,
+            "failed_at": self.failed_at.isoformat(),
+        }
+
+
+class DeadLetterStore:
+    """失敗した処理を保持し、確認と再実行を可能にするストア"""
+
+    def __init__(self, max_size: int = DEFAULT_DEAD_LETTER_SIZE):
+        self.max_size = max_size
+        self._letters: "OrderedDict[int, DeadLetter]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._letters)
+
+    def add(
+        self,
+        name: str,
+        payload: Any,
+        error: BaseException,
+        attempts: int,
+        retry: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> DeadLetter:
+        """
+        失敗した処理を追加する
+
+        Args:
+            name: 処理の名前（ハンドラー名やアクション種別）
+            payload: 処理対象（イベントなど）
+            error: 最後に発生した例外
+            attempts: 試行回数
+            retry: 再実行用のコルーチン関数
+
+        Returns:
+            追加したデッドレター
+        """
+        letter = DeadLetter(next(self._ids), name, payload, f"{type(error).__name__}: {error}", attempts, retry=retry)
+        self._letters[letter.letter_id] = letter
+        if len(self._letters) > self.max_size:
+            self._letters.popitem(last=False)
+            self.evicted += 1
+        logger.warning(f"Dead-lettered {name} after {attempts} attempts: {letter.error}")
+        return letter
+
+    def get(self, letter_id: int) -> Optional[DeadLetter]:
+        """IDでデッドレターを取得する"""
+        return self._letters.get(letter_id)
+
+    def list(self, limit: Optional[int] = None) -> List[DeadLetter]:
+        """古い順にデッドレターを返す"""
+        letters = list(self._letters.values())
+        return letters if limit is None else letters[:limit]
+
+    def remove(self, letter_id: int) -> bool:
+        """デッドレターを削除する"""
+        return self._letters.pop(letter_id, None) is not None
+
+    async def replay(self, letter_id: int) -> Any:
+        """
+        デッドレターを再実行する
+
+        再実行のためストアから取り出し、再び失敗した場合は新しいデッドレターとして戻る。
+
+        Args:
+            letter_id: デッドレターのID
+
+        Returns:
+            再実行の結果
+        """
+        letter = self._letters.get(letter_id)
+        if letter is None:
+            raise KeyError(f"Dead letter not found: {letter_id}")
+        if letter.retry is None:
+            raise ValueError(f"Dead letter {letter_id} cannot be replayed")
+        del self._letters[letter_id]
+        result = await letter.retry()
+        logger.info(f"Replayed dead letter {letter_id} ({letter.name})")
+        return result
+
+
+@dataclass
+class _RetryJob:
+    name: str
+    attempt: Callable[[], Awaitable[Any]]
+    policy: RetryPolicy
+    payload: Any
+    future: asyncio.Future
+    attempts: int = 0
+
+
+class RetryManager:
+    """
+    失敗した処理をタイマーホイールで再スケジュールするマネージャ
+
+    待機中の処理はワーカーの実行枠を占有せず、期限が来たときに新しい
+    タスクとして再実行される。リトライを使い切った処理はデッドレターストアに送る。
+    """
+
+    def __init__(
+        self,
+        wheel: Optional[TimerWheel] = None,
+        dead_letters: Optional[DeadLetterStore] = None,
+        seed: Optional[int] = None
+    ):
+        self.wheel = wheel or TimerWheel()
+        self.dead_letters = dead_letters or DeadLetterStore()
+        self._rng = random.Random(seed)
+        self.scheduled = 0
+        self.succeeded = 0
+
+    def submit(
+        self,
+        name: str,
+        attempt: Callable[[], Awaitable[Any]],
+        policy: RetryPolicy,
+        payload: Any = None
+    ) -> asyncio.Future:
+        """
+        処理を実行し、失敗した場合はポリシーに従ってリトライする
+
+        Args:
+            name: 処理の名前
+            attempt: 1回分の処理を行うコルーチン関数
+            policy: リトライポリシー
+            payload: デッドレターに残す処理対象
+
+        Returns:
+            最終的な結果を受け取るFuture（デッドレター行きの場合は最後の例外）
+        """
+        job = _RetryJob(name, attempt, policy, payload, asyncio.get_running_loop().create_future())
+        self._run(job)
+        return job.future
+
+    def retry_later(
+        self,
+        name: str,
+        attempt: Callable[[], Awaitable[Any]],
+        policy: RetryPolicy,
+        error: BaseException,
+        payload: Any = None
+    ) -> asyncio.Future:
+        """
+        既に1回失敗した処理をバックグラウンドでリトライする
+
+        Args:
+            name: 処理の名前
+            attempt: 1回分の処理を行うコルーチン関数
+            policy: リトライポリシー
+            error: 最初の失敗の例外
+            payload: デッドレターに残す処理対象
+
+        Returns:
+            最終的な結果を受け取るFuture（待たなくてもよい）
+        """
+        future = asyncio.get_running_loop().create_future()
+        # 誰も待たない場合でも例外が未取得として警告されないようにする
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        job = _RetryJob(name, attempt, policy, payload, future)
+        self._on_failure(job, error)
+        return future
+
+    def _run(self, job: _RetryJob) -> None:
+        task = asyncio.ensure_future(job.attempt())
+        task.add_done_callback(lambda done: self._on_done(job, done))
+
+    def _on_done(self, job: _RetryJob, done: asyncio.Future) -> None:
+        if done.cancelled():
+            job.future.cancel()
+        elif done.exception() is not None:
+            self._on_failure(job, done.exception())
+        else:
+            if job.attempts:
+                self.succeeded += 1
+            job.future.set_result(done.result())
+
+    def _on_failure(self, job: _RetryJob, error: BaseException) -> None:
+        job.attempts += 1
+        if job.attempts > job.policy.max_retries:
+            self.dead_letters.add(
+                job.name, job.payload, error, job.attempts,
+                retry=lambda: self.submit(job.name, job.attempt, job.policy, job.payload)
+            )
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+        delay = job.policy.delay(job.attempts, self._rng)
+        self.scheduled += 1
+        logger.info(f"Retrying {job.name} in {delay:.3f}s (attempt {job.attempts + 1})")
+        self.wheel.schedule(delay, self._run, job)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        リトライの統計情報を返す
+
+        Returns:
+            スケジュールしたリトライ数・リトライで成功した数・待機中の数・デッドレター数
+        """
+        return {
+            "scheduled": self.scheduled,
+            "succeeded": self.succeeded,
+            "waiting": len(self.wheel),
+            "dead_letters": len(self.dead_letters),
+        }
@@ -0,0 +1,385 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from multiprocessing import shared_memory
+import asyncio
+import logging
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+from app.core.event_journal import decode_event, encode_event
+
+logger = logging.getLogger(__name__)
+
+# フレームの長さプレフィックス
+FRAME_LENGTH = struct.Struct("<I")
+
+# 先頭/末尾カウンタを別々のキャッシュラインに置くためのヘッダサイズ
+RING_HEADER_SIZE = 128
+
+# シャードに停止を伝える空フレーム
+_STOP_FRAME = b""
+
+DEFAULT_RING_SIZE = 4 * 1024 * 1024
+
+# リングに空きができるのを待つ最大時間（秒）
+DEFAULT_PUBLISH_TIMEOUT = 5.0
+# 送ったイベントが処理されるのを待つ最大時間（秒）
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+
+class SharedRingBuffer:
+    """
+    共有メモリ上のSPSC（単一生産者・単一消費者）リングバッファ
+
+    ヘッダに書き込み位置(head)と読み出し位置(tail)を単調増加のuint64で持ち、
+    データ領域には長さ付きフレームを折り返しながら格納する。headは生産者だけが、
+    tailは消費者だけが更新するためロックは不要。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_SIZE, name: Optional[str] = None):
+        self.capacity = capacity
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=RING_HEADER_SIZE + capacity)
+            self.shm.buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._head = np.ndarray((1,), np.uint64, buffer=self.shm.buf, offset=0)
+        self._tail = np.ndarray((1,), np.uint64, buffer=self.shm.buf, offset=64)
+        self._data = self.shm.buf[RING_HEADER_SIZE:RING_HEADER_SIZE + capacity]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self) -> int:
+        """未読のバイト数"""
+        return int(self._head[0] - self._tail[0])
+
+    def _write(self, position: int, data: bytes) -> None:
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        if first < len(data):
+            self._data[:len(data) - first] = data[first:]
+
+    def _read(self, position: int, size: int) -> bytes:
+        start = position % self.capacity
+        first = min(size, self.capacity - start)
+        if first == size:
+            return bytes(self._data[start:start + size])
+        return bytes(self._data[start:]) + bytes(self._data[:size - first])
+
+    def put_batch(self, frames: List[bytes]) -> int:
+        """
+        フレームをまとめて書き込む（headの更新は最後に1回だけ行う）
+
+        Args:
+            frames: 書き込むフレームのリスト
+
+        Returns:
+            書き込めたフレーム数（空きが足りない場合は先頭から書けた分だけ）
+        """
+        head = int(self._head[0])
+        free = self.capacity - (head - int(self._tail[0]))
+        written = 0
+        for frame in frames:
+            need = FRAME_LENGTH.size + len(frame)
+            if need > self.capacity:
+                raise ValueError(f"Frame of {len(frame)} bytes does not fit in the ring buffer")
+            if need > free:
+                break
+            self._write(head, FRAME_LENGTH.pack(len(frame)) + frame)
+            head += need
+            free -= need
+            written += 1
+        if written:
+            # データを書き終えてから公開する
+            self._head[0] = head
+        return written
+
+    def get_batch(self, max_frames: int = 1024) -> List[bytes]:
+        """
+        読み出せるフレームをまとめて取り出す
+
+        Args:
+            max_frames: 取り出す最大フレーム数
+
+        Returns:
+            フレームのリスト（空の場合は空リスト）
+        """
+        tail = int(self._tail[0])
+        head = int(self._head[0])
+        frames = []
+        while tail < head and len(frames) < max_frames:
+            (length,) = FRAME_LENGTH.unpack(self._read(tail, FRAME_LENGTH.size))
+            frames.append(self._read(tail + FRAME_LENGTH.size, length))
+            tail += FRAME_LENGTH.size + length
+        if frames:
+            self._tail[0] = tail
+        return frames
+
+    def close(self) -> None:
+        """共有メモリを切り離す（作成側は削除も行う）"""
+        del self._head, self._tail
+        self._data.release()
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def shard_for(key: Hashable, num_shards: int) -> int:
+    """
+    キーからシャード番号を求める（プロセスをまたいで安定するようCRC32を使う）
+
+    Args:
+        key: パーティションキー
+        num_shards: シャード数
+
+    Returns:
+        シャード番号
+    """
+    return zlib.crc32(str(key).encode("utf-8")) % num_shards
+
+
+def default_partition_key(event: Any) -> Hashable:
+    """ペイロードのsymbolがあればそれを、なければイベントタイプをキーにする"""
+    return event.payload.get("symbol", event.type)
+
+
+def _shard_main(
+    index: int,
+    ring_name: str,
+    capacity: int,
+    setup: Optional[Callable[[Any, int], None]],
+    processed: Any
+) -> None:
+    """シャードプロセスのエントリポイント"""
+    from app.core.event_system import EventSystem
+
+    ring = SharedRingBuffer(capacity, name=ring_name)
+    system = EventSystem()
+    if setup is not None:
+        # ハンドラーやトリガーの状態はシャードごとに独立して持つ
+        setup(system, index)
+
+    async def consume() -> None:
+        idle = 0
+        while True:
+            frames = ring.get_batch()
+            if not frames:
+                # 空の間は徐々に待ち時間を延ばす（最大1ms）
+                idle = min(idle + 1, 10)
+                await asyncio.sleep(0.0001 * idle)
+                continue
+            idle = 0
+            for frame in frames:
+                if frame == _STOP_FRAME:
+                    return
+                event, _ = decode_event(frame)
+                try:
+                    # キューを挟まず順に処理することで同じキーのイベントの順序を保つ
+                    await system.process_event(event)
+                except Exception as e:
+                    logger.error(f"Shard {index} failed to process {event.type}: {str(e)}")
+                processed[index] += 1
+
+    try:
+        asyncio.run(consume())
+    finally:
+        system.shutdown()
+        ring.close()
+
+
+class ShardedEventBus:
+    """
+    キーでイベントを振り分けるマルチプロセスのイベントバス
+
+    シャードごとにプロセスを起動し、それぞれが独自のEventSystemを持つ。
+    親プロセスからは共有メモリのSPSCリングバッファでイベントを渡す。
+    同じキーのイベントは常に同じシャードで記録順に処理される。
+    リングが満杯のとき、publish / publish_manyはイベントループを止めずに空きを待ち、
+    publish_nowaitはFalseを返す。
+    """
+
+    def __init__(
+        self,
+        num_shards: Optional[int] = None,
+        setup: Optional[Callable[[Any, int], None]] = None,
+        key: Callable[[Any], Hashable] = default_partition_key,
+        ring_size: int = DEFAULT_RING_SIZE
+    ):
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.setup = setup
+        self.key = key
+        self.ring_size = ring_size
+        self._rings: List[SharedRingBuffer] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._processed = multiprocessing.Array("q", self.num_shards, lock=False)
+        self.published = [0] * self.num_shards
+        self.rejected = [0] * self.num_shards
+
+    def start(self) -> None:
+        """シャードプロセスを起動する（setupはpickle可能なモジュールレベル関数にする）"""
+        if self._processes:
+            raise RuntimeError("Sharded event bus is already running")
+        for index in range(self.num_shards):
+            ring = SharedRingBuffer(self.ring_size)
+            process = multiprocessing.Process(
+                target=_shard_main,
+                args=(index, ring.name, self.ring_size, self.setup, self._processed),
+                name=f"event-shard-{index}",
+                daemon=True
+            )
+            process.start()
+            self._rings.append(ring)
+            self._processes.append(process)
+        logger.info(f"Started sharded event bus with {self.num_shards} shards")
+
+    def _check_alive(self, shard: int) -> None:
+        if not self._processes[shard].is_alive():
+            raise RuntimeError(f"Shard {shard} is not running")
+
+    async def _put(self, shard: int, frames: List[bytes], timeout: Optional[float]) -> None:
+        """リングが空くまで待ちながらフレームを書き込む（生産者への背圧）"""
+        ring = self._rings[shard]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        idle = 0
+        while frames:
+            written = ring.put_batch(frames)
+            self.published[shard] += written
+            frames = frames[written:]
+            if not frames:
+                return
+            self._check_alive(shard)
+            if deadline is not None and time.monotonic() > deadline:
+                raise asyncio.TimeoutError(
+                    f"Shard {shard} ring stayed full for {timeout}s; {len(frames)} events not sent"
+                )
+            # 空くまでの間は徐々に待ち時間を延ばす（最大1ms）
+            idle = idle + 1 if written == 0 else 1
+            await asyncio.sleep(0.0001 * min(idle, 10))
+
+    def publish_nowait(self, event: Any) -> bool:
+        """
+        イベントを待たずにキーに対応するシャードに送る
+
+        Args:
+            event: 送るEvent
+
+        Returns:
+            bool: 送った場合True（リングが満杯の場合False）
+        """
+        shard = shard_for(self.key(event), self.num_shards)
+        self._check_alive(shard)
+        if not self._rings[shard].put_batch([encode_event(event)]):
+            self.rejected[shard] += 1
+            return False
+        self.published[shard] += 1
+        return True
+
+    async def publish(self, event: Any, timeout: Optional[float] = DEFAULT_PUBLISH_TIMEOUT) -> int:
+        """
+        イベントをキーに対応するシャードに送る（リングが満杯の場合は空くまで待つ）
+
+        Args:
+            event: 送るEvent
+            timeout: 空きを待つ最大時間（秒）。超えた場合はasyncio.TimeoutError
+
+        Returns:
+            送り先のシャード番号
+        """
+        shard = shard_for(self.key(event), self.num_shards)
+        await self._put(shard, [encode_event(event)], timeout)
+        return shard
+
+    async def publish_many(
+        self,
+        events: Iterable[Any],
+        timeout: Optional[float] = DEFAULT_PUBLISH_TIMEOUT
+    ) -> int:
+        """
+        イベントをシャードごとにまとめて送る（シャード内の順序は入力順を保つ）
+
+        Args:
+            events: 送るEventの列
+            timeout: シャードごとに空きを待つ最大時間（秒）
+
+        Returns:
+            送ったイベント数
+        """
+        batches: List[List[bytes]] = [[] for _ in range(self.num_shards)]
+        for event in events:
+            batches[shard_for(self.key(event), self.num_shards)].append(encode_event(event))
+        total = 0
+        for shard, frames in enumerate(batches):
+            if frames:
+                await self._put(shard, frames, timeout)
+                total += len(frames)
+        return total
+
+    def processed(self) -> List[int]:
+        """シャードごとの処理済みイベント数"""
+        return list(self._processed)
+
+    async def wait_idle(self, timeout: float = DEFAULT_IDLE_TIMEOUT) -> bool:
+        """
+        送ったイベントが全て処理されるまで待つ
+
+        未処理のイベントを残したまま終了したシャードがある場合はRuntimeErrorを送出する。
+
+        Args:
+            timeout: 最大待ち時間（秒）
+
+        Returns:
+            bool: 全て処理された場合True（時間内に終わらなかった場合False）
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            pending = [
+                shard for shard, (done, sent) in enumerate(zip(self.processed(), self.published))
+                if done < sent
+            ]
+            if not pending:
+                return True
+            for shard in pending:
+                self._check_alive(shard)
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.001)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """全シャードに停止を伝え、プロセスの終了を待つ（timeout秒で終わらなければ強制終了する）"""
+        deadline = time.monotonic() + timeout
+        for ring, process in zip(self._rings, self._processes):
+            # リングが満杯の間は停止フレームを書けないため、期限まで空きを待つ
+            while process.is_alive() and not ring.put_batch([_STOP_FRAME]):
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0.001)
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for ring in self._rings:
+            ring.close()
+        self._rings, self._processes = [], []
+        logger.info("Sharded event bus stopped")
+
+    def stats(self) -> Dict[str, List[int]]:
+        """
+        シャードごとの統計情報を返す
+
+        Returns:
+            送信数・満杯で送れなかった数・処理数・リングの未読バイト数
+        """
+        return {
+            "published": list(self.published),
+            "rejected": list(self.rejected),
+            "processed": self.processed(),
+            "ring_bytes": [len(ring) for ring in self._rings],
+        }
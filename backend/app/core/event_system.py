@@ -1,10 +1,23 @@
-from typing import Dict, List, Callable, Any
-from dataclasses import dataclass
+from typing import Dict, List, Callable, Any, Awaitable, Hashable, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
+import contextvars
+import functools
 import logging
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
 
+from app.core.event_batching import BatchingHandler
+from app.core.event_dispatch import HandlerEntry, HandlerRegistry
+from app.core.event_execution import ExecutionMode, ProcessHandlerPool
+from app.core.event_guard import CircuitOpenError, HandlerGuard, HandlerLimits
+from app.core.event_journal import EventJournal
+from app.core.event_priority import DEFAULT_PRIORITY, PriorityScheduler
+from app.core.event_retry import DeadLetter, RetryManager, RetryPolicy
+from app.core.tracing import STAGE_DISPATCH, STAGE_HANDLER, current_trace, tracer
+from app.core.event_queue import BoundedEventQueue, OverflowPolicy
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -12,7 +25,9 @@ class Event:
     """イベントデータを表現するクラス"""
     type: str
     payload: Dict[str, Any]
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
+    # 取り込み時刻（time.monotonic_ns）。レイテンシの計測にはこちらを使う
+    ingress_ns: int = field(default_factory=time.monotonic_ns)
 
 class EventSystem:
     """
@@ -21,23 +36,148 @@ class EventSystem:
     """
     
     def __init__(self):
-        self._handlers: Dict[str, List[Callable]] = {}
+        self._handlers = HandlerRegistry()
         self._executor = ThreadPoolExecutor(max_workers=4)
+        # 同期ハンドラーとトリガーアクションは優先度レーン経由でExecutorに渡す
+        self._scheduler = PriorityScheduler(self._executor, max_concurrency=4)
+        # CPUバウンドなハンドラー用のプロセスプール（PROCESSモードの登録時に起動する）
+        self._process_pool: Optional[ProcessHandlerPool] = None
+        # イベントループ上で起動中のプロセスプール（タスクの参照を保持し、失敗をログに残す）
+        self._pool_start: Optional[asyncio.Task] = None
+        # 処理したイベントの記録先（enable_journalで有効化する）
+        self._journal: Optional[EventJournal] = None
+        # 失敗したハンドラー・アクションのリトライとデッドレター
+        self._retries = RetryManager()
         self._active = True
+        self._queue: Optional[BoundedEventQueue[Event]] = None
+        self._workers: List[asyncio.Task] = []
+        self._processed = 0
+        self._failed = 0
+        self._batchers: Dict[str, List[BatchingHandler]] = {}
+        # バッチ配信ハンドラーごとの実行設定（元のハンドラー・ガード・リトライ回数）
+        self._batch_entries: Dict[BatchingHandler, HandlerEntry] = {}
+        self._handler_failures = 0
 
-    def register_handler(self, event_type: str, handler: Callable) -> None:
+    def register_handler(
+        self,
+        event_type: str,
+        handler: Callable,
+        batch_size: Optional[int] = None,
+        max_latency: float = 0.05,
+        coalesce_key: Optional[Callable[[Event], Hashable]] = None,
+        priority: int = DEFAULT_PRIORITY,
+        mode: ExecutionMode = ExecutionMode.THREAD,
+        retries: int = 0,
+        limits: Optional[HandlerLimits] = None
+    ) -> None:
         """
         イベントハンドラーを登録する
 
+        event_typeには完全一致のタイプのほか、末尾に*を付けたプレフィックス
+        パターン（"effect_*"など、"*"は全タイプ）を指定できる。
+        batch_sizeを指定するとハンドラーはList[Event]を受け取るバッチ配信になる。
+        batch_size件溜まるかmax_latency秒経過した時点でまとめて呼び出される。
+
         Args:
-            event_type (str): イベントタイプ
+            event_type (str): イベントタイプまたはプレフィックスパターン
             handler (Callable): ハンドラー関数
+            batch_size (Optional[int]): バッチの最大件数（Noneの場合は1件ずつ配信）
+            max_latency (float): バッチを送り出すまでの最大待ち時間（秒）
+            coalesce_key (Optional[Callable]): 同じキーのイベントは最新の1件だけを配信する
+            priority (int): 同期ハンドラーの実行優先度（1が最優先、5が最低）
+            mode (ExecutionMode): 同期ハンドラーの実行方式。PROCESSの場合ハンドラーは
+                pickle可能なモジュールレベル関数である必要がある
+            retries (int): 失敗時にバックグラウンドでリトライする回数
+                （使い切った場合はデッドレターストアに送る）
+            limits (Optional[HandlerLimits]): タイムアウト・同時実行数・サーキットブレーカーの設定
         """
-        if event_type not in self._handlers:
-            self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
+        mode = ExecutionMode(mode)
+        if mode is not ExecutionMode.THREAD and (
+            batch_size is not None or asyncio.iscoroutinefunction(handler)
+        ):
+            raise ValueError(f"Execution mode {mode.value} is only supported for synchronous handlers")
+        if mode is ExecutionMode.PROCESS and self._process_pool is None:
+            self._process_pool = ProcessHandlerPool()
+            try:
+                # イベントループ上ではワーカーの起動をバックグラウンドで待つ
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._process_pool.start()
+            else:
+                self._pool_start = loop.create_task(self._process_pool.ensure_started())
+                self._pool_start.add_done_callback(self._on_pool_started)
+
+        if batch_size is None and coalesce_key is not None:
+            raise ValueError("coalesce_key requires batch_size")
+
+        guard = None
+        if limits is not None:
+            guard = HandlerGuard(getattr(handler, "__qualname__", repr(handler)), limits)
+
+        if batch_size is not None:
+            # バッファへの追加は軽いのでそのまま登録し、ガード・リトライ・デッドレターは
+            # 実際にハンドラーを呼ぶバッチの実行に適用する
+            entry = HandlerEntry(
+                handler=handler,
+                is_async=asyncio.iscoroutinefunction(handler),
+                pattern=event_type,
+                order=-1,
+                priority=priority,
+                mode=mode.value,
+                retries=retries,
+                guard=guard
+            )
+            batcher = BatchingHandler(
+                handler, batch_size, max_latency, coalesce_key, self._executor,
+                runner=functools.partial(self._run_batch, entry)
+            )
+            self._batchers.setdefault(event_type, []).append(batcher)
+            self._batch_entries[batcher] = entry
+            self._handlers.register(event_type, batcher.submit, priority, ExecutionMode.INLINE.value)
+        else:
+            self._handlers.register(event_type, handler, priority, mode.value, retries, guard)
         logger.info(f"Registered handler for event type: {event_type}")
 
+    def _on_pool_started(self, task: asyncio.Task) -> None:
+        """プロセスプールの起動結果を確認する（失敗しても次のPROCESSハンドラー実行時に再度起動する）"""
+        self._pool_start = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to start process handler pool: {str(task.exception())}")
+
+    def unregister_handler(self, event_type: str, handler: Callable) -> bool:
+        """
+        イベントハンドラーの登録を解除する
+
+        バッチ配信ハンドラーの場合は溜まっているイベントを配信してから外す。
+
+        Args:
+            event_type (str): 登録時のイベントタイプまたはパターン
+            handler (Callable): 登録時のハンドラー関数
+
+        Returns:
+            bool: 解除した場合True
+        """
+        batchers = self._batchers.get(event_type, [])
+        batcher = next((b for b in batchers if b.handler == handler), None)
+        if batcher is not None:
+            removed = self._handlers.unregister(event_type, batcher.submit)
+            batchers.remove(batcher)
+            if not batchers:
+                del self._batchers[event_type]
+            self._batch_entries.pop(batcher, None)
+            if len(batcher):
+                try:
+                    asyncio.get_running_loop().create_task(batcher.flush())
+                except RuntimeError:
+                    logger.warning(
+                        f"Discarded {len(batcher)} pending events of unregistered batch handler {batcher!r}"
+                    )
+        else:
+            removed = self._handlers.unregister(event_type, handler)
+        if removed:
+            logger.info(f"Unregistered handler for event type: {event_type}")
+        return removed
+
     async def process_event(self, event: Event) -> None:
         """
         イベントを処理する
@@ -49,34 +189,373 @@ class EventSystem:
             logger.warning("Event system is not active")
             return
 
-        if event.type not in self._handlers:
+        if self._journal is not None:
+            self._journal.append(event)
+
+        # 登録時に作られたスナップショットをロックなしで参照する
+        entries = self._handlers.resolve(event.type)
+        if not entries:
             logger.warning(f"No handlers registered for event type: {event.type}")
             return
 
+        trace = current_trace.get()
+        if trace is None:
+            trace = tracer.new_trace(event.ingress_ns, event.type)
+        token = current_trace.set(trace)
         try:
-            handlers = self._handlers[event.type]
-            tasks = []
-            
-            for handler in handlers:
-                # 非同期ハンドラーの場合は直接実行
-                if asyncio.iscoroutinefunction(handler):
-                    tasks.append(asyncio.create_task(handler(event)))
-                else:
-                    # 同期ハンドラーの場合はThreadPoolExecutorで実行
-                    tasks.append(
-                        asyncio.get_event_loop().run_in_executor(
-                            self._executor,
-                            handler,
-                            event
-                        )
-                    )
-            
-            await asyncio.gather(*tasks)
+            with tracer.span(STAGE_DISPATCH):
+                # 1つのハンドラーの失敗が他のハンドラーやイベント全体に波及しないよう
+                # 例外は結果として受け取り、個別にリトライ・デッドレターへ回す
+                results = await asyncio.gather(
+                    *(self._invoke(entry, event) for entry in entries),
+                    return_exceptions=True
+                )
+            for entry, result in zip(entries, results):
+                if isinstance(result, Exception):
+                    self._handle_failure(entry, event, result)
             logger.info(f"Successfully processed event: {event.type}")
             
         except Exception as e:
             logger.error(f"Error processing event {event.type}: {str(e)}")
             raise
+        finally:
+            current_trace.reset(token)
+
+    def enable_journal(self, directory: str, **options: Any) -> EventJournal:
+        """
+        処理するイベントをジャーナルに記録する
+
+        Args:
+            directory (str): セグメントファイルを置くディレクトリ
+            **options: EventJournalのオプション（segment_size, commit_interval, flush_interval,
+                max_pending）
+
+        Returns:
+            EventJournal: 開始したジャーナル
+        """
+        if self._journal is not None:
+            raise RuntimeError("Event journal is already enabled")
+        self._journal = EventJournal(directory, **options)
+        self._journal.start()
+        return self._journal
+
+    def disable_journal(self) -> None:
+        """ジャーナルへの記録を停止し、残りのイベントを書き込む"""
+        if self._journal is not None:
+            journal, self._journal = self._journal, None
+            journal.close()
+
+    def _invoke(self, entry: HandlerEntry, event: Event) -> Awaitable:
+        """ハンドラーを実行方式に応じて起動し、完了を待つためのAwaitableを返す"""
+        if entry.guard is not None:
+            # タイムアウト・同時実行数・サーキットブレーカーを適用する
+            return asyncio.create_task(
+                entry.guard.call(lambda: self._start_handler(entry, event), cancellable=entry.is_async)
+            )
+        return self._start_handler(entry, event)
+
+    def _start_handler(self, entry: HandlerEntry, event: Event) -> Awaitable:
+        if entry.is_async:
+            # 非同期ハンドラーの場合は直接実行
+            return asyncio.create_task(self._run_async(entry.handler, event))
+        if entry.mode == ExecutionMode.INLINE:
+            # 軽量なハンドラーはイベントループ上でそのまま実行
+            future = asyncio.get_running_loop().create_future()
+            try:
+                future.set_result(self._run_sync(entry.handler, event))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if entry.mode == ExecutionMode.PROCESS:
+            # CPUバウンドなハンドラーはワーカープロセスで実行
+            return asyncio.create_task(self._run_process(entry.handler, event))
+        # 同期ハンドラーの場合は優先度レーンを経由してThreadPoolExecutorで実行
+        # （トレースを引き継ぐため現在のコンテキストごと渡す）
+        return self._scheduler.submit(
+            functools.partial(contextvars.copy_context().run, self._run_sync, entry.handler),
+            event,
+            priority=entry.priority
+        )
+
+    async def _run_batch(self, entry: HandlerEntry, batch: List[Event]) -> Any:
+        """バッチ配信ハンドラーを1件のハンドラーと同じ経路（ガード・優先度レーン・リトライ）で実行する"""
+        try:
+            return await self._invoke(entry, batch)
+        except Exception as e:
+            self._handle_failure(entry, batch, e)
+
+    def _handle_failure(self, entry: HandlerEntry, event: Any, error: Exception) -> None:
+        """
+        失敗したハンドラーをリトライに回す（リトライ回数0の場合は直接デッドレターへ）
+
+        eventはイベント1件、またはバッチ配信ハンドラーの場合はイベントのリスト。
+        """
+        if isinstance(error, CircuitOpenError):
+            # ブレーカーが開いている間はスキップする（件数はHandlerGuardで集計）
+            return
+        name = getattr(entry.handler, "__qualname__", repr(entry.handler))
+        target = f"event {event.type}" if isinstance(event, Event) else f"batch of {len(event)} events"
+        self._handler_failures += 1
+        logger.error(f"Handler {name} failed for {target}: {str(error)}")
+        self._retries.retry_later(
+            name,
+            lambda: self._invoke(entry, event),
+            RetryPolicy(max_retries=entry.retries),
+            error,
+            payload=event
+        )
+
+    @staticmethod
+    def _run_sync(handler: Callable, event: Event) -> Any:
+        with tracer.span(STAGE_HANDLER):
+            return handler(event)
+
+    @staticmethod
+    async def _run_async(handler: Callable, event: Event) -> Any:
+        with tracer.span(STAGE_HANDLER):
+            return await handler(event)
+
+    async def _run_process(self, handler: Callable, event: Event) -> Any:
+        with tracer.span(STAGE_HANDLER):
+            return await self._process_pool.run(handler, event)
+
+    async def execute_action(self, action: Any, handler: Callable, *args: Any) -> Any:
+        """
+        トリガーアクションを優先度に従って実行する
+
+        失敗した場合はaction.retry_count回までジッター付き指数バックオフでリトライし、
+        使い切った場合はデッドレターストアに送って最後の例外を送出する。
+
+        Args:
+            action: TriggerAction（priority属性を参照する）
+            handler (Callable): アクションを実行する同期関数、またはコルーチン関数
+                （ActionDispatcher.dispatchなど。同時実行数の枠内でイベントループ上で実行する）
+            *args: ハンドラーに渡す引数
+
+        Returns:
+            ハンドラーの戻り値
+        """
+        priority = getattr(action, "priority", DEFAULT_PRIORITY)
+        action_type = getattr(action, "action_type", "action")
+        try:
+            # リトライ待ちの間は実行枠を占有せず、タイマーホイールで再投入する
+            return await self._retries.submit(
+                f"action:{getattr(action_type, 'value', action_type)}",
+                lambda: self._scheduler.submit(handler, *args, priority=priority),
+                RetryPolicy(max_retries=getattr(action, "retry_count", 0)),
+                payload={"action": action, "args": args}
+            )
+        except Exception as e:
+            logger.error(f"Error executing action (priority={priority}): {str(e)}")
+            raise
+
+    def start_workers(
+        self,
+        num_workers: int = 4,
+        max_queue_size: int = 10000,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK
+    ) -> None:
+        """
+        キュー経由の取り込みモードを開始する
+
+        publish()で投入したイベントを有界キューに積み、num_workers個の
+        コンシューマタスクがprocess_eventで処理する。
+
+        Args:
+            num_workers: コンシューマタスク数
+            max_queue_size: キューの最大長
+            overflow: キューが満杯のときのポリシー
+        """
+        if self._workers:
+            raise RuntimeError("Event workers are already running")
+        if num_workers <= 0:
+            raise ValueError(f"num_workers must be positive: {num_workers}")
+
+        self._queue = BoundedEventQueue(max_queue_size, overflow)
+        self._workers = [
+            asyncio.create_task(self._consume(), name=f"event-worker-{i}")
+            for i in range(num_workers)
+        ]
+        logger.info(
+            f"Started {num_workers} event workers "
+            f"(max_queue_size={max_queue_size}, overflow={self._queue.overflow.value})"
+        )
+
+    async def _consume(self) -> None:
+        """キューからイベントを取り出して処理するコンシューマ"""
+        queue = self._queue
+        while True:
+            event = await queue.get()
+            try:
+                await self.process_event(event)
+                self._processed += 1
+            except Exception:
+                # process_eventでログ出力済み。ワーカーは処理を継続する
+                self._failed += 1
+            finally:
+                queue.task_done()
+
+    async def publish(self, event: Event) -> bool:
+        """
+        イベントをキューに投入する
+
+        ハンドラーの完了は待たない。BLOCKポリシーの場合はキューに空きが
+        できるまで待つことで生産者に背圧をかける。
+
+        Args:
+            event (Event): 投入するイベント
+
+        Returns:
+            bool: キューに投入した場合True（破棄した場合False）
+        """
+        if self._queue is None or not self._workers:
+            raise RuntimeError("Event workers are not running; call start_workers() first")
+        return await self._queue.put(event)
+
+    def publish_nowait(self, event: Event) -> bool:
+        """
+        イベントを待たずにキューに投入する（満杯時はポリシーに従い破棄）
+
+        Args:
+            event (Event): 投入するイベント
+
+        Returns:
+            bool: キューに投入した場合True
+        """
+        if self._queue is None or not self._workers:
+            raise RuntimeError("Event workers are not running; call start_workers() first")
+        return self._queue.put_nowait(event)
+
+    async def stop_workers(self, drain: bool = True) -> None:
+        """
+        コンシューマタスクを停止する
+
+        Args:
+            drain: Trueの場合はキューに残ったイベントを処理してから停止する
+        """
+        if drain and self._queue is not None:
+            await self._queue.join()
+            await self.flush_batches()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Event workers stopped")
+
+    async def flush_batches(self) -> None:
+        """バッチ配信ハンドラーに溜まっているイベントを即座に配信する"""
+        await asyncio.gather(*(
+            batcher.flush()
+            for batchers in self._batchers.values() for batcher in batchers
+        ))
+
+    def batch_stats(self) -> Dict[str, List[Dict[str, int]]]:
+        """
+        バッチ配信ハンドラーの統計情報をイベントタイプごとに返す
+
+        Returns:
+            イベントタイプをキー、ハンドラーごとの統計のリストを値とする辞書
+        """
+        return {
+            event_type: [batcher.stats() for batcher in batchers]
+            for event_type, batchers in self._batchers.items()
+        }
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """
+        優先度レーンごとの待ち行列長とレイテンシ統計を返す
+
+        Returns:
+            PriorityScheduler.stats()の結果
+        """
+        return self._scheduler.stats()
+
+    def dead_letters(self, limit: Optional[int] = None) -> List[DeadLetter]:
+        """
+        リトライを使い切ったハンドラー・アクションを古い順に返す
+
+        Args:
+            limit: 返す最大件数
+
+        Returns:
+            デッドレターのリスト
+        """
+        return self._retries.dead_letters.list(limit)
+
+    async def replay_dead_letter(self, letter_id: int) -> Any:
+        """
+        デッドレターを再実行する（成功した場合はストアから削除される）
+
+        Args:
+            letter_id: デッドレターのID
+
+        Returns:
+            再実行の結果
+        """
+        return await self._retries.dead_letters.replay(letter_id)
+
+    def retry_stats(self) -> Dict[str, int]:
+        """
+        リトライの統計情報を返す
+
+        Returns:
+            RetryManager.stats()の結果にハンドラーの失敗数を加えた辞書
+        """
+        stats = self._retries.stats()
+        stats["handler_failures"] = self._handler_failures
+        return stats
+
+    def handler_health(self) -> List[Dict[str, Any]]:
+        """
+        登録済みハンドラーの設定と健全性を返す
+
+        Returns:
+            ハンドラーごとのパターン・実行方式・優先度と、制限を設定したものは
+            サーキットブレーカーの状態や失敗・タイムアウト件数を含む辞書のリスト
+        """
+        health = []
+        for entry in self._handlers.entries():
+            batcher = getattr(entry.handler, "__self__", None)
+            batched = isinstance(batcher, BatchingHandler)
+            if batched:
+                entry = self._batch_entries.get(batcher, entry)
+            info: Dict[str, Any] = {
+                "pattern": entry.pattern,
+                "handler": getattr(entry.handler, "__qualname__", repr(entry.handler)),
+                "async": entry.is_async,
+                "mode": entry.mode,
+                "priority": entry.priority,
+                "retries": entry.retries,
+                "batched": batched,
+            }
+            if entry.guard is not None:
+                info.update(entry.guard.health())
+            health.append(info)
+        return health
+
+    def execution_stats(self) -> Dict[str, Any]:
+        """
+        プロセスプールの統計情報を返す
+
+        Returns:
+            ProcessHandlerPool.stats()の結果（未使用の場合は空の辞書）
+        """
+        return self._process_pool.stats() if self._process_pool is not None else {}
+
+    def queue_stats(self) -> Dict[str, Any]:
+        """
+        取り込みキューの統計情報を返す
+
+        Returns:
+            キュー深さ・破棄数・処理数などを含む辞書
+        """
+        stats = self._queue.stats() if self._queue is not None else {}
+        stats.update({
+            "workers": len(self._workers),
+            "processed": self._processed,
+            "failed": self._failed,
+        })
+        return stats
 
     async def trigger_effect(self, effect_type: str, parameters: Dict[str, Any]) -> None:
         """
@@ -104,7 +583,15 @@ class EventSystem:
     def shutdown(self) -> None:
         """イベントシステムをシャットダウンする"""
         self._active = False
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._scheduler.cancel_pending()
+        self._retries.wheel.stop()
         self._executor.shutdown(wait=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+        self.disable_journal()
         logger.info("Event system shutdown completed")
 
 # シングルトンインスタンスの作成
@@ -2,13 +2,30 @@ import asyncio
 import websockets
 import json
 import logging
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List, Union, TYPE_CHECKING
 from contextlib import asynccontextmanager
 
+from app.core.effect_buffer import EffectBuffer, EffectRecord, encode_effect
+from app.core.tracing import STAGE_MINECRAFT_SEND, record_end_to_end, traced
+
+if TYPE_CHECKING:
+    from app.core.particle_simulation import SimulatedParticleEffect
+
 # ロギングの設定
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _describe_effect(effect_data: Union[Dict[str, Any], EffectRecord, EffectBuffer]) -> str:
+    """ログ用にエフェクトの種類と件数だけを返す（数千件のEffectBufferを文字列化しないため）"""
+    if isinstance(effect_data, EffectBuffer):
+        return f"batch of {len(effect_data)} effects"
+    if isinstance(effect_data, EffectRecord):
+        return f"{effect_data.kind}/{effect_data.subtype}"
+    effects = effect_data.get("effects")
+    if effects is None:
+        return f"{effect_data.get('type')}"
+    return f"{effect_data.get('type')} with {len(effects)} effects"
+
 class MinecraftConnection:
     """Minecraftサーバーとの接続を管理するクラス"""
     
@@ -16,7 +33,8 @@ class MinecraftConnection:
         self.host = host
         self.port = port
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
-        self.event_handlers: Dict[str, Callable] = {}
+        self.event_handlers: Dict[str, List[Callable]] = {}
+        self.effect_filters: List[Callable[[Any], Any]] = []
         self.is_connected = False
 
     async def connect(self) -> bool:
@@ -43,12 +61,17 @@ class MinecraftConnection:
             self.is_connected = False
             logger.info("Disconnected from Minecraft server")
 
-    async def send_effect(self, effect_data: Dict[str, Any]) -> bool:
+    @traced(STAGE_MINECRAFT_SEND)
+    async def send_effect(
+        self,
+        effect_data: Union[Dict[str, Any], EffectRecord, EffectBuffer]
+    ) -> bool:
         """
         エフェクトをMinecraftサーバーに送信
         
         Args:
-            effect_data: エフェクトのパラメータを含む辞書
+            effect_data: エフェクトのパラメータを含む辞書、またはEffectRecord / EffectBuffer
+                         （辞書への変換はシリアライズ時に行う）
             
         Returns:
             bool: 送信成功の場合True
@@ -57,18 +80,128 @@ class MinecraftConnection:
             logger.error("Not connected to Minecraft server")
             return False
 
+        effect_data = self._apply_effect_filters(effect_data)
+        if effect_data is None:
+            return True
+
         try:
             message = json.dumps({
                 "type": "effect",
                 "data": effect_data
-            })
+            }, default=encode_effect)
             await self.websocket.send(message)
-            logger.info(f"Sent effect: {effect_data}")
+            record_end_to_end()
+            logger.info(f"Sent effect: {_describe_effect(effect_data)}")
             return True
         except Exception as e:
             logger.error(f"Failed to send effect: {str(e)}")
             return False
 
+    @traced(STAGE_MINECRAFT_SEND)
+    async def send_effect_batch(self, batch: EffectBuffer) -> bool:
+        """
+        カラム形式のエフェクト群を1メッセージでMinecraftサーバーに送信
+
+        Args:
+            batch: EffectEngine.create_effect_batchで生成したエフェクト群
+
+        Returns:
+            bool: 送信成功の場合True
+        """
+        if not self.is_connected or not self.websocket:
+            logger.error("Not connected to Minecraft server")
+            return False
+
+        batch = self._apply_effect_filters(batch)
+        if batch is None:
+            return True
+
+        try:
+            message = json.dumps({
+                "type": "effect_batch",
+                "data": batch.to_columns()
+            })
+            await self.websocket.send(message)
+            record_end_to_end()
+            logger.info(f"Sent effect batch: {len(batch)} effects")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send effect batch: {str(e)}")
+            return False
+
+    async def stream_simulation(
+        self,
+        simulation: "SimulatedParticleEffect",
+        frames_per_chunk: int = 10
+    ) -> bool:
+        """
+        シミュレーション済みパーティクルの軌道をバイナリチャンクで送信
+
+        最初にエフェクト情報とフレーム数をJSONで送り、続けて軌道を
+        SimulatedParticleEffect.iter_chunksの形式で送る。フィルタで
+        particle_countが減らされた場合は先頭のパーティクルだけを送る。
+
+        Args:
+            simulation: EffectEngine.create_simulated_particle_effectの戻り値
+            frames_per_chunk: 1チャンクあたりのフレーム数
+
+        Returns:
+            bool: 送信成功の場合True
+        """
+        if not self.is_connected or not self.websocket:
+            logger.error("Not connected to Minecraft server")
+            return False
+
+        record = self._apply_effect_filters(simulation.record)
+        if record is None:
+            return True
+        if record.particle_count < simulation.trajectories.shape[0]:
+            simulation = type(simulation)(
+                record=record,
+                trajectories=simulation.trajectories[:record.particle_count],
+                frame_interval=simulation.frame_interval
+            )
+
+        try:
+            particles, frames, _ = simulation.trajectories.shape
+            await self.websocket.send(json.dumps({
+                "type": "effect_stream",
+                "data": {
+                    "effect": record,
+                    "particles": particles,
+                    "frames": frames,
+                    "frame_interval": simulation.frame_interval
+                }
+            }, default=encode_effect))
+            for chunk in simulation.iter_chunks(frames_per_chunk):
+                await self.websocket.send(chunk)
+            logger.info(f"Streamed simulated effect: {particles} particles x {frames} frames")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to stream simulated effect: {str(e)}")
+            return False
+
+    def add_effect_filter(self, effect_filter: Callable[[Any], Any]) -> None:
+        """
+        送信前にエフェクトへ適用するフィルタを登録する
+
+        フィルタは辞書・EffectRecord・EffectBufferを受け取り、送信するエフェクトを
+        返す。Noneを返した場合そのエフェクトは送信しない。登録順に適用される。
+
+        Args:
+            effect_filter: フィルタ関数（EffectCullerなど）
+        """
+        self.effect_filters.append(effect_filter)
+
+    def _apply_effect_filters(self, effect_data: Any) -> Any:
+        """登録済みフィルタを順に適用する（除外された場合はNone）"""
+        for effect_filter in self.effect_filters:
+            effect_data = effect_filter(effect_data)
+            if effect_data is None:
+                logger.debug("Effect dropped by filter")
+                return None
+        return effect_data
+
     async def listen_events(self):
         """
         Minecraftサーバーからのイベントをリッスン
@@ -83,8 +216,14 @@ class MinecraftConnection:
                     data = json.loads(message)
                     event_type = data.get("type")
                     
-                    if event_type in self.event_handlers:
-                        await self.event_handlers[event_type](data.get("data"))
+                    handlers = self.event_handlers.get(event_type)
+                    if handlers:
+                        # 登録順に呼び出し、1つのハンドラーの失敗で他のハンドラーを止めない
+                        for handler in list(handlers):
+                            try:
+                                await handler(data.get("data"))
+                            except Exception as e:
+                                logger.error(f"Event handler failed for {event_type}: {str(e)}")
                     else:
                         logger.warning(f"Unhandled event type: {event_type}")
                         
@@ -97,13 +236,32 @@ class MinecraftConnection:
 
     def register_event_handler(self, event_type: str, handler: Callable):
         """
-        イベントハンドラーを登録
+        イベントハンドラーを登録（同じイベントに複数登録でき、登録順に呼び出される）
         
         Args:
             event_type: イベントの種類
             handler: イベントを処理するコールバック関数
         """
-        self.event_handlers[event_type] = handler
+        self.event_handlers.setdefault(event_type, []).append(handler)
+
+    def unregister_event_handler(self, event_type: str, handler: Callable) -> bool:
+        """
+        イベントハンドラーの登録を解除
+        
+        Args:
+            event_type: イベントの種類
+            handler: 登録時に渡したコールバック関数
+            
+        Returns:
+            bool: 解除した場合True
+        """
+        handlers = self.event_handlers.get(event_type)
+        if not handlers or handler not in handlers:
+            return False
+        handlers.remove(handler)
+        if not handlers:
+            del self.event_handlers[event_type]
+        return True
 
     @asynccontextmanager
     async def connection(self):
@@ -0,0 +1,178 @@
+from typing import Dict, Iterator, Tuple
+from dataclasses import dataclass
+import struct
+import numpy as np
+
+from app.core.effect_buffer import EffectRecord
+from app.core.effect_cache import EffectTemplateCache
+from app.core.effect_timeline import TICK_INTERVAL
+
+# エミッタ形状
+EMITTER_SHAPES = ("sphere", "cone", "ring")
+
+# バイナリチャンクのヘッダ: magic, フレーム開始位置, フレーム数, パーティクル数, フレーム間隔
+CHUNK_HEADER = struct.Struct("<4sIIIf")
+CHUNK_MAGIC = b"PTRJ"
+
+# Minecraftの標準的な重力加速度（ブロック/秒^2）
+DEFAULT_GRAVITY = (0.0, -9.8, 0.0)
+
+
+@dataclass(frozen=True)
+class SimulationSettings:
+    """パーティクル軌道シミュレーションの設定（キャッシュキーとしても使う）"""
+    emitter: str = "sphere"
+    frames: int = 40
+    frame_interval: float = TICK_INTERVAL
+    speed: float = 4.0
+    cone_angle: float = 30.0
+    gravity: Tuple[float, float, float] = DEFAULT_GRAVITY
+    drag: float = 0.5
+    seed: int = 0
+
+
+@dataclass
+class SimulatedParticleEffect:
+    """
+    サーバー側で軌道を計算済みのパーティクルエフェクト
+    trajectoriesは(particles, frames, 3)の座標配列
+    """
+    record: EffectRecord
+    trajectories: np.ndarray
+    frame_interval: float
+
+    @property
+    def particle_frames(self) -> int:
+        """パーティクル数×フレーム数"""
+        return int(self.trajectories.shape[0] * self.trajectories.shape[1])
+
+    def iter_chunks(self, frames_per_chunk: int = 10) -> Iterator[bytes]:
+        """
+        軌道をフレーム単位のバイナリチャンクに分割する
+
+        各チャンクはCHUNK_HEADERに続き、(frames, particles, 3)のfloat16座標
+        （エミッタ位置からの相対座標）をリトルエンディアンで格納する。
+
+        Args:
+            frames_per_chunk: 1チャンクあたりのフレーム数
+
+        Yields:
+            送信用のバイト列
+        """
+        particles, frames, _ = self.trajectories.shape
+        # フレーム順に連続して取り出せるよう(frames, particles, 3)へ並べ替える
+        relative = (self.trajectories - np.asarray(self.record.position, dtype=np.float32))
+        frame_major = np.ascontiguousarray(relative.transpose(1, 0, 2), dtype="<f2")
+        for start in range(0, frames, frames_per_chunk):
+            block = frame_major[start:start + frames_per_chunk]
+            header = CHUNK_HEADER.pack(
+                CHUNK_MAGIC, start, block.shape[0], particles, self.frame_interval
+            )
+            yield header + block.tobytes()
+
+
+def _initial_directions(
+    shape: str,
+    count: int,
+    cone_angle: float,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """エミッタ形状ごとの単位方向ベクトル(count, 3)を生成する"""
+    if shape == "sphere":
+        directions = rng.normal(size=(count, 3))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        return directions
+    if shape == "cone":
+        # +y方向を軸とし、cone_angle以内の立体角に一様分布させる
+        cos_max = np.cos(np.radians(cone_angle))
+        cos_theta = rng.uniform(cos_max, 1.0, count)
+        sin_theta = np.sqrt(1.0 - cos_theta ** 2)
+        phi = rng.uniform(0.0, 2.0 * np.pi, count)
+        return np.column_stack([sin_theta * np.cos(phi), cos_theta, sin_theta * np.sin(phi)])
+    if shape == "ring":
+        # 水平面上に等間隔に広がるリング
+        phi = np.linspace(0.0, 2.0 * np.pi, count, endpoint=False)
+        return np.column_stack([np.cos(phi), np.zeros(count), np.sin(phi)])
+    raise ValueError(f"Unsupported emitter shape: {shape}")
+
+
+def simulate_trajectories(
+    count: int,
+    origin: Tuple[float, float, float],
+    spread_radius: float,
+    settings: SimulationSettings
+) -> np.ndarray:
+    """
+    パーティクル軌道を全フレーム一括で計算する
+
+    線形抗力 a = g - k v の解析解
+        v(t) = g/k + (v0 - g/k) e^{-kt}
+        x(t) = x0 + g t / k + (v0 - g/k)(1 - e^{-kt}) / k
+    を(particles, frames, 3)にブロードキャストして求める（k=0の場合は放物運動）。
+
+    Args:
+        count: パーティクル数
+        origin: エミッタの座標
+        spread_radius: 初期位置のばらつき半径
+        settings: シミュレーション設定
+
+    Returns:
+        (count, frames, 3)のfloat32座標配列
+    """
+    rng = np.random.default_rng(settings.seed)
+    directions = _initial_directions(settings.emitter, count, settings.cone_angle, rng)
+    speeds = settings.speed * rng.uniform(0.5, 1.0, (count, 1))
+    velocity = directions * speeds
+    start = np.asarray(origin, dtype=np.float64) + directions * (
+        spread_radius * rng.uniform(0.0, 0.25, (count, 1))
+    )
+
+    gravity = np.asarray(settings.gravity, dtype=np.float64)
+    t = np.arange(settings.frames, dtype=np.float64) * settings.frame_interval
+    k = settings.drag
+    if k > 0:
+        decay = (1.0 - np.exp(-k * t)) / k
+        terminal = gravity / k
+        # (1, frames, 1) x (count, 1, 3)
+        positions = (
+            start[:, None, :]
+            + (t[:, None] * terminal)[None, :, :]
+            + decay[None, :, None] * (velocity - terminal)[:, None, :]
+        )
+    else:
+        positions = (
+            start[:, None, :]
+            + t[None, :, None] * velocity[:, None, :]
+            + 0.5 * (t[:, None] ** 2 * gravity)[None, :, :]
+        )
+    return positions.astype(np.float32)
+
+
+class TrajectoryCache:
+    """
+    プリセットごとのシミュレーション結果のキャッシュ
+    キーは(パーティクル数, 拡散半径, 設定)で、エミッタ位置は平行移動で適用する
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self._cache = EffectTemplateCache(maxsize)
+
+    def get(
+        self,
+        count: int,
+        origin: Tuple[float, float, float],
+        spread_radius: float,
+        settings: SimulationSettings
+    ) -> np.ndarray:
+        """
+        原点基準の軌道をキャッシュから取得（なければ計算）し、originへ平行移動して返す
+        """
+        base = self._cache.get_or_create(
+            (count, float(spread_radius), settings),
+            lambda: simulate_trajectories(count, (0.0, 0.0, 0.0), spread_radius, settings)
+        )
+        return base + np.asarray(origin, dtype=np.float32)
+
+    def info(self) -> Dict[str, int]:
+        """キャッシュの統計情報を返す"""
+        return self._cache.info()
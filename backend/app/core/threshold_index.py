@@ -0,0 +1,528 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# 索引で扱う演算子（ConditionOperator / TriggerCondition の値）
+OP_GREATER_THAN = "greater_than"
+OP_LESS_THAN = "less_than"
+OP_BETWEEN = "between"
+OP_EQUALS = "equals"
+
+# 別名の演算子（スキーマのTriggerCondition.EQUAL_TO）
+_OPERATOR_ALIASES = {"equal_to": OP_EQUALS}
+
+
+def normalize_operator(operator: Any) -> str:
+    """Enumまたは文字列の演算子を索引用の名前に変換する"""
+    name = getattr(operator, "value", operator)
+    return _OPERATOR_ALIASES.get(name, name)
+
+
+def trigger_field(trigger: Any) -> str:
+    """APIのトリガーが参照するフィールド名を返す（parametersの"field"、無ければトリガータイプ）"""
+    parameters = trigger.parameters or {}
+    return parameters.get("field") or getattr(trigger.type, "value", trigger.type)
+
+
+def index_key(trigger_id: Any, operator: Any, value: Any) -> Tuple[str, Any]:
+    """
+    条件を索引用の演算子とキーに変換する
+
+    Args:
+        trigger_id: トリガーID（エラーメッセージ用）
+        operator: 演算子（greater_than / less_than / between / equals）
+        value: 閾値（BETWEENの場合は[low, high]）
+
+    Returns:
+        (正規化した演算子, floatの閾値またはBETWEENの(low, high))
+    """
+    operator = normalize_operator(operator)
+    if operator == OP_BETWEEN:
+        low, high = (float(v) for v in value)
+        if low > high:
+            raise ValueError(f"Invalid range for trigger {trigger_id}: {value}")
+        return operator, (low, high)
+    if operator in (OP_GREATER_THAN, OP_LESS_THAN, OP_EQUALS):
+        return operator, float(value)
+    raise ValueError(f"Operator cannot be indexed: {operator}")
+
+
+class _IntervalNode:
+    """区間木のノード（lowとトリガーIDをキーとし、部分木の最大highを保持する）"""
+    __slots__ = ("low", "high", "trigger_id", "priority", "max_high", "left", "right")
+
+    def __init__(self, low: float, high: float, trigger_id: str, priority: float):
+        self.low = low
+        self.high = high
+        self.trigger_id = trigger_id
+        self.priority = priority
+        self.max_high = high
+        self.left: Optional["_IntervalNode"] = None
+        self.right: Optional["_IntervalNode"] = None
+
+
+def _update(node: _IntervalNode) -> None:
+    high = node.high
+    if node.left is not None and node.left.max_high > high:
+        high = node.left.max_high
+    if node.right is not None and node.right.max_high > high:
+        high = node.right.max_high
+    node.max_high = high
+
+
+def _split(node: Optional[_IntervalNode], key: Tuple[float, str]):
+    """キーより小さい部分木と、キー以上の部分木に分割する"""
+    if node is None:
+        return None, None
+    if (node.low, node.trigger_id) < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left: Optional[_IntervalNode], right: Optional[_IntervalNode]) -> Optional[_IntervalNode]:
+    """全てのキーがleft < rightである2つの部分木を結合する"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove(node: Optional[_IntervalNode], key: Tuple[float, str]):
+    if node is None:
+        return None, False
+    node_key = (node.low, node.trigger_id)
+    if node_key == key:
+        return _merge(node.left, node.right), True
+    if key < node_key:
+        node.left, removed = _remove(node.left, key)
+    else:
+        node.right, removed = _remove(node.right, key)
+    if removed:
+        _update(node)
+    return node, removed
+
+
+def _copy_node(node: _IntervalNode) -> _IntervalNode:
+    clone = _IntervalNode.__new__(_IntervalNode)
+    clone.low = node.low
+    clone.high = node.high
+    clone.trigger_id = node.trigger_id
+    clone.priority = node.priority
+    clone.max_high = node.max_high
+    clone.left = node.left
+    clone.right = node.right
+    return clone
+
+
+def _split_copy(node: Optional[_IntervalNode], key: Tuple[float, str]):
+    """_splitと同じ分割を、経路上のノードを複製して元の木を変更せずに行う"""
+    if node is None:
+        return None, None
+    node = _copy_node(node)
+    if (node.low, node.trigger_id) < key:
+        node.right, right = _split_copy(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split_copy(node.left, key)
+    _update(node)
+    return left, node
+
+
+def _merge_copy(left: Optional[_IntervalNode], right: Optional[_IntervalNode]) -> Optional[_IntervalNode]:
+    """_mergeと同じ結合を、経路上のノードを複製して元の木を変更せずに行う"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left = _copy_node(left)
+        left.right = _merge_copy(left.right, right)
+        _update(left)
+        return left
+    right = _copy_node(right)
+    right.left = _merge_copy(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove_copy(node: Optional[_IntervalNode], key: Tuple[float, str]):
+    if node is None:
+        return None, False
+    node_key = (node.low, node.trigger_id)
+    if node_key == key:
+        return _merge_copy(node.left, node.right), True
+    if key < node_key:
+        child, removed = _remove_copy(node.left, key)
+        if not removed:
+            return node, False
+        node = _copy_node(node)
+        node.left = child
+    else:
+        child, removed = _remove_copy(node.right, key)
+        if not removed:
+            return node, False
+        node = _copy_node(node)
+        node.right = child
+    _update(node)
+    return node, True
+
+
+class IntervalTree:
+    """
+    BETWEEN条件用の区間木（部分木の最大highで拡張したトリープ）
+
+    挿入・削除は期待O(log n)で、点を含む区間の列挙は
+    最大highがその点より小さい部分木とlowがその点より大きい右側を枝刈りする。
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._root: Optional[_IntervalNode] = None
+        self._rng = random.Random(seed)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, low: float, high: float, trigger_id: str) -> None:
+        """区間[low, high]を追加する"""
+        node = _IntervalNode(low, high, trigger_id, self._rng.random())
+        left, right = _split(self._root, (low, trigger_id))
+        self._root = _merge(_merge(left, node), right)
+        self._size += 1
+
+    def remove(self, low: float, trigger_id: str) -> bool:
+        """lowとトリガーIDで区間を削除する"""
+        self._root, removed = _remove(self._root, (low, trigger_id))
+        if removed:
+            self._size -= 1
+        return removed
+
+    def inserted(self, low: float, high: float, trigger_id: str) -> "IntervalTree":
+        """
+        区間[low, high]を追加した新しい木を返す（元の木は変更しない）
+
+        経路上のO(log n)個のノードだけを複製し、残りの部分木は元の木と共有する。
+        """
+        node = _IntervalNode(low, high, trigger_id, self._rng.random())
+        left, right = _split_copy(self._root, (low, trigger_id))
+        return self._derive(_merge_copy(_merge_copy(left, node), right), self._size + 1)
+
+    def removed(self, low: float, trigger_id: str) -> "IntervalTree":
+        """lowとトリガーIDで区間を削除した新しい木を返す（元の木は変更しない）"""
+        root, removed = _remove_copy(self._root, (low, trigger_id))
+        return self._derive(root, self._size - 1) if removed else self
+
+    def _derive(self, root: Optional[_IntervalNode], size: int) -> "IntervalTree":
+        tree = IntervalTree.__new__(IntervalTree)
+        tree._root = root
+        tree._rng = self._rng
+        tree._size = size
+        return tree
+
+    def stab(self, point: float) -> List[str]:
+        """
+        pointを含む区間のトリガーIDを返す
+
+        Args:
+            point: 値
+
+        Returns:
+            low <= point <= high を満たす区間のトリガーID
+        """
+        matched = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_high < point:
+                continue
+            stack.append(node.left)
+            if node.low <= point:
+                if point <= node.high:
+                    matched.append(node.trigger_id)
+                stack.append(node.right)
+        return matched
+
+
+class SortedThresholds:
+    """閾値の昇順配列とトリガーIDの並列配列"""
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def insert(self, key: float, trigger_id: str) -> None:
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.ids.insert(position, trigger_id)
+
+    def copy(self) -> "SortedThresholds":
+        clone = SortedThresholds()
+        clone.keys = self.keys.copy()
+        clone.ids = self.ids.copy()
+        return clone
+
+    def remove(self, key: float, trigger_id: str) -> bool:
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, start)
+        for position in range(start, end):
+            if self.ids[position] == trigger_id:
+                del self.keys[position]
+                del self.ids[position]
+                return True
+        return False
+
+
+class ThresholdIndex:
+    """
+    1つの(シンボル, フィールド)に対する閾値索引
+
+    GREATER_THANは閾値の昇順配列の先頭側、LESS_THANは末尾側が発火するため、
+    二分探索で境界を求めてスライスを返す。BETWEENは区間木、EQUALSはハッシュで引く。
+    いずれもO(log n + k)で発火するトリガーだけを列挙する。
+    """
+
+    def __init__(self):
+        self._above = SortedThresholds()
+        self._below = SortedThresholds()
+        self._ranges = IntervalTree()
+        self._equals: Dict[float, List[str]] = {}
+        self._entries: Dict[str, Tuple[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, trigger_id: str, operator: Any, value: Any) -> None:
+        """
+        条件を追加する（同じトリガーIDが既にある場合は置き換える）
+
+        Args:
+            trigger_id: トリガーID
+            operator: 演算子（greater_than / less_than / between / equals）
+            value: 閾値（BETWEENの場合は[low, high]）
+        """
+        operator, key = index_key(trigger_id, operator, value)
+        self.remove(trigger_id)
+        if operator == OP_GREATER_THAN:
+            self._above.insert(key, trigger_id)
+        elif operator == OP_LESS_THAN:
+            self._below.insert(key, trigger_id)
+        elif operator == OP_BETWEEN:
+            self._ranges.insert(key[0], key[1], trigger_id)
+        else:
+            self._equals.setdefault(key, []).append(trigger_id)
+        self._entries[trigger_id] = (operator, key)
+
+    def remove(self, trigger_id: str) -> bool:
+        """
+        条件を削除する
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        entry = self._entries.pop(trigger_id, None)
+        if entry is None:
+            return False
+        operator, key = entry
+        if operator == OP_GREATER_THAN:
+            self._above.remove(key, trigger_id)
+        elif operator == OP_LESS_THAN:
+            self._below.remove(key, trigger_id)
+        elif operator == OP_BETWEEN:
+            self._ranges.remove(key[0], trigger_id)
+        else:
+            ids = self._equals[key]
+            ids.remove(trigger_id)
+            if not ids:
+                del self._equals[key]
+        return True
+
+    def match(self, value: float) -> List[str]:
+        """
+        値に対して発火するトリガーIDを返す
+
+        Args:
+            value: ティックの値
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        above = self._above
+        below = self._below
+        matched = above.ids[:bisect_left(above.keys, value)]
+        matched.extend(below.ids[bisect_right(below.keys, value):])
+        if len(self._ranges):
+            matched.extend(self._ranges.stab(value))
+        if self._equals:
+            matched.extend(self._equals.get(value, ()))
+        return matched
+
+    def stats(self) -> Dict[str, int]:
+        """演算子ごとの登録数を返す"""
+        return {
+            OP_GREATER_THAN: len(self._above),
+            OP_LESS_THAN: len(self._below),
+            OP_BETWEEN: len(self._ranges),
+            OP_EQUALS: sum(len(ids) for ids in self._equals.values()),
+        }
+
+
+class TriggerIndex:
+    """
+    (シンボル, フィールド)ごとの閾値索引の集合
+
+    トリガーIDは文字列に正規化して扱う（APIのパスパラメータとモデルのIDを揃えるため）。
+    1トリガーにつき1つの条件を索引に持つ。
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], ThresholdIndex] = {}
+        self._locations: Dict[str, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, trigger_id: Any) -> bool:
+        return str(trigger_id) in self._locations
+
+    def add(self, trigger_id: Any, symbol: str, field: str, operator: Any, value: Any) -> None:
+        """
+        トリガーの条件を索引に追加する（既存の条件は置き換える）
+
+        Args:
+            trigger_id: トリガーID
+            symbol: 銘柄シンボル
+            field: フィールド名（price, volume など）
+            operator: 演算子
+            value: 閾値（BETWEENの場合は[low, high]）
+        """
+        trigger_id = str(trigger_id)
+        location = (symbol, field)
+        if self._locations.get(trigger_id) != location:
+            self.remove(trigger_id)
+        index = self._indexes.get(location)
+        if index is None:
+            index = self._indexes[location] = ThresholdIndex()
+        index.add(trigger_id, operator, value)
+        self._locations[trigger_id] = location
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーを索引から削除する
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        trigger_id = str(trigger_id)
+        location = self._locations.pop(trigger_id, None)
+        if location is None:
+            return False
+        index = self._indexes[location]
+        index.remove(trigger_id)
+        if not len(index):
+            del self._indexes[location]
+        return True
+
+    def sync_trigger(self, trigger: Any) -> bool:
+        """
+        APIのトリガー（symbol / type / condition / value を持つ）を索引に反映する
+
+        無効化されたトリガーや、状態を必要とするクロス条件は索引から外す。
+
+        Args:
+            trigger: トリガー
+
+        Returns:
+            bool: 索引に登録された場合True
+        """
+        operator = normalize_operator(trigger.condition)
+        if not trigger.is_active or operator not in (OP_GREATER_THAN, OP_LESS_THAN, OP_BETWEEN, OP_EQUALS):
+            self.remove(trigger.id)
+            return False
+        self.add(trigger.id, trigger.symbol, trigger_field(trigger), operator, trigger.value)
+        return True
+
+    def load(self, triggers: Iterable[Any]) -> int:
+        """
+        索引を空にしてから、APIのトリガーをまとめて登録する
+
+        Args:
+            triggers: トリガーのイテラブル
+
+        Returns:
+            索引に登録したトリガー数
+        """
+        self._indexes.clear()
+        self._locations.clear()
+        return sum(1 for trigger in triggers if self.sync_trigger(trigger))
+
+    def match(self, symbol: str, field: str, value: float) -> List[str]:
+        """
+        ティックに対して発火するトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            field: フィールド名
+            value: 値
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        index = self._indexes.get((symbol, field))
+        return index.match(value) if index is not None else []
+
+    def match_tick(self, symbol: str, values: Dict[str, float]) -> List[str]:
+        """
+        複数フィールドを持つティックに対して発火するトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            values: フィールド名と値の辞書
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        matched: List[str] = []
+        for field, value in values.items():
+            index = self._indexes.get((symbol, field))
+            if index is not None:
+                matched.extend(index.match(value))
+        return matched
+
+    def stats(self) -> Dict[str, int]:
+        """
+        索引の統計情報を返す
+
+        Returns:
+            トリガー数・索引数・演算子ごとの登録数
+        """
+        totals = {OP_GREATER_THAN: 0, OP_LESS_THAN: 0, OP_BETWEEN: 0, OP_EQUALS: 0}
+        for index in self._indexes.values():
+            for operator, count in index.stats().items():
+                totals[operator] += count
+        return {"triggers": len(self._locations), "indexes": len(self._indexes), **totals}
@@ -0,0 +1,166 @@
+from typing import Any, Callable, Dict, List, Optional
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+import asyncio
+import itertools
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Timer:
+    """ホイールに登録されたタイマー"""
+    timer_id: int
+    rounds: int
+    callback: Callable
+    args: tuple
+
+
+class TimerWheel:
+    """
+    asyncio上で動くハッシュ化タイマーホイール
+
+    タイマーを(期限 // tick) % slotsのスロットに積み、1つのタスクがtick秒ごとに
+    現在のスロットだけを走査して期限切れのものを発火する。登録・取消はO(1)で、
+    大量のリトライやクールダウンを個別のcall_laterなしで扱える。
+    精度はtick秒単位（期限より早く発火することはない）。
+    autostart=Falseの場合はタスクを起動せず、advance()で外部の時計に合わせて進める。
+    タイマーのあるスロットは昇順に保持し、advance()は空のスロットを飛ばして次のスロットへ進む。
+    """
+
+    def __init__(self, tick: float = 0.01, slots: int = 512, autostart: bool = True):
+        if tick <= 0:
+            raise ValueError(f"tick must be positive: {tick}")
+        if slots <= 0:
+            raise ValueError(f"slots must be positive: {slots}")
+        self.tick = tick
+        self.slots = slots
+        self.autostart = autostart
+        self._wheel: List[Dict[int, _Timer]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[int, int] = {}
+        # タイマーのあるスロット番号（昇順）
+        self._occupied: List[int] = []
+        self._ids = itertools.count(1)
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def start(self) -> None:
+        """ホイールを回すタスクを開始する（実行中のイベントループが必要）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="timer-wheel")
+
+    def stop(self) -> None:
+        """ホイールを停止する（未発火のタイマーは残り、次のscheduleで再開する）"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> int:
+        """
+        delay秒後にcallback(*args)を呼び出すよう登録する
+
+        Args:
+            delay: 遅延（秒）
+            callback: 呼び出す関数（イベントループ上で同期的に呼ばれる）
+            *args: 関数の引数
+
+        Returns:
+            取消に使うタイマーID
+        """
+        if self.autostart:
+            self.start()
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        timer_id = next(self._ids)
+        if not self._wheel[slot]:
+            insort(self._occupied, slot)
+        self._wheel[slot][timer_id] = _Timer(timer_id, (ticks - 1) // self.slots, callback, args)
+        self._slot_of[timer_id] = slot
+        return timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        """
+        タイマーを取り消す
+
+        Args:
+            timer_id: scheduleが返したID
+
+        Returns:
+            bool: 取り消した場合True
+        """
+        slot = self._slot_of.pop(timer_id, None)
+        if slot is None:
+            return False
+        del self._wheel[slot][timer_id]
+        if not self._wheel[slot]:
+            self._vacate(slot)
+        return True
+
+    def _vacate(self, slot: int) -> None:
+        """空になったスロットをタイマーのあるスロットから外す"""
+        del self._occupied[bisect_left(self._occupied, slot)]
+
+    def _next_occupied(self) -> int:
+        """現在位置から次のタイマーのあるスロットまでのtick数（1〜slots）を返す"""
+        occupied = self._occupied
+        position = bisect_right(occupied, self._cursor)
+        slot = occupied[position] if position < len(occupied) else occupied[0]
+        return (slot - self._cursor - 1) % self.slots + 1
+
+    def advance(self, ticks: int = 1) -> None:
+        """
+        ホイールを手動でticks分進める（空のスロットは飛ばす）
+
+        Args:
+            ticks: 進めるtick数
+        """
+        while ticks > 0 and self._occupied:
+            step = self._next_occupied()
+            if step > ticks:
+                break
+            # 次のタイマーのあるスロットの直前まで位置だけ進め、そのスロットを処理する
+            self._cursor = (self._cursor + step - 1) % self.slots
+            self._advance()
+            ticks -= step
+        # 残りは空のスロットだけなので位置だけ合わせる
+        self._cursor = (self._cursor + ticks) % self.slots
+
+    def _advance(self) -> None:
+        """1tick進めて現在のスロットの期限切れタイマーを発火する"""
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        if not bucket:
+            return
+        expired = []
+        for timer in bucket.values():
+            if timer.rounds > 0:
+                timer.rounds -= 1
+            else:
+                expired.append(timer)
+        for timer in expired:
+            del bucket[timer.timer_id]
+            del self._slot_of[timer.timer_id]
+        if not bucket:
+            self._vacate(self._cursor)
+        for timer in expired:
+            self.fired += 1
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.error(f"Timer callback failed: {str(e)}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # 処理が遅れた場合は遅れた分のtickをまとめて進める
+            while next_tick <= loop.time():
+                self._advance()
+                next_tick += self.tick
@@ -0,0 +1,210 @@
+from typing import Any, Callable, Dict, Optional
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+import functools
+import itertools
+import threading
+import time
+import numpy as np
+
+# スパンを保持するリングバッファの既定サイズ
+DEFAULT_CAPACITY = 1 << 16
+
+# 代表的なステージ名
+STAGE_DISPATCH = "dispatch"
+STAGE_HANDLER = "handler"
+STAGE_EFFECT_ENGINE = "effect_engine"
+STAGE_MINECRAFT_SEND = "minecraft_send"
+STAGE_END_TO_END = "end_to_end"
+
+SPAN_DTYPE = np.dtype([
+    ("trace_id", np.int64),
+    ("stage", np.int16),
+    ("start_ns", np.int64),
+    ("end_ns", np.int64),
+])
+
+
+@dataclass(frozen=True)
+class TraceContext:
+    """イベント1件分のトレース情報（contextvarsでハンドラーや送信処理まで引き継ぐ）"""
+    trace_id: int
+    ingress_ns: int
+    event_type: str
+
+
+# 現在処理中のイベントのトレース（タスクやcopy_context経由でスレッドにも伝播する）
+current_trace: ContextVar[Optional[TraceContext]] = ContextVar("current_trace", default=None)
+
+
+class SpanRecorder:
+    """
+    事前確保したリングバッファにスパンを記録するレコーダ
+
+    書き込み位置の払い出しとスロットへの書き込みは1つのロックの中で行うため、
+    snapshot()が払い出し済みで未書き込みのスロットを読むことはない。古いスパンは上書きされる。
+    新しいステージ名への番号の割り当ては別のロックで行う。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._spans = np.zeros(capacity, dtype=SPAN_DTYPE)
+        self._written = 0
+        self._lock = threading.Lock()
+        self._trace_ids = itertools.count(1)
+        self._stages: Dict[str, int] = {}
+        self._stage_names: Dict[int, str] = {}
+        self._stage_lock = threading.Lock()
+
+    def new_trace(self, ingress_ns: int, event_type: str) -> TraceContext:
+        """新しいトレースを払い出す"""
+        return TraceContext(next(self._trace_ids), ingress_ns, event_type)
+
+    def _stage_code(self, stage: str) -> int:
+        code = self._stages.get(stage)
+        if code is None:
+            # 別スレッドが同時に別のステージを登録しても同じ番号にならないようにする
+            with self._stage_lock:
+                code = self._stages.get(stage)
+                if code is None:
+                    code = len(self._stages)
+                    self._stage_names[code] = stage
+                    self._stages[stage] = code
+        return code
+
+    def record(self, stage: str, start_ns: int, end_ns: int, trace_id: int = 0) -> None:
+        """
+        スパンを記録する
+
+        Args:
+            stage: ステージ名
+            start_ns: 開始時刻（time.monotonic_ns）
+            end_ns: 終了時刻（time.monotonic_ns）
+            trace_id: トレースID（0はトレース外）
+        """
+        code = self._stage_code(stage)
+        with self._lock:
+            self._spans[self._written % self.capacity] = (trace_id, code, start_ns, end_ns)
+            self._written += 1
+
+    def span(self, stage: str) -> "_Span":
+        """現在のトレースにスパンを記録するコンテキストマネージャを返す"""
+        return _Span(self, stage)
+
+    def snapshot(self) -> np.ndarray:
+        """記録済みのスパンを古い順にコピーして返す"""
+        with self._lock:
+            written = self._written
+            if written <= self.capacity:
+                return self._spans[:written].copy()
+            head = written % self.capacity
+            return np.concatenate([self._spans[head:], self._spans[:head]])
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        ステージごとの所要時間のパーセンタイルを返す
+
+        Returns:
+            ステージ名をキーに件数とp50/p95/p99/最大値（ミリ秒）を持つ辞書
+        """
+        spans = self.snapshot()
+        durations = (spans["end_ns"] - spans["start_ns"]) / 1e6
+        stats: Dict[str, Dict[str, float]] = {}
+        for code, stage in list(self._stage_names.items()):
+            values = durations[spans["stage"] == code]
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[stage] = {
+                "count": int(len(values)),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return stats
+
+    def export(self, path: Path) -> Path:
+        """
+        記録済みのスパンをCSVに書き出す（オフライン分析用）
+
+        Args:
+            path: 出力先のファイルパス
+
+        Returns:
+            書き出したファイルのパス
+        """
+        path = Path(path)
+        spans = self.snapshot()
+        names = np.array([self._stage_names.get(code, "") for code in range(len(self._stages))] or [""])
+        with open(path, "w") as f:
+            f.write("trace_id,stage,start_ns,end_ns,duration_ns\n")
+            for trace_id, stage, start_ns, end_ns in zip(
+                spans["trace_id"], names[spans["stage"]], spans["start_ns"], spans["end_ns"]
+            ):
+                f.write(f"{trace_id},{stage},{start_ns},{end_ns},{end_ns - start_ns}\n")
+        return path
+
+    def clear(self) -> None:
+        """記録済みのスパンを破棄する"""
+        with self._lock:
+            self._written = 0
+
+
+class _Span:
+    """SpanRecorder.spanが返すコンテキストマネージャ（トレース外では何も記録しない）"""
+
+    __slots__ = ("_recorder", "_stage", "_trace", "_start")
+
+    def __init__(self, recorder: SpanRecorder, stage: str):
+        self._recorder = recorder
+        self._stage = stage
+
+    def __enter__(self) -> "_Span":
+        self._trace = current_trace.get()
+        self._start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._trace is not None:
+            self._recorder.record(
+                self._stage, self._start, time.monotonic_ns(), self._trace.trace_id
+            )
+
+
+# アプリケーション全体で共有するレコーダ
+tracer = SpanRecorder()
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """
+    関数の実行をスパンとして記録するデコレータ（同期・非同期関数の両方に対応）
+
+    Args:
+        stage: ステージ名
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_end_to_end() -> None:
+    """現在のトレースについてイベント取り込みから現時点までをスパンとして記録する"""
+    trace = current_trace.get()
+    if trace is not None:
+        tracer.record(STAGE_END_TO_END, trace.ingress_ns, time.monotonic_ns(), trace.trace_id)
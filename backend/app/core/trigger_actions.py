@@ -0,0 +1,143 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+
+from app.core.action_dispatcher import ActionDispatcher
+from app.core.event_system import EventSystem, event_system
+from app.models.trigger import TriggerAction
+
+logger = logging.getLogger(__name__)
+
+
+def trigger_actions(trigger: Any) -> List[TriggerAction]:
+    """
+    トリガーに設定されたアクションを返す
+
+    models.trigger.Triggerはactionsを、APIのトリガーはparameters["actions"]
+    （TriggerActionと同じ形の辞書のリスト）を参照する。
+
+    Args:
+        trigger: アクションを持つトリガー
+
+    Returns:
+        TriggerActionのリスト
+    """
+    actions = getattr(trigger, "actions", None)
+    if actions is None:
+        actions = (getattr(trigger, "parameters", None) or {}).get("actions", [])
+    return [TriggerAction.parse_obj(action) if isinstance(action, dict) else action for action in actions]
+
+
+class TriggerActionRunner:
+    """
+    発火したトリガーのアクションを実行する
+
+    アクションはEventSystem.execute_actionを通してActionDispatcher.dispatchで送るため、
+    TriggerAction.priorityの優先度レーンで順番が決まり、失敗時はretry_count回までリトライされる。
+    発火はイベントループ上の同期処理から呼ばれるため、送信はタスクとして投入して待たない。
+    """
+
+    def __init__(
+        self,
+        dispatcher: Optional[ActionDispatcher] = None,
+        system: Optional[EventSystem] = None
+    ):
+        self.dispatcher = dispatcher if dispatcher is not None else ActionDispatcher()
+        self.system = system if system is not None else event_system
+        self._actions: Dict[str, List[TriggerAction]] = {}
+        # 実行中のタスク（参照を保持しないと完了前に回収されることがある）
+        self._tasks: Set[asyncio.Task] = set()
+        self.scheduled = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+    def sync_trigger(self, trigger: Any) -> int:
+        """
+        トリガーのアクションを登録する（無効化されたトリガーやアクションが無いトリガーは外す）
+
+        Args:
+            trigger: id / is_active とアクションを持つトリガー
+
+        Returns:
+            登録したアクション数
+        """
+        actions = trigger_actions(trigger) if trigger.is_active else []
+        if not actions:
+            self._actions.pop(str(trigger.id), None)
+            return 0
+        self._actions[str(trigger.id)] = actions
+        return len(actions)
+
+    def load_triggers(self, triggers: Iterable[Any]) -> int:
+        """
+        起動時に全トリガーのアクションを登録する
+
+        Args:
+            triggers: 保存済みのトリガー
+
+        Returns:
+            アクションを登録したトリガー数
+        """
+        return sum(1 for trigger in triggers if self.sync_trigger(trigger))
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーのアクションを外す
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 外した場合True
+        """
+        return self._actions.pop(str(trigger_id), None) is not None
+
+    def fire(self, trigger_id: Any, payload: Dict[str, Any]) -> List[asyncio.Task]:
+        """
+        トリガーのアクションを優先度付きで実行に投入する
+
+        Args:
+            trigger_id: 発火したトリガーのID
+            payload: アクションで送る内容
+
+        Returns:
+            投入したタスクのリスト
+        """
+        loop = asyncio.get_running_loop()
+        tasks = []
+        for action in self._actions.get(str(trigger_id), []):
+            task = loop.create_task(
+                self.system.execute_action(action, self.dispatcher.dispatch, action, payload)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._on_done)
+            tasks.append(task)
+        self.scheduled += len(tasks)
+        return tasks
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        """完了したタスクを外す（失敗はexecute_actionがログとデッドレターに残している）"""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+
+    async def drain(self) -> None:
+        """実行中のアクションが全て終わるまで待つ"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        統計情報を返す
+
+        Returns:
+            アクションを持つトリガー数・投入数・失敗数・実行中の数
+        """
+        return {
+            "triggers": len(self._actions),
+            "scheduled": self.scheduled,
+            "failed": self.failed,
+            "running": len(self._tasks),
+        }
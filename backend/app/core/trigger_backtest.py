@@ -0,0 +1,322 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+import json
+import logging
+import mmap
+import time
+
+import numpy as np
+
+from app.core.threshold_index import trigger_field
+from app.core.trigger_matcher import TriggerMatcher
+
+logger = logging.getLogger(__name__)
+
+# 列指向ファイルのメタデータと固定列の名前
+COLUMNAR_META = "meta.json"
+TIMESTAMP_COLUMN = "timestamp"
+SYMBOL_COLUMN = "symbol"
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_MAX_TIMESTAMPS = 1000
+
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_HOUR = 3600 * _NS_PER_SECOND
+
+# (タイムスタンプ[ns], 銘柄, フィールド名, 値)の塊
+TickChunk = Tuple[np.ndarray, List[str], Dict[str, np.ndarray]]
+
+
+@dataclass
+class BacktestResult:
+    """バックテストの結果"""
+    ticks: int = 0
+    fires: Dict[str, int] = field(default_factory=dict)
+    fire_times: Dict[str, List[datetime]] = field(default_factory=dict)
+    actions_per_hour: Dict[datetime, int] = field(default_factory=dict)
+    first_tick: Optional[datetime] = None
+    last_tick: Optional[datetime] = None
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """レスポンス用の辞書に変換する"""
+        return {
+            "ticks": self.ticks,
+            "fires": self.fires,
+            "fire_times": {
+                trigger_id: [t.isoformat() for t in times]
+                for trigger_id, times in self.fire_times.items()
+            },
+            "actions_per_hour": {hour.isoformat(): count for hour, count in self.actions_per_hour.items()},
+            "first_tick": self.first_tick.isoformat() if self.first_tick else None,
+            "last_tick": self.last_tick.isoformat() if self.last_tick else None,
+            "elapsed": self.elapsed,
+        }
+
+
+def _to_datetime(ns: int) -> datetime:
+    return datetime.fromtimestamp(ns / _NS_PER_SECOND, tz=timezone.utc)
+
+
+def _parse_timestamp(text: str) -> int:
+    """CSVのタイムスタンプ（UNIX秒またはISO 8601）をナノ秒に変換する"""
+    try:
+        return int(float(text) * _NS_PER_SECOND)
+    except ValueError:
+        moment = datetime.fromisoformat(text)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp() * _NS_PER_SECOND)
+
+
+def iter_csv_ticks(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    symbols: Optional[Set[str]] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Iterator[TickChunk]:
+    """
+    CSVのティックをメモリマップで読み、塊ごとに返す
+
+    1行目はヘッダー（timestamp,symbol,フィールド名...）とする。
+    対象外の銘柄の行は数値に変換する前に読み飛ばす。
+
+    Args:
+        path: CSVファイル
+        chunk_size: 1塊あたりの行数
+        symbols: 対象の銘柄（Noneの場合は全て）
+        fields: 読み込むフィールド（Noneの場合は全て）
+
+    Returns:
+        ティックの塊のイテレータ
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header = mm.readline().decode().strip().split(",")
+        if header[:2] != [TIMESTAMP_COLUMN, SYMBOL_COLUMN]:
+            raise ValueError(f"CSV header must start with timestamp,symbol: {header}")
+        names = header[2:]
+        wanted = [(i + 2, name) for i, name in enumerate(names) if fields is None or name in fields]
+
+        timestamps: List[int] = []
+        chunk_symbols: List[str] = []
+        values: Dict[str, List[float]] = {name: [] for _, name in wanted}
+        for line in iter(mm.readline, b""):
+            columns = line.decode().rstrip("\r\n").split(",")
+            if len(columns) < 2 or (symbols is not None and columns[1] not in symbols):
+                continue
+            timestamps.append(_parse_timestamp(columns[0]))
+            chunk_symbols.append(columns[1])
+            for position, name in wanted:
+                text = columns[position] if position < len(columns) else ""
+                values[name].append(float(text) if text else np.nan)
+            if len(timestamps) >= chunk_size:
+                yield np.array(timestamps, dtype=np.int64), chunk_symbols, {
+                    name: np.array(column) for name, column in values.items()
+                }
+                timestamps, chunk_symbols = [], []
+                values = {name: [] for _, name in wanted}
+        if timestamps:
+            yield np.array(timestamps, dtype=np.int64), chunk_symbols, {
+                name: np.array(column) for name, column in values.items()
+            }
+
+
+def iter_columnar_ticks(
+    directory: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    symbols: Optional[Set[str]] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Iterator[TickChunk]:
+    """
+    列指向のティックファイルをメモリマップで読み、塊ごとに返す
+
+    ディレクトリにはmeta.json（銘柄名とフィールド名）と、列ごとの.npy
+    （timestamp: int64ナノ秒、symbol: int32銘柄番号、各フィールド: float64）を置く。
+    対象外の銘柄の行は塊ごとにベクトル演算で除く。
+
+    Args:
+        directory: 列指向ファイルのディレクトリ
+        chunk_size: 1塊あたりの行数
+        symbols: 対象の銘柄（Noneの場合は全て）
+        fields: 読み込むフィールド（Noneの場合は全て）
+
+    Returns:
+        ティックの塊のイテレータ
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / COLUMNAR_META).read_text())
+    names: List[str] = meta["symbols"]
+    field_names = [name for name in meta["fields"] if fields is None or name in fields]
+    timestamps = np.load(directory / f"{TIMESTAMP_COLUMN}.npy", mmap_mode="r")
+    symbol_ids = np.load(directory / f"{SYMBOL_COLUMN}.npy", mmap_mode="r")
+    columns = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in field_names}
+    wanted = None
+    if symbols is not None:
+        wanted = np.array([i for i, name in enumerate(names) if name in symbols], dtype=np.int32)
+
+    for start in range(0, len(timestamps), chunk_size):
+        end = start + chunk_size
+        ids = np.asarray(symbol_ids[start:end])
+        if wanted is not None:
+            rows = np.flatnonzero(np.isin(ids, wanted))
+            if not len(rows):
+                continue
+            ids = ids[rows]
+            yield (
+                np.asarray(timestamps[start:end])[rows],
+                [names[i] for i in ids.tolist()],
+                {name: np.asarray(column[start:end])[rows] for name, column in columns.items()},
+            )
+        else:
+            yield (
+                np.asarray(timestamps[start:end]),
+                [names[i] for i in ids.tolist()],
+                {name: np.asarray(column[start:end]) for name, column in columns.items()},
+            )
+
+
+def convert_csv_to_columnar(
+    csv_path: Union[str, Path],
+    directory: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """
+    CSVのティックを列指向ファイルに変換する（2回走査して行数を数えてから書き込む）
+
+    Args:
+        csv_path: 変換元のCSV
+        directory: 出力先ディレクトリ
+        chunk_size: 1塊あたりの行数
+
+    Returns:
+        書き込んだ行数
+    """
+    rows = 0
+    symbol_ids: Dict[str, int] = {}
+    field_names: List[str] = []
+    for timestamps, chunk_symbols, values in iter_csv_ticks(csv_path, chunk_size):
+        rows += len(timestamps)
+        field_names = list(values)
+        for symbol in chunk_symbols:
+            symbol_ids.setdefault(symbol, len(symbol_ids))
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    open_memmap = np.lib.format.open_memmap
+    out_timestamps = open_memmap(directory / f"{TIMESTAMP_COLUMN}.npy", mode="w+", dtype=np.int64, shape=(rows,))
+    out_symbols = open_memmap(directory / f"{SYMBOL_COLUMN}.npy", mode="w+", dtype=np.int32, shape=(rows,))
+    out_fields = {
+        name: open_memmap(directory / f"{name}.npy", mode="w+", dtype=np.float64, shape=(rows,))
+        for name in field_names
+    }
+    position = 0
+    for timestamps, chunk_symbols, values in iter_csv_ticks(csv_path, chunk_size):
+        end = position + len(timestamps)
+        out_timestamps[position:end] = timestamps
+        out_symbols[position:end] = [symbol_ids[symbol] for symbol in chunk_symbols]
+        for name, column in values.items():
+            out_fields[name][position:end] = column
+        position = end
+    for column in (out_timestamps, out_symbols, *out_fields.values()):
+        column.flush()
+    (directory / COLUMNAR_META).write_text(json.dumps({"symbols": list(symbol_ids), "fields": field_names}))
+    logger.info(f"Converted {rows} ticks from {csv_path} to {directory}")
+    return rows
+
+
+def _backtest_trigger(trigger: Any, index: int) -> Any:
+    """
+    バックテスト用にトリガーを写す
+
+    有効化前のトリガーも評価できるよう常に有効とし、IDの無いトリガー（TriggerCreate）には連番を振る。
+    """
+    trigger_id = getattr(trigger, "id", None)
+    return SimpleNamespace(
+        id=str(index) if trigger_id is None else str(trigger_id),
+        symbol=trigger.symbol,
+        type=trigger.type,
+        condition=trigger.condition,
+        value=trigger.value,
+        parameters=trigger.parameters,
+        is_active=True,
+    )
+
+
+def run_backtest(
+    triggers: Sequence[Any],
+    source: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_timestamps: int = DEFAULT_MAX_TIMESTAMPS,
+    matcher: Optional[TriggerMatcher] = None
+) -> BacktestResult:
+    """
+    過去のティックでトリガーがどれだけ発火したかを求める
+
+    本番と同じTriggerMatcherにティックを時系列順に流す（クールダウン等はティックの時刻で判定する）。
+    入力は塊ごとに読むため、
+    ファイル全体がメモリに載る必要はない。
+
+    Args:
+        triggers: 評価するトリガー（Trigger / TriggerCreate）
+        source: CSVファイル、または列指向ファイルのディレクトリ
+        chunk_size: 1塊あたりの行数
+        max_timestamps: トリガーごとに記録する発火時刻の上限
+        matcher: 使用するマッチャー（省略時は新規作成）
+
+    Returns:
+        発火回数・発火時刻・1時間ごとのアクション数
+    """
+    started = time.perf_counter()
+    matcher = matcher if matcher is not None else TriggerMatcher()
+    actions: Dict[str, int] = {}
+    for i, trigger in enumerate(triggers):
+        copy = _backtest_trigger(trigger, i)
+        matcher.sync_trigger(copy)
+        actions[copy.id] = len(getattr(trigger, "actions", None) or ()) or 1
+    symbols = {trigger.symbol for trigger in triggers}
+    fields = sorted({trigger_field(trigger) for trigger in triggers})
+
+    source = Path(source)
+    reader = iter_columnar_ticks if source.is_dir() else iter_csv_ticks
+    result = BacktestResult(fires={trigger_id: 0 for trigger_id in actions})
+    fire_times: Dict[str, List[int]] = defaultdict(list)
+    hours: Counter = Counter()
+    first_ns: Optional[int] = None
+    last_ns: Optional[int] = None
+
+    on_tick = matcher.on_tick
+    for timestamps, chunk_symbols, values in reader(source, chunk_size, symbols, fields):
+        if not len(timestamps):
+            continue
+        if first_ns is None:
+            first_ns = int(timestamps[0])
+        last_ns = int(timestamps[-1])
+        result.ticks += len(timestamps)
+        columns = [(name, column.tolist()) for name, column in values.items()]
+        for row, (ns, symbol) in enumerate(zip(timestamps.tolist(), chunk_symbols)):
+            tick = {name: column[row] for name, column in columns if column[row] == column[row]}
+            for trigger_id in on_tick(symbol, tick, ns / _NS_PER_SECOND):
+                result.fires[trigger_id] += 1
+                times = fire_times[trigger_id]
+                if len(times) < max_timestamps:
+                    times.append(ns)
+                hours[ns // _NS_PER_HOUR] += actions[trigger_id]
+
+    result.fire_times = {
+        trigger_id: [_to_datetime(ns) for ns in times] for trigger_id, times in fire_times.items()
+    }
+    result.actions_per_hour = {
+        _to_datetime(hour * _NS_PER_HOUR): count for hour, count in sorted(hours.items())
+    }
+    result.first_tick = _to_datetime(first_ns) if first_ns is not None else None
+    result.last_tick = _to_datetime(last_ns) if last_ns is not None else None
+    result.elapsed = time.perf_counter() - started
+    logger.info(
+        f"Backtested {len(triggers)} triggers over {result.ticks} ticks "
+        f"in {result.elapsed:.2f}s ({sum(result.fires.values())} fires)"
+    )
+    return result
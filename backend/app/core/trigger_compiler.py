@@ -0,0 +1,231 @@
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple
+from dataclasses import dataclass
+import logging
+
+from app.core.effect_cache import EffectTemplateCache
+from app.models.trigger import ConditionOperator, EventCondition, Trigger
+
+logger = logging.getLogger(__name__)
+
+# 演算子ごとの評価コストと、条件を満たす割合の目安（評価順の決定に使う）
+OPERATOR_COST = {
+    ConditionOperator.EQUALS: 1.0,
+    ConditionOperator.GREATER_THAN: 1.0,
+    ConditionOperator.LESS_THAN: 1.0,
+    ConditionOperator.BETWEEN: 1.5,
+    ConditionOperator.CONTAINS: 3.0,
+}
+OPERATOR_SELECTIVITY = {
+    ConditionOperator.EQUALS: 0.1,
+    ConditionOperator.GREATER_THAN: 0.5,
+    ConditionOperator.LESS_THAN: 0.5,
+    ConditionOperator.BETWEEN: 0.3,
+    ConditionOperator.CONTAINS: 0.3,
+}
+
+# ネストしたフィールドの1階層あたりの追加コスト
+FIELD_DEPTH_COST = 0.5
+
+@dataclass
+class CompiledTrigger:
+    """コンパイル済みの条件評価関数"""
+    evaluate: Callable[[Dict[str, Any]], bool]
+    source: str
+    order: Tuple[int, ...]
+
+    def __call__(self, data: Dict[str, Any]) -> bool:
+        return self.evaluate(data)
+
+
+def _field_path(field: str) -> Tuple[str, ...]:
+    """"indicators.rsi" のようなドット区切りのフィールド名を分解する"""
+    return tuple(field.split("."))
+
+
+def _condition_rank(condition: EventCondition) -> float:
+    """
+    評価順の優先度を返す（小さいほど先に評価する）
+
+    AND条件では「偽になりやすく安い」条件を先に評価すると平均コストが最小になるため、
+    コスト / (1 - 選択率) の昇順に並べる。additional_paramsのselectivityで上書きできる。
+    """
+    params = condition.additional_params or {}
+    selectivity = params.get("selectivity", OPERATOR_SELECTIVITY[condition.operator])
+    cost = OPERATOR_COST[condition.operator] + FIELD_DEPTH_COST * (len(_field_path(condition.field)) - 1)
+    return cost / max(1e-6, 1.0 - selectivity)
+
+
+def _numeric(value: Any) -> Any:
+    """数値比較の定数をコンパイル時にfloatへ変換する（変換できない場合はそのまま）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def compile_conditions(conditions: Sequence[EventCondition]) -> CompiledTrigger:
+    """
+    条件リストを専用の評価関数にコンパイルする
+
+    フィールドの取り出しと定数の変換はコンパイル時に済ませ、条件は
+    安く偽になりやすいものから順に評価して最初の偽で打ち切る。
+    同じフィールドは1回だけ取り出す。フィールドが無い場合や型が合わない場合は偽とする。
+
+    Args:
+        conditions: AND結合する条件のリスト
+
+    Returns:
+        コンパイル済みの評価関数
+    """
+    order = tuple(sorted(range(len(conditions)), key=lambda i: _condition_rank(conditions[i])))
+    namespace: Dict[str, Any] = {}
+    fields: Dict[Tuple[str, ...], str] = {}
+    lines = ["def evaluate(data):", "    try:"]
+
+    for position, index in enumerate(order):
+        condition = conditions[index]
+        path = _field_path(condition.field)
+        var = fields.get(path)
+        if var is None:
+            var = fields[path] = f"v{len(fields)}"
+            accessor = "data" + "".join(f"[{part!r}]" for part in path)
+            lines.append(f"        {var} = {accessor}")
+
+        const = f"c{position}"
+        operator = condition.operator
+        value = condition.value
+        params = condition.additional_params or {}
+
+        if operator == ConditionOperator.EQUALS:
+            tolerance = params.get("tolerance")
+            if tolerance is not None:
+                namespace[const] = _numeric(value)
+                namespace[f"{const}_tol"] = float(tolerance)
+                test = f"abs({var} - {const}) <= {const}_tol"
+            else:
+                namespace[const] = value
+                test = f"{var} == {const}"
+        elif operator == ConditionOperator.GREATER_THAN:
+            namespace[const] = _numeric(value)
+            test = f"{var} > {const}"
+        elif operator == ConditionOperator.LESS_THAN:
+            namespace[const] = _numeric(value)
+            test = f"{var} < {const}"
+        elif operator == ConditionOperator.BETWEEN:
+            low, high = value
+            namespace[f"{const}_low"] = _numeric(low)
+            namespace[f"{const}_high"] = _numeric(high)
+            test = f"{const}_low <= {var} <= {const}_high"
+        elif operator == ConditionOperator.CONTAINS:
+            namespace[const] = value
+            test = f"{const} in {var}"
+        else:
+            raise ValueError(f"Unsupported operator: {operator}")
+        lines.append(f"        if not ({test}):")
+        lines.append("            return False")
+
+    lines.append("        return True")
+    lines.append("    except (KeyError, IndexError, TypeError):")
+    lines.append("        return False")
+    source = "\n".join(lines)
+    exec(compile(source, "<trigger>", "exec"), namespace)
+    return CompiledTrigger(namespace["evaluate"], source, order)
+
+
+def interpret_conditions(conditions: Sequence[EventCondition], data: Dict[str, Any]) -> bool:
+    """
+    条件リストを逐次解釈して評価する（コンパイル結果の検証とベンチマーク用）
+
+    Args:
+        conditions: AND結合する条件のリスト
+        data: 評価対象のデータ
+
+    Returns:
+        bool: 全ての条件を満たす場合True
+    """
+    for condition in conditions:
+        try:
+            value = data
+            for part in condition.field.split("."):
+                value = value[part]
+            params = condition.additional_params or {}
+            if condition.operator == ConditionOperator.EQUALS:
+                if params.get("tolerance") is not None:
+                    ok = abs(value - float(condition.value)) <= float(params["tolerance"])
+                else:
+                    ok = value == condition.value
+            elif condition.operator == ConditionOperator.GREATER_THAN:
+                ok = value > _numeric(condition.value)
+            elif condition.operator == ConditionOperator.LESS_THAN:
+                ok = value < _numeric(condition.value)
+            elif condition.operator == ConditionOperator.BETWEEN:
+                ok = _numeric(condition.value[0]) <= value <= _numeric(condition.value[1])
+            elif condition.operator == ConditionOperator.CONTAINS:
+                ok = condition.value in value
+            else:
+                ok = False
+        except (KeyError, IndexError, TypeError):
+            return False
+        if not ok:
+            return False
+    return True
+
+
+def trigger_cache_key(trigger: Trigger) -> Hashable:
+    """
+    トリガーのキャッシュキー（IDとバージョン）を返す
+
+    バージョンにはupdated_at（未更新の場合はcreated_at）を使う。
+    IDが無いトリガーは条件の内容そのものをキーにする。
+    """
+    if trigger.id is not None:
+        return (trigger.id, trigger.updated_at or trigger.created_at)
+    return tuple(
+        (c.field, c.operator, repr(c.value), repr(sorted((c.additional_params or {}).items())))
+        for c in trigger.conditions
+    )
+
+
+class TriggerEvaluator:
+    """コンパイル済み評価関数をトリガーのバージョンごとにキャッシュする評価器"""
+
+    def __init__(self, cache_size: int = 16384):
+        self._cache = EffectTemplateCache(cache_size)
+
+    def get(self, trigger: Trigger) -> CompiledTrigger:
+        """トリガーのコンパイル済み評価関数を返す（キャッシュに無ければコンパイルする）"""
+        return self._cache.get_or_create(
+            trigger_cache_key(trigger),
+            lambda: compile_conditions(trigger.conditions)
+        )
+
+    def evaluate(self, trigger: Trigger, data: Dict[str, Any]) -> bool:
+        """
+        トリガーの条件を評価する
+
+        Args:
+            trigger: 評価するトリガー
+            data: 評価対象のデータ（イベントのペイロード）
+
+        Returns:
+            bool: 条件を満たす場合True
+        """
+        return self.get(trigger)(data)
+
+    def matching(self, triggers: Sequence[Trigger], data: Dict[str, Any]) -> List[Trigger]:
+        """
+        データに一致する有効なトリガーを返す
+
+        Args:
+            triggers: 評価するトリガーのリスト
+            data: 評価対象のデータ
+
+        Returns:
+            条件を満たしたトリガーのリスト
+        """
+        return [trigger for trigger in triggers if trigger.is_active and self.get(trigger)(data)]
+
+    def cache_info(self) -> Dict[str, int]:
+        """キャッシュの統計情報を返す"""
+        return self._cache.info()
+
@@ -0,0 +1,315 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass
+import logging
+import math
+
+from app.core.threshold_index import (
+    OP_BETWEEN,
+    OP_EQUALS,
+    OP_GREATER_THAN,
+    OP_LESS_THAN,
+    SortedThresholds,
+    normalize_operator,
+    trigger_field,
+)
+from app.core.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# 発火を抑止した理由
+SUPPRESSED_DISARMED = "disarmed"
+SUPPRESSED_COOLDOWN = "cooldown"
+SUPPRESSED_USER_RATE = "user_rate"
+
+
+@dataclass(frozen=True)
+class FiringPolicy:
+    """マッチャー全体の発火制御の既定値"""
+    cooldown: Optional[float] = None         # 発火後に同じトリガーを抑止する時間（秒）
+    hysteresis: Optional[float] = None       # 再び発火可能になるまでに値が戻るべき幅
+    user_rate_limit: Optional[int] = None    # ユーザーごとの発火数の上限
+    user_rate_window: float = 60.0           # 上限を数える時間窓（秒）
+    tick: float = 0.1                        # タイマーホイールの刻み（秒）
+
+
+@dataclass(frozen=True)
+class FiringRule:
+    """トリガー1つ分の発火制御"""
+    trigger_id: str
+    symbol: str
+    field: str
+    operator: str
+    value: Any
+    cooldown: Optional[float]
+    hysteresis: Optional[float]
+    user_id: Optional[str]
+
+    def rearm_levels(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        再び発火可能になる値の境界を返す
+
+        Returns:
+            (値がこれ以下で戻る境界, 値がこれ以上で戻る境界)。該当しない側はNone
+            （厳密な不等号は隣の浮動小数点数に置き換えて閉じた境界にする）
+        """
+        margin = self.hysteresis
+        operator = self.operator
+        if operator in (OP_GREATER_THAN, "crosses_above"):
+            return self.value - margin, None
+        if operator in (OP_LESS_THAN, "crosses_below"):
+            return None, self.value + margin
+        if operator == OP_BETWEEN:
+            low, high = self.value
+        elif operator == OP_EQUALS:
+            low = high = self.value
+        else:
+            # 未知の演算子は次のティックで戻す
+            return math.inf, None
+        return math.nextafter(low - margin, -math.inf), math.nextafter(high + margin, math.inf)
+
+
+class DisarmedTriggers:
+    """
+    (銘柄, フィールド)ごとのヒステリシスで止めているトリガー
+
+    戻る境界を下向き（値が境界以下で戻る）と上向き（値が境界以上で戻る）の昇順配列に分けて持ち、
+    ティックの値で二分探索して戻るトリガーだけを取り出す。
+    """
+    __slots__ = ("below", "above", "levels")
+
+    def __init__(self):
+        self.below = SortedThresholds()
+        self.above = SortedThresholds()
+        self.levels: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def __contains__(self, trigger_id: str) -> bool:
+        return trigger_id in self.levels
+
+    def add(self, trigger_id: str, below: Optional[float], above: Optional[float]) -> None:
+        self.discard(trigger_id)
+        self.levels[trigger_id] = (below, above)
+        if below is not None:
+            self.below.insert(below, trigger_id)
+        if above is not None:
+            self.above.insert(above, trigger_id)
+
+    def discard(self, trigger_id: str) -> bool:
+        levels = self.levels.pop(trigger_id, None)
+        if levels is None:
+            return False
+        below, above = levels
+        if below is not None:
+            self.below.remove(below, trigger_id)
+        if above is not None:
+            self.above.remove(above, trigger_id)
+        return True
+
+    def rearm(self, value: float) -> List[str]:
+        """
+        値valueで戻るトリガーを外して返す
+
+        Args:
+            value: ティックの値
+
+        Returns:
+            再び発火可能になったトリガーIDのリスト
+        """
+        below = self.below
+        start = bisect_left(below.keys, value)
+        rearmed = below.ids[start:]
+        del below.keys[start:]
+        del below.ids[start:]
+
+        above = self.above
+        end = bisect_right(above.keys, value)
+        rearmed.extend(above.ids[:end])
+        del above.keys[:end]
+        del above.ids[:end]
+
+        # 下向きの境界は上向きの境界より小さいため、取り出したのと反対側の配列からだけ外す
+        for trigger_id in rearmed:
+            low, high = self.levels.pop(trigger_id)
+            if low is not None and low < value:
+                below.remove(low, trigger_id)
+            if high is not None and high > value:
+                above.remove(high, trigger_id)
+        return rearmed
+
+
+class FiringGate:
+    """
+    発火を間引くゲート（クールダウン・ヒステリシス・ユーザーごとのレート制限）
+
+    クールダウンの解除とレート制限の窓からの除外はタイマーホイールへの登録で行うため、
+    照合1件あたりの処理はO(1)でトリガーごとのタイマーを持たない。
+    ホイールはティックの時刻で進めるので、実時間でもバックテストの時刻でも同じように動く
+    （時刻はtick単位に切り捨てるため、期限には1tick分を足して早く解除されないようにする）。
+    ヒステリシスで発火を止めたトリガーは(銘柄, フィールド)ごとに戻る境界の昇順で保持し、
+    その銘柄のティックで境界を越えたものだけを二分探索で取り出す。
+    """
+
+    def __init__(self, policy: Optional[FiringPolicy] = None):
+        self.policy = policy or FiringPolicy()
+        self.wheel = TimerWheel(tick=self.policy.tick, autostart=False)
+        self._rules: Dict[str, FiringRule] = {}
+        self._disarmed: Dict[Tuple[str, str], DisarmedTriggers] = {}
+        self._cooling: Set[str] = set()
+        self._user_fires: Counter = Counter()
+        self._clock: Optional[int] = None
+        self.admitted = 0
+        self.suppressed: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def configure(self, trigger: Any) -> bool:
+        """
+        トリガーの発火制御を設定する
+
+        parametersの"cooldown"・"hysteresis"がポリシーの既定値より優先される。
+
+        Args:
+            trigger: symbol / type / condition / value / parameters を持つトリガー
+
+        Returns:
+            bool: 制御対象になった場合True
+        """
+        parameters = trigger.parameters or {}
+        cooldown = parameters.get("cooldown", self.policy.cooldown)
+        hysteresis = parameters.get("hysteresis", self.policy.hysteresis)
+        user_id = getattr(trigger, "user_id", None)
+        if user_id is not None and self.policy.user_rate_limit is None:
+            user_id = None
+        self.remove(trigger.id)
+        if not cooldown and hysteresis is None and user_id is None:
+            return False
+        operator = normalize_operator(trigger.condition)
+        value = [float(v) for v in trigger.value] if operator == OP_BETWEEN else float(trigger.value)
+        self._rules[str(trigger.id)] = FiringRule(
+            str(trigger.id), trigger.symbol, trigger_field(trigger), operator, value,
+            float(cooldown) if cooldown else None,
+            float(hysteresis) if hysteresis is not None else None,
+            None if user_id is None else str(user_id)
+        )
+        return True
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーの発火制御を外す
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        rule = self._rules.pop(str(trigger_id), None)
+        if rule is None:
+            return False
+        disarmed = self._disarmed.get((rule.symbol, rule.field))
+        if disarmed is not None:
+            disarmed.discard(rule.trigger_id)
+            if not disarmed:
+                del self._disarmed[(rule.symbol, rule.field)]
+        self._cooling.discard(rule.trigger_id)
+        return True
+
+    def advance(self, now: float) -> None:
+        """
+        時刻nowまでホイールを進め、期限の来たクールダウンとレート制限の窓を解除する
+
+        Args:
+            now: 現在時刻（秒）
+        """
+        clock = math.floor(now / self.policy.tick)
+        if self._clock is not None and clock > self._clock:
+            self.wheel.advance(clock - self._clock)
+        if self._clock is None or clock > self._clock:
+            self._clock = clock
+
+    def rearm(self, symbol: str, values: Dict[str, float]) -> None:
+        """
+        ヒステリシスで止めているトリガーのうち、値が十分に戻ったものを再び発火可能にする
+
+        Args:
+            symbol: 銘柄シンボル
+            values: フィールド名と値の辞書
+        """
+        for field, value in values.items():
+            disarmed = self._disarmed.get((symbol, field))
+            if not disarmed or value != value:
+                continue
+            disarmed.rearm(value)
+            if not disarmed:
+                del self._disarmed[(symbol, field)]
+
+    def admit(self, trigger_id: str) -> bool:
+        """
+        照合したトリガーを発火させてよいかを判定し、よい場合は発火として記録する
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 発火させる場合True
+        """
+        rule = self._rules.get(trigger_id)
+        if rule is None:
+            self.admitted += 1
+            return True
+        if rule.hysteresis is not None:
+            disarmed = self._disarmed.get((rule.symbol, rule.field))
+            if disarmed is not None and trigger_id in disarmed:
+                self.suppressed[SUPPRESSED_DISARMED] += 1
+                return False
+        if trigger_id in self._cooling:
+            self.suppressed[SUPPRESSED_COOLDOWN] += 1
+            return False
+        user_id = rule.user_id
+        if user_id is not None and self._user_fires[user_id] >= self.policy.user_rate_limit:
+            self.suppressed[SUPPRESSED_USER_RATE] += 1
+            return False
+
+        if rule.hysteresis is not None:
+            self._disarmed.setdefault((rule.symbol, rule.field), DisarmedTriggers()).add(
+                trigger_id, *rule.rearm_levels()
+            )
+        if rule.cooldown:
+            self._cooling.add(trigger_id)
+            self.wheel.schedule(rule.cooldown + self.policy.tick, self._cooling.discard, trigger_id)
+        if user_id is not None:
+            self._user_fires[user_id] += 1
+            self.wheel.schedule(self.policy.user_rate_window + self.policy.tick, self._release_user, user_id)
+        self.admitted += 1
+        return True
+
+    def _release_user(self, user_id: str) -> None:
+        self._user_fires[user_id] -= 1
+        if self._user_fires[user_id] <= 0:
+            del self._user_fires[user_id]
+
+    def filter(self, trigger_ids: List[str]) -> List[str]:
+        """照合したトリガーのうち発火させるものだけを返す"""
+        return [trigger_id for trigger_id in trigger_ids if self.admit(trigger_id)]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        発火制御の統計情報を返す
+
+        Returns:
+            制御対象数・発火数・理由ごとの抑止数・停止中やクールダウン中の数
+        """
+        return {
+            "rules": len(self._rules),
+            "admitted": self.admitted,
+            "suppressed": dict(self.suppressed),
+            "disarmed": sum(len(d) for d in self._disarmed.values()),
+            "cooling": len(self._cooling),
+            "users_limited": len(self._user_fires),
+            "pending_timers": len(self.wheel),
+        }
@@ -0,0 +1,472 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+from app.core.threshold_index import (
+    SortedThresholds,
+    TriggerIndex,
+    normalize_operator,
+    trigger_field,
+)
+from app.core.trigger_firing import FiringGate, FiringPolicy
+from app.core.trigger_registry import TriggerRegistry
+from app.core.trigger_table import SymbolTable
+
+logger = logging.getLogger(__name__)
+
+# クロス条件の演算子（TriggerCondition.CROSSES_ABOVE / CROSSES_BELOW の値）
+OP_CROSSES_ABOVE = "crosses_above"
+OP_CROSSES_BELOW = "crosses_below"
+CROSSING_OPERATORS = (OP_CROSSES_ABOVE, OP_CROSSES_BELOW)
+
+# 閾値に対する直前の値の位置
+SIDE_UNKNOWN = 0
+SIDE_ABOVE = 1
+SIDE_BELOW = -1
+
+_DIRECTIONS = {OP_CROSSES_ABOVE: SIDE_ABOVE, OP_CROSSES_BELOW: SIDE_BELOW}
+
+DEFAULT_CAPACITY = 1024
+
+
+class CrossingStateStore:
+    """
+    クロス条件の状態ストア
+
+    (フィールド, 銘柄番号)ごとの直前の値と、トリガーごとの直前の側（閾値の上か下か）を配列で持つ。
+    値が prev から value に動いたとき、側が変わり得るのは閾値が[prev, value]に入るトリガーだけなので、
+    閾値の昇順配列を二分探索して該当するトリガーだけを更新する。
+    値が閾値にちょうど一致した場合は側を変えない（触れただけではクロスとみなさない）。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.symbols = SymbolTable()
+        self.fields = SymbolTable()
+        self._symbol_capacity = 64
+        self._last: List[np.ndarray] = []
+        self._thresholds: Dict[Tuple[int, int], SortedThresholds] = {}
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self.trigger_ids: List[Optional[str]] = []
+        self.threshold = np.zeros(capacity, dtype=np.float64)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.symbol_index = np.zeros(capacity, dtype=np.int32)
+        self.field_index = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, trigger_id: Any) -> bool:
+        return str(trigger_id) in self._rows
+
+    def _cell(self, symbol: str, field: str) -> Tuple[int, int]:
+        """銘柄とフィールドを登録し、(フィールド番号, 銘柄番号)を返す"""
+        field_index = self.fields.intern(field)
+        if field_index == len(self._last):
+            self._last.append(np.full(self._symbol_capacity, np.nan))
+        symbol_index = self.symbols.intern(symbol)
+        if symbol_index >= self._symbol_capacity:
+            capacity = self._symbol_capacity
+            while capacity <= symbol_index:
+                capacity *= 2
+            for i, last in enumerate(self._last):
+                grown = np.full(capacity, np.nan)
+                grown[:len(last)] = last
+                self._last[i] = grown
+            self._symbol_capacity = capacity
+        return field_index, symbol_index
+
+    def _grow_rows(self) -> None:
+        capacity = len(self.threshold) * 2
+        for name in ("threshold", "side", "direction", "symbol_index", "field_index"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def last_value(self, symbol: str, field: str) -> Optional[float]:
+        """銘柄・フィールドの直前の値を返す（未受信の場合はNone）"""
+        symbol_index = self.symbols.lookup(symbol)
+        field_index = self.fields.lookup(field)
+        if symbol_index is None or field_index is None:
+            return None
+        value = self._last[field_index][symbol_index]
+        return None if np.isnan(value) else float(value)
+
+    def add(self, trigger_id: Any, symbol: str, field: str, operator: Any, value: Any) -> None:
+        """
+        クロス条件のトリガーを追加する（既存の場合は置き換える）
+
+        直前の値が分かっていればその時点の側を初期値とするため、追加直後に発火することはない。
+
+        Args:
+            trigger_id: トリガーID
+            symbol: 銘柄シンボル
+            field: フィールド名
+            operator: crosses_above / crosses_below
+            value: 閾値
+        """
+        operator = normalize_operator(operator)
+        direction = _DIRECTIONS.get(operator)
+        if direction is None:
+            raise ValueError(f"Not a crossing operator: {operator}")
+        trigger_id = str(trigger_id)
+        threshold = float(value)
+        self.remove(trigger_id)
+
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == len(self.threshold):
+                self._grow_rows()
+            row = self._size
+            self._size += 1
+            self.trigger_ids.append(None)
+
+        field_index, symbol_index = self._cell(symbol, field)
+        last = self._last[field_index][symbol_index]
+        self.trigger_ids[row] = trigger_id
+        self.threshold[row] = threshold
+        self.direction[row] = direction
+        self.symbol_index[row] = symbol_index
+        self.field_index[row] = field_index
+        self.side[row] = _side(last, threshold, SIDE_UNKNOWN)
+        self._rows[trigger_id] = row
+
+        thresholds = self._thresholds.get((field_index, symbol_index))
+        if thresholds is None:
+            thresholds = self._thresholds[(field_index, symbol_index)] = SortedThresholds()
+        thresholds.insert(threshold, row)
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーを削除する
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        row = self._rows.pop(str(trigger_id), None)
+        if row is None:
+            return False
+        key = (int(self.field_index[row]), int(self.symbol_index[row]))
+        thresholds = self._thresholds[key]
+        thresholds.remove(float(self.threshold[row]), row)
+        if not len(thresholds):
+            del self._thresholds[key]
+        self.trigger_ids[row] = None
+        self.side[row] = SIDE_UNKNOWN
+        self._free.append(row)
+        return True
+
+    def on_value(self, symbol: str, field: str, value: float) -> List[str]:
+        """
+        新しい値を反映し、クロスしたトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            field: フィールド名
+            value: 新しい値
+
+        Returns:
+            今回の値でクロスしたトリガーIDのリスト
+        """
+        symbol_index = self.symbols.lookup(symbol)
+        field_index = self.fields.lookup(field)
+        if symbol_index is None or field_index is None:
+            return []
+        last = self._last[field_index]
+        previous = last[symbol_index]
+        last[symbol_index] = value
+        thresholds = self._thresholds.get((field_index, symbol_index))
+        if thresholds is None or value == previous:
+            return []
+
+        side = self.side
+        if np.isnan(previous):
+            # 最初の値では側を決めるだけで発火しない
+            for row in thresholds.ids:
+                side[row] = _side(value, self.threshold[row], SIDE_UNKNOWN)
+            return []
+
+        low, high = (previous, value) if previous < value else (value, previous)
+        keys = thresholds.keys
+        start = bisect_left(keys, low)
+        end = bisect_right(keys, high, start)
+        fired = []
+        for row in thresholds.ids[start:end]:
+            old = side[row]
+            new = _side(value, self.threshold[row], old)
+            if new != old:
+                side[row] = new
+                if old != SIDE_UNKNOWN and new == self.direction[row]:
+                    fired.append(self.trigger_ids[row])
+        return fired
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """
+        保存する状態を配列にコピーして返す（ティックを反映するスレッドで呼ぶ）
+
+        Returns:
+            銘柄・フィールド・直前の値・トリガーごとの閾値と側の配列
+        """
+        rows = np.array(sorted(self._rows.values()), dtype=np.int64)
+        fields = len(self.fields)
+        symbols = len(self.symbols)
+        last = np.full((fields, symbols), np.nan)
+        for i in range(fields):
+            last[i] = self._last[i][:symbols]
+        return {
+            "symbols": np.array(self.symbols.names, dtype=str),
+            "fields": np.array(self.fields.names, dtype=str),
+            "last": last,
+            "trigger_ids": np.array([self.trigger_ids[row] for row in rows], dtype=str),
+            "thresholds": self.threshold[rows],
+            "sides": self.side[rows],
+        }
+
+    @staticmethod
+    def write(path: Union[str, Path], state: Dict[str, np.ndarray]) -> None:
+        """
+        state()でコピーした状態をファイルに書き出す（一時ファイルに書いてから置き換える）
+
+        Args:
+            path: 保存先（.npz）
+            state: state()の戻り値
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as f:
+            np.savez(f, **state)
+        os.replace(temporary, path)
+        logger.info(f"Saved crossing state for {len(state['trigger_ids'])} triggers to {path}")
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        状態をファイルに保存する（一時ファイルに書いてから置き換える）
+
+        Args:
+            path: 保存先（.npz）
+        """
+        self.write(path, self.state())
+
+    def load(self, path: Union[str, Path]) -> int:
+        """
+        保存した状態を復元する
+
+        直前の値は全て戻し、トリガーの側は閾値が変わっていないトリガーにだけ戻す
+        （それ以外は復元した直前の値から決め直す）。トリガーの登録前でも後でもよい。
+
+        Args:
+            path: save()で保存したファイル
+
+        Returns:
+            側を復元したトリガー数
+        """
+        with np.load(Path(path)) as state:
+            symbols = state["symbols"].tolist()
+            fields = state["fields"].tolist()
+            last = state["last"]
+            saved = {
+                trigger_id: (threshold, side)
+                for trigger_id, threshold, side in zip(
+                    state["trigger_ids"].tolist(), state["thresholds"].tolist(), state["sides"].tolist()
+                )
+            }
+
+        for i, field in enumerate(fields):
+            for j, symbol in enumerate(symbols):
+                if not np.isnan(last[i, j]):
+                    field_index, symbol_index = self._cell(symbol, field)
+                    self._last[field_index][symbol_index] = last[i, j]
+
+        restored = 0
+        for trigger_id, row in self._rows.items():
+            threshold = float(self.threshold[row])
+            entry = saved.get(trigger_id)
+            if entry is not None and entry[0] == threshold:
+                self.side[row] = entry[1]
+                restored += 1
+            else:
+                current = self._last[self.field_index[row]][self.symbol_index[row]]
+                self.side[row] = _side(current, threshold, SIDE_UNKNOWN)
+        logger.info(f"Restored crossing state for {restored} triggers from {path}")
+        return restored
+
+    def stats(self) -> Dict[str, int]:
+        """
+        状態ストアの統計情報を返す
+
+        Returns:
+            トリガー数・銘柄数・フィールド数・側が未確定のトリガー数
+        """
+        rows = list(self._rows.values())
+        return {
+            "triggers": len(rows),
+            "symbols": len(self.symbols),
+            "fields": len(self.fields),
+            "unknown_side": int(np.count_nonzero(self.side[rows] == SIDE_UNKNOWN)) if rows else 0,
+        }
+
+
+def _side(value: float, threshold: float, previous: int) -> int:
+    """値が閾値の上ならSIDE_ABOVE、下ならSIDE_BELOW、一致または不明なら直前の側を返す"""
+    if value > threshold:
+        return SIDE_ABOVE
+    if value < threshold:
+        return SIDE_BELOW
+    return previous
+
+
+class TriggerMatcher:
+    """
+    ティックごとに発火するトリガーを求めるマッチャー
+
+    閾値条件は閾値索引、クロス条件は状態ストアで照合し、
+    照合したトリガーを発火ゲート（クールダウン・ヒステリシス・レート制限）で間引く。
+    閾値索引にはTriggerRegistryも使える（変更中も照合を止めずに差分を反映する）。
+    """
+
+    def __init__(
+        self,
+        index: Optional[Union[TriggerIndex, TriggerRegistry]] = None,
+        crossings: Optional[CrossingStateStore] = None,
+        policy: Optional[FiringPolicy] = None
+    ):
+        self.index = index if index is not None else TriggerIndex()
+        self.crossings = crossings if crossings is not None else CrossingStateStore()
+        self.gate = FiringGate(policy)
+
+    def __len__(self) -> int:
+        return len(self.index) + len(self.crossings)
+
+    def sync_trigger(self, trigger: Any) -> bool:
+        """
+        APIのトリガーを反映する（無効化されたトリガーは外す）
+
+        Args:
+            trigger: symbol / type / condition / value / parameters / is_active を持つトリガー
+
+        Returns:
+            bool: 照合対象に登録された場合True
+        """
+        if normalize_operator(trigger.condition) not in CROSSING_OPERATORS:
+            self.crossings.remove(trigger.id)
+            registered = self.index.sync_trigger(trigger)
+        else:
+            self.index.remove(trigger.id)
+            registered = trigger.is_active
+            if registered:
+                self.crossings.add(
+                    trigger.id, trigger.symbol, trigger_field(trigger), trigger.condition, trigger.value
+                )
+            else:
+                self.crossings.remove(trigger.id)
+        if registered:
+            self.gate.configure(trigger)
+        else:
+            self.gate.remove(trigger.id)
+        return registered
+
+    def load_triggers(self, triggers: Iterable[Any]) -> int:
+        """
+        起動時に全トリガーをまとめて登録する（閾値条件は索引を一括で構築する）
+
+        Args:
+            triggers: symbol / type / condition / value / parameters / is_active を持つトリガー
+
+        Returns:
+            照合対象に登録したトリガー数
+        """
+        triggers = list(triggers)
+        registered = self.index.load(triggers)
+        for trigger in triggers:
+            if normalize_operator(trigger.condition) in CROSSING_OPERATORS:
+                if not trigger.is_active:
+                    continue
+                self.crossings.add(
+                    trigger.id, trigger.symbol, trigger_field(trigger), trigger.condition, trigger.value
+                )
+                registered += 1
+            elif trigger.id not in self.index:
+                continue
+            self.gate.configure(trigger)
+        return registered
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーを照合対象から外す
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        self.gate.remove(trigger_id)
+        removed = self.index.remove(trigger_id)
+        return self.crossings.remove(trigger_id) or removed
+
+    def on_tick(self, symbol: str, values: Dict[str, float], now: Optional[float] = None) -> List[str]:
+        """
+        ティックを反映し、発火したトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            values: フィールド名と値の辞書
+            now: ティックの時刻（秒、省略時はtime.monotonic()）
+
+        Returns:
+            発火したトリガーIDのリスト
+        """
+        fired = self.index.match_tick(symbol, values)
+        for field, value in values.items():
+            fired.extend(self.crossings.on_value(symbol, field, value))
+        gate = self.gate
+        if not len(gate):
+            return fired
+        gate.advance(time.monotonic() if now is None else now)
+        gate.rearm(symbol, values)
+        return gate.filter(fired) if fired else fired
+
+    def save_state(self, path: Union[str, Path]) -> None:
+        """クロス条件の状態を保存する"""
+        self.crossings.save(path)
+
+    async def save_state_async(self, path: Union[str, Path]) -> None:
+        """
+        クロス条件の状態を保存する（コピーはイベントループ上で取り、書き込みはExecutorで行う）
+
+        Args:
+            path: 保存先（.npz）
+        """
+        state = self.crossings.state()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, CrossingStateStore.write, path, state)
+
+    def load_state(self, path: Union[str, Path]) -> int:
+        """
+        クロス条件の状態を復元する（ファイルが無い場合は何もしない）
+
+        Returns:
+            側を復元したトリガー数
+        """
+        if not Path(path).exists():
+            logger.info(f"No crossing state found at {path}")
+            return 0
+        return self.crossings.load(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """照合対象の統計情報を返す"""
+        return {"index": self.index.stats(), "crossings": self.crossings.stats(), "gate": self.gate.stats()}
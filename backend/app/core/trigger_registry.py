@@ -0,0 +1,422 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+import logging
+import threading
+
+from app.core.threshold_index import (
+    OP_BETWEEN,
+    OP_EQUALS,
+    OP_GREATER_THAN,
+    OP_LESS_THAN,
+    IntervalTree,
+    SortedThresholds,
+    index_key,
+    normalize_operator,
+    trigger_field,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEXED_OPERATORS = (OP_GREATER_THAN, OP_LESS_THAN, OP_BETWEEN, OP_EQUALS)
+
+_EMPTY_THRESHOLDS = SortedThresholds()
+
+# スナップショットで銘柄シャードを振り分けるバケット数（変更時はバケット1つだけを複製する）
+SHARD_BUCKETS = 256
+
+
+def _bucket(symbol: str) -> int:
+    """銘柄のバケット番号を返す"""
+    return hash(symbol) % SHARD_BUCKETS
+
+
+@dataclass(frozen=True)
+class FieldShard:
+    """
+    1つの(シンボル, フィールド)の閾値索引の不変スナップショット
+
+    公開した後は変更せず、差分は変更のあった演算子の構造だけを複製した新しいシャードとして作る。
+    GREATER_THAN / LESS_THANは配列の複製（memcpy相当）、BETWEENは区間木の経路複製でO(log n)、
+    EQUALSは値ごとのタプルを持つ辞書の浅い複製になる。
+    """
+    above: SortedThresholds
+    below: SortedThresholds
+    ranges: IntervalTree
+    equals: Dict[float, Tuple[str, ...]]
+    size: int
+
+    def match(self, value: float) -> List[str]:
+        """値に対して発火するトリガーIDを返す（ThresholdIndex.matchと同じ判定）"""
+        above = self.above
+        below = self.below
+        matched = above.ids[:bisect_left(above.keys, value)]
+        matched.extend(below.ids[bisect_right(below.keys, value):])
+        if len(self.ranges):
+            matched.extend(self.ranges.stab(value))
+        if self.equals:
+            matched.extend(self.equals.get(value, ()))
+        return matched
+
+    def with_entry(self, trigger_id: str, operator: str, key: Any) -> "FieldShard":
+        """条件を1つ追加した新しいシャードを返す"""
+        above, below, ranges, equals = self.above, self.below, self.ranges, self.equals
+        if operator == OP_GREATER_THAN:
+            above = above.copy()
+            above.insert(key, trigger_id)
+        elif operator == OP_LESS_THAN:
+            below = below.copy()
+            below.insert(key, trigger_id)
+        elif operator == OP_BETWEEN:
+            ranges = ranges.inserted(key[0], key[1], trigger_id)
+        else:
+            equals = dict(equals)
+            equals[key] = equals.get(key, ()) + (trigger_id,)
+        return FieldShard(above, below, ranges, equals, self.size + 1)
+
+    def without_entry(self, trigger_id: str, operator: str, key: Any) -> "FieldShard":
+        """条件を1つ削除した新しいシャードを返す"""
+        above, below, ranges, equals = self.above, self.below, self.ranges, self.equals
+        if operator == OP_GREATER_THAN:
+            above = above.copy()
+            above.remove(key, trigger_id)
+        elif operator == OP_LESS_THAN:
+            below = below.copy()
+            below.remove(key, trigger_id)
+        elif operator == OP_BETWEEN:
+            ranges = ranges.removed(key[0], trigger_id)
+        else:
+            equals = dict(equals)
+            ids = tuple(i for i in equals.get(key, ()) if i != trigger_id)
+            if ids:
+                equals[key] = ids
+            else:
+                equals.pop(key, None)
+        return FieldShard(above, below, ranges, equals, self.size - 1)
+
+
+_EMPTY_FIELD = FieldShard(_EMPTY_THRESHOLDS, _EMPTY_THRESHOLDS, IntervalTree(), {}, 0)
+
+
+@dataclass(frozen=True)
+class SymbolShard:
+    """1銘柄分のフィールドごとのシャード（versionはこのシャードを公開したレジストリのバージョン）"""
+    fields: Dict[str, FieldShard]
+    version: int
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """
+    レジストリのある時点の不変スナップショット
+
+    銘柄シャードは銘柄のハッシュでSHARD_BUCKETS個のバケットに振り分けた2段の辞書で持ち、
+    変更時は触れたバケットの辞書だけを複製して他のバケットは前のスナップショットと共有する。
+    """
+    version: int
+    buckets: Tuple[Dict[str, SymbolShard], ...]
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def shard(self, symbol: str) -> Optional[SymbolShard]:
+        """銘柄のシャードを返す（無い場合はNone）"""
+        return self.buckets[_bucket(symbol)].get(symbol)
+
+    def symbols(self) -> Iterator[str]:
+        """シャードを持つ銘柄を返す"""
+        for bucket in self.buckets:
+            yield from bucket
+
+    def shards(self) -> Iterator[SymbolShard]:
+        """全ての銘柄シャードを返す"""
+        for bucket in self.buckets:
+            yield from bucket.values()
+
+    def match_tick(self, symbol: str, values: Dict[str, float]) -> List[str]:
+        """
+        複数フィールドを持つティックに対して発火するトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            values: フィールド名と値の辞書
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        shard = self.buckets[_bucket(symbol)].get(symbol)
+        if shard is None:
+            return []
+        matched: List[str] = []
+        fields = shard.fields
+        for field, value in values.items():
+            field_shard = fields.get(field)
+            if field_shard is not None:
+                matched.extend(field_shard.match(value))
+        return matched
+
+
+_EMPTY_BUCKETS: Tuple[Dict[str, SymbolShard], ...] = tuple({} for _ in range(SHARD_BUCKETS))
+
+
+def _build_field(entries: List[Tuple[str, str, Any]]) -> FieldShard:
+    """(トリガーID, 演算子, キー)の一覧からシャードを一括で構築する"""
+    above = SortedThresholds()
+    below = SortedThresholds()
+    ranges = IntervalTree()
+    equals: Dict[float, Tuple[str, ...]] = {}
+    sides: Dict[str, List[Tuple[float, str]]] = {OP_GREATER_THAN: [], OP_LESS_THAN: []}
+    for trigger_id, operator, key in entries:
+        if operator == OP_BETWEEN:
+            ranges.insert(key[0], key[1], trigger_id)
+        elif operator == OP_EQUALS:
+            equals[key] = equals.get(key, ()) + (trigger_id,)
+        else:
+            sides[operator].append((key, trigger_id))
+    for operator, thresholds in ((OP_GREATER_THAN, above), (OP_LESS_THAN, below)):
+        pairs = sides[operator]
+        # 同じ閾値は挿入順を保つ（SortedThresholds.insertと同じ並び）
+        pairs.sort(key=lambda pair: pair[0])
+        thresholds.keys = [key for key, _ in pairs]
+        thresholds.ids = [trigger_id for _, trigger_id in pairs]
+    return FieldShard(above, below, ranges, equals, len(entries))
+
+
+class TriggerRegistry:
+    """
+    バージョン付きのトリガーレジストリ（コピーオンライトの銘柄シャード）
+
+    照合はその時点のスナップショットの参照を1回読むだけでロックを取らず、
+    変更は影響する銘柄のシャードとそれを含むバケットだけを複製し、新しいスナップショットを1回の代入で差し替える。
+    そのため照合が止まることはなく、1つのティックの照合は常に1つのバージョンで一貫する。
+    変更同士はロックで直列化し、1回の変更ごとにバージョンを1つ進める。
+
+    TriggerIndexと同じインターフェース（add / remove / sync_trigger / match / match_tick / stats）を持ち、
+    TriggerMatcherの索引としてそのまま使える。トリガーIDは文字列に正規化して扱う。
+    """
+
+    def __init__(self):
+        self._snapshot = RegistrySnapshot(0, _EMPTY_BUCKETS)
+        self._entries: Dict[str, Tuple[str, str, str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, trigger_id: Any) -> bool:
+        return str(trigger_id) in self._entries
+
+    @property
+    def version(self) -> int:
+        """現在公開しているスナップショットのバージョン"""
+        return self._snapshot.version
+
+    def snapshot(self) -> RegistrySnapshot:
+        """現在のスナップショットを返す（以後の変更の影響を受けない）"""
+        return self._snapshot
+
+    def _publish(self, changes: Dict[str, Dict[str, Optional[FieldShard]]]) -> int:
+        """
+        銘柄ごとのフィールドシャードの差分を適用した新しいスナップショットを公開する
+
+        Args:
+            changes: 銘柄 -> フィールド -> 新しいシャード（Noneは削除）
+
+        Returns:
+            公開したバージョン
+        """
+        current = self._snapshot
+        version = current.version + 1
+        buckets = list(current.buckets)
+        copied = set()
+        for symbol, fields in changes.items():
+            index = _bucket(symbol)
+            if index not in copied:
+                buckets[index] = dict(buckets[index])
+                copied.add(index)
+            shards = buckets[index]
+            shard = shards.get(symbol)
+            merged = dict(shard.fields) if shard is not None else {}
+            for field, field_shard in fields.items():
+                if field_shard is None or not field_shard.size:
+                    merged.pop(field, None)
+                else:
+                    merged[field] = field_shard
+            if merged:
+                shards[symbol] = SymbolShard(merged, version)
+            else:
+                shards.pop(symbol, None)
+        # 参照の代入は原子的なので、照合側は古いか新しいかどちらかのスナップショットだけを見る
+        self._snapshot = RegistrySnapshot(version, tuple(buckets))
+        return version
+
+    def _field_shard(self, changes: Dict[str, Dict[str, Optional[FieldShard]]], symbol: str, field: str) -> FieldShard:
+        """同じ変更の中で既に作ったシャードがあればそれを、無ければ公開中のシャードを返す"""
+        pending = changes.get(symbol, {})
+        if field in pending:
+            return pending[field] or _EMPTY_FIELD
+        shard = self._snapshot.shard(symbol)
+        field_shard = shard.fields.get(field) if shard is not None else None
+        return field_shard if field_shard is not None else _EMPTY_FIELD
+
+    def add(self, trigger_id: Any, symbol: str, field: str, operator: Any, value: Any) -> int:
+        """
+        トリガーの条件を登録する（既存の条件は同じバージョンで置き換える）
+
+        Args:
+            trigger_id: トリガーID
+            symbol: 銘柄シンボル
+            field: フィールド名（price, volume など）
+            operator: 演算子
+            value: 閾値（BETWEENの場合は[low, high]）
+
+        Returns:
+            変更を公開したバージョン
+        """
+        trigger_id = str(trigger_id)
+        operator, key = index_key(trigger_id, operator, value)
+        with self._lock:
+            changes: Dict[str, Dict[str, Optional[FieldShard]]] = {}
+            previous = self._entries.get(trigger_id)
+            if previous is not None:
+                old_symbol, old_field, old_operator, old_key = previous
+                shard = self._field_shard(changes, old_symbol, old_field)
+                changes.setdefault(old_symbol, {})[old_field] = shard.without_entry(trigger_id, old_operator, old_key)
+            shard = self._field_shard(changes, symbol, field)
+            changes.setdefault(symbol, {})[field] = shard.with_entry(trigger_id, operator, key)
+            version = self._publish(changes)
+            self._entries[trigger_id] = (symbol, field, operator, key)
+        return version
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーを登録から外す
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        trigger_id = str(trigger_id)
+        with self._lock:
+            entry = self._entries.get(trigger_id)
+            if entry is None:
+                return False
+            symbol, field, operator, key = entry
+            shard = self._field_shard({}, symbol, field)
+            self._publish({symbol: {field: shard.without_entry(trigger_id, operator, key)}})
+            del self._entries[trigger_id]
+        return True
+
+    def sync_trigger(self, trigger: Any) -> bool:
+        """
+        APIのトリガー（symbol / type / condition / value を持つ）の作成・更新を反映する
+
+        無効化されたトリガーや、状態を必要とするクロス条件は登録から外す。
+
+        Args:
+            trigger: トリガー
+
+        Returns:
+            bool: 登録された場合True
+        """
+        operator = normalize_operator(trigger.condition)
+        if not trigger.is_active or operator not in INDEXED_OPERATORS:
+            self.remove(trigger.id)
+            return False
+        self.add(trigger.id, trigger.symbol, trigger_field(trigger), operator, trigger.value)
+        return True
+
+    def load(self, triggers: Iterable[Any]) -> int:
+        """
+        全トリガーから全シャードを一括で構築し、1つのバージョンとして差し替える（起動時用）
+
+        構築中も照合は以前のスナップショットで続く。
+
+        Args:
+            triggers: トリガーのイテラブル
+
+        Returns:
+            登録したトリガー数
+        """
+        entries: Dict[str, Tuple[str, str, str, Any]] = {}
+        for trigger in triggers:
+            operator = normalize_operator(trigger.condition)
+            if not trigger.is_active or operator not in INDEXED_OPERATORS:
+                continue
+            trigger_id = str(trigger.id)
+            operator, key = index_key(trigger_id, operator, trigger.value)
+            entries[trigger_id] = (trigger.symbol, trigger_field(trigger), operator, key)
+
+        grouped: Dict[str, Dict[str, List[Tuple[str, str, Any]]]] = {}
+        for trigger_id, (symbol, field, operator, key) in entries.items():
+            grouped.setdefault(symbol, {}).setdefault(field, []).append((trigger_id, operator, key))
+
+        with self._lock:
+            version = self._snapshot.version + 1
+            buckets: List[Dict[str, SymbolShard]] = [{} for _ in range(SHARD_BUCKETS)]
+            for symbol, fields in grouped.items():
+                buckets[_bucket(symbol)][symbol] = SymbolShard(
+                    {field: _build_field(items) for field, items in fields.items()}, version
+                )
+            self._snapshot = RegistrySnapshot(version, tuple(buckets))
+            self._entries = entries
+        logger.info(f"Loaded {len(entries)} triggers into {len(grouped)} symbol shards (version {version})")
+        return len(entries)
+
+    def match(self, symbol: str, field: str, value: float) -> List[str]:
+        """
+        ティックに対して発火するトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            field: フィールド名
+            value: 値
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        shard = self._snapshot.shard(symbol)
+        field_shard = shard.fields.get(field) if shard is not None else None
+        return field_shard.match(value) if field_shard is not None else []
+
+    def match_tick(self, symbol: str, values: Dict[str, float]) -> List[str]:
+        """
+        複数フィールドを持つティックに対して発火するトリガーIDを返す
+
+        Args:
+            symbol: 銘柄シンボル
+            values: フィールド名と値の辞書
+
+        Returns:
+            条件を満たすトリガーIDのリスト
+        """
+        return self._snapshot.match_tick(symbol, values)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        レジストリの統計情報を返す
+
+        Returns:
+            バージョン・トリガー数・シャード数・演算子ごとの登録数
+        """
+        snapshot = self._snapshot
+        totals = {OP_GREATER_THAN: 0, OP_LESS_THAN: 0, OP_BETWEEN: 0, OP_EQUALS: 0}
+        indexes = 0
+        shards = 0
+        for shard in snapshot.shards():
+            shards += 1
+            for field_shard in shard.fields.values():
+                indexes += 1
+                totals[OP_GREATER_THAN] += len(field_shard.above)
+                totals[OP_LESS_THAN] += len(field_shard.below)
+                totals[OP_BETWEEN] += len(field_shard.ranges)
+                totals[OP_EQUALS] += sum(len(ids) for ids in field_shard.equals.values())
+        return {
+            "version": snapshot.version,
+            "triggers": len(self._entries),
+            "shards": shards,
+            "indexes": indexes,
+            **totals,
+        }
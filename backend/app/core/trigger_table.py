@@ -0,0 +1,308 @@
+from typing import Any, Dict, List, Mapping, Optional
+import logging
+
+import numpy as np
+
+from app.core.threshold_index import (
+    OP_BETWEEN,
+    OP_EQUALS,
+    OP_GREATER_THAN,
+    OP_LESS_THAN,
+    normalize_operator,
+    trigger_field,
+)
+
+logger = logging.getLogger(__name__)
+
+# 演算子コード（クロス条件は直前の値が必要なためスナップショット評価では発火しない）
+OPERATOR_CODES = {
+    OP_GREATER_THAN: 1,
+    OP_LESS_THAN: 2,
+    OP_BETWEEN: 3,
+    OP_EQUALS: 4,
+    "crosses_above": 5,
+    "crosses_below": 6,
+}
+OPERATOR_NAMES = {code: name for name, code in OPERATOR_CODES.items()}
+
+DEFAULT_CAPACITY = 1024
+
+
+class SymbolTable:
+    """文字列を連番の整数に対応付けるインターナー"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        """名前の番号を返す（未登録の場合は登録する）"""
+        index = self._ids.get(name)
+        if index is None:
+            index = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def lookup(self, name: str) -> Optional[int]:
+        """名前の番号を返す（未登録の場合はNone）"""
+        return self._ids.get(name)
+
+
+class TriggerTable:
+    """
+    全トリガーを列指向のNumPy配列で保持するテーブル
+
+    条件はあらかじめ閉区間[lower, upper]に変換しておく（GREATER_THANは閾値の次の浮動小数点数以上、
+    LESS_THANは閾値の直前の浮動小数点数以下、無効なトリガーは空区間）。
+    これによりスナップショット評価は値の収集と2回の比較だけのベクトル演算になる。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.symbols = SymbolTable()
+        self.fields = SymbolTable()
+        self._field_stride = 8
+        self._size = 0
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity: int) -> None:
+        self.symbol_index = np.zeros(capacity, dtype=np.int32)
+        self.field_index = np.zeros(capacity, dtype=np.int32)
+        self.operator = np.zeros(capacity, dtype=np.int8)
+        self.value = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.trigger_ids = np.empty(capacity, dtype=object)
+        self._cell = np.zeros(capacity, dtype=np.int64)
+        self._lower = np.full(capacity, np.inf)
+        self._upper = np.full(capacity, -np.inf)
+
+    def _grow(self) -> None:
+        size = self._size
+        columns = {
+            name: getattr(self, name)
+            for name in ("symbol_index", "field_index", "operator", "value", "low", "high",
+                         "active", "trigger_ids", "_cell", "_lower", "_upper")
+        }
+        self._allocate(len(self.value) * 2)
+        for name, column in columns.items():
+            getattr(self, name)[:size] = column[:size]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, trigger_id: Any) -> bool:
+        return str(trigger_id) in self._rows
+
+    def set(
+        self,
+        trigger_id: Any,
+        symbol: str,
+        field: str,
+        operator: Any,
+        value: Any,
+        is_active: bool = True
+    ) -> None:
+        """
+        トリガーの行を追加または上書きする
+
+        Args:
+            trigger_id: トリガーID
+            symbol: 銘柄シンボル
+            field: フィールド名
+            operator: 演算子
+            value: 閾値（BETWEENの場合は[low, high]）
+            is_active: 有効な場合True
+        """
+        trigger_id = str(trigger_id)
+        name = normalize_operator(operator)
+        code = OPERATOR_CODES.get(name)
+        if code is None:
+            raise ValueError(f"Unsupported operator: {name}")
+        if code == OPERATOR_CODES[OP_BETWEEN]:
+            low, high = (float(v) for v in value)
+            if low > high:
+                raise ValueError(f"Invalid range for trigger {trigger_id}: {value}")
+            threshold = low
+        else:
+            threshold = low = high = float(value)
+
+        row = self._rows.get(trigger_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self.value):
+                    self._grow()
+                row = self._size
+                self._size += 1
+            self._rows[trigger_id] = row
+
+        field_index = self.fields.intern(field)
+        if field_index >= self._field_stride:
+            self._restride(field_index + 1)
+        symbol_index = self.symbols.intern(symbol)
+
+        self.trigger_ids[row] = trigger_id
+        self.symbol_index[row] = symbol_index
+        self.field_index[row] = field_index
+        self.operator[row] = code
+        self.value[row] = threshold
+        self.low[row] = low
+        self.high[row] = high
+        self.active[row] = is_active
+        self._cell[row] = symbol_index * self._field_stride + field_index
+        self._set_bounds(row)
+
+    def _set_bounds(self, row: int) -> None:
+        code = self.operator[row]
+        lower, upper = np.inf, -np.inf
+        if self.active[row]:
+            if code == OPERATOR_CODES[OP_GREATER_THAN]:
+                lower, upper = np.nextafter(self.value[row], np.inf), np.inf
+            elif code == OPERATOR_CODES[OP_LESS_THAN]:
+                lower, upper = -np.inf, np.nextafter(self.value[row], -np.inf)
+            elif code in (OPERATOR_CODES[OP_BETWEEN], OPERATOR_CODES[OP_EQUALS]):
+                lower, upper = self.low[row], self.high[row]
+        self._lower[row] = lower
+        self._upper[row] = upper
+
+    def _restride(self, fields: int) -> None:
+        """フィールド数が増えた場合にスナップショットのセル番号を振り直す"""
+        stride = self._field_stride
+        while stride < fields:
+            stride *= 2
+        self._field_stride = stride
+        size = self._size
+        self._cell[:size] = self.symbol_index[:size].astype(np.int64) * stride + self.field_index[:size]
+
+    def remove(self, trigger_id: Any) -> bool:
+        """
+        トリガーの行を削除する（行は再利用のため空区間にしておく）
+
+        Args:
+            trigger_id: トリガーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+        row = self._rows.pop(str(trigger_id), None)
+        if row is None:
+            return False
+        self.active[row] = False
+        self.trigger_ids[row] = None
+        self._lower[row] = np.inf
+        self._upper[row] = -np.inf
+        self._free.append(row)
+        return True
+
+    def row(self, trigger_id: Any) -> Optional[Dict[str, Any]]:
+        """トリガーの行を辞書で返す（存在しない場合はNone）"""
+        row = self._rows.get(str(trigger_id))
+        if row is None:
+            return None
+        operator = OPERATOR_NAMES[int(self.operator[row])]
+        value = (
+            [float(self.low[row]), float(self.high[row])]
+            if operator == OP_BETWEEN else float(self.value[row])
+        )
+        return {
+            "id": self.trigger_ids[row],
+            "symbol": self.symbols.names[self.symbol_index[row]],
+            "field": self.fields.names[self.field_index[row]],
+            "operator": operator,
+            "value": value,
+            "is_active": bool(self.active[row]),
+        }
+
+    def sync_trigger(self, trigger: Any, trigger_id: Any = None) -> None:
+        """
+        APIのトリガー（Trigger / TriggerCreate）を行に反映する
+
+        Args:
+            trigger: symbol / type / condition / value / parameters / is_active を持つトリガー
+            trigger_id: トリガーID（省略時はtrigger.id）
+        """
+        trigger_id = trigger.id if trigger_id is None else trigger_id
+        self.set(
+            trigger_id,
+            trigger.symbol,
+            trigger_field(trigger),
+            trigger.condition,
+            trigger.value,
+            trigger.is_active
+        )
+
+    def snapshot(self, values: Mapping[str, Mapping[str, float]]) -> np.ndarray:
+        """
+        銘柄ごとの値を評価用の配列に変換する
+
+        Args:
+            values: 銘柄シンボル -> {フィールド名: 値}
+
+        Returns:
+            セル番号で引ける値の配列（値の無いセルはNaN）
+        """
+        cells = np.full(max(1, len(self.symbols)) * self._field_stride, np.nan)
+        stride = self._field_stride
+        for symbol, fields in values.items():
+            symbol_index = self.symbols.lookup(symbol)
+            if symbol_index is None:
+                continue
+            base = symbol_index * stride
+            for field, value in fields.items():
+                field_index = self.fields.lookup(field)
+                if field_index is not None:
+                    cells[base + field_index] = value
+        return cells
+
+    def evaluate_rows(self, snapshot: Any) -> np.ndarray:
+        """
+        スナップショットに対して発火するトリガーの行番号を1回のベクトル演算で求める
+
+        Args:
+            snapshot: snapshot()の戻り値、または銘柄ごとの値の辞書
+
+        Returns:
+            発火したトリガーの行番号の配列
+        """
+        if not isinstance(snapshot, np.ndarray):
+            snapshot = self.snapshot(snapshot)
+        size = self._size
+        current = np.take(snapshot, self._cell[:size])
+        fired = current >= self._lower[:size]
+        fired &= current <= self._upper[:size]
+        return np.flatnonzero(fired)
+
+    def evaluate(self, snapshot: Any) -> np.ndarray:
+        """
+        スナップショットに対して発火するトリガーIDを返す
+
+        Args:
+            snapshot: snapshot()の戻り値、または銘柄ごとの値の辞書
+
+        Returns:
+            発火したトリガーIDの配列
+        """
+        return self.trigger_ids.take(self.evaluate_rows(snapshot))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        テーブルの統計情報を返す
+
+        Returns:
+            トリガー数・有効数・確保済み行数・銘柄数・フィールド数
+        """
+        size = self._size
+        return {
+            "triggers": len(self._rows),
+            "active": int(self.active[:size].sum()),
+            "capacity": len(self.value),
+            "symbols": len(self.symbols),
+            "fields": len(self.fields),
+        }
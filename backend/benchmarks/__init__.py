@@ -0,0 +1 @@
+# 性能計測用のスクリプト（backendディレクトリから python -m benchmarks.<モジュール名> で実行する）
@@ -0,0 +1,108 @@
+from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import http.client
+import json
+import smtplib
+import time
+
+from app.core.action_dispatcher import (
+    ACTION_EMAIL,
+    ACTION_WEBHOOK,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_TIMEOUT,
+    ActionDispatcher,
+    Destination,
+    build_email,
+)
+
+
+def _naive_webhook(url: str, payload: Any) -> int:
+    """接続を毎回張り直して送る（ベンチマークの比較用）"""
+    destination, path = Destination.from_url(url)
+    connection = http.client.HTTPConnection(destination.host, destination.port, timeout=DEFAULT_TIMEOUT)
+    try:
+        connection.request("POST", path, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _naive_email(host: str, port: int, parameters: Dict[str, Any], payload: Any) -> None:
+    """セッションを毎回張り直して送る（ベンチマークの比較用）"""
+    message = build_email("alerts@localhost", parameters, payload)
+    with smtplib.SMTP(host, port, local_hostname="localhost", timeout=DEFAULT_TIMEOUT) as connection:
+        connection.send_message(message)
+
+
+async def benchmark_dispatcher(actions: int = 2000) -> Dict[str, float]:
+    """
+    ローカルのWebhook・SMTP受信サーバーに対する送信速度を計測する
+
+    比較用の「毎回接続する」方式も接続先ごとの同時実行数は同じ上限（max_per_host）に揃え、
+    どちらもアクションごとにJSONやメールを組み立てる。
+    ディスパッチャーはmax_latency=0にして、最後の端数のバッチで待つ時間を含めないようにする。
+
+    Args:
+        actions: 送信するアクション数
+
+    Returns:
+        方式ごとの1秒あたりの送信数
+    """
+    from types import SimpleNamespace
+    from benchmarks.action_sinks import SMTPSink, WebhookSink
+
+    webhook = WebhookSink()
+    smtp = SMTPSink()
+    await webhook.start()
+    await smtp.start()
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=32)
+    naive_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_PER_HOST)
+    payloads = [{"trigger_id": str(i), "symbol": "AAPL", "price": 100.0 + i} for i in range(actions)]
+    results: Dict[str, float] = {}
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(naive_executor, _naive_webhook, f"{webhook.url}/hook", p) for p in payloads
+        ))
+        results["webhook_new_connection_per_s"] = actions / (time.perf_counter() - start)
+
+        for name, batch in (("webhook_pooled_per_s", False), ("webhook_batched_per_s", True)):
+            dispatcher = ActionDispatcher(executor=executor, max_latency=0)
+            action = SimpleNamespace(action_type=ACTION_WEBHOOK, parameters={"url": f"{webhook.url}/hook", "batch": batch})
+            start = time.perf_counter()
+            await asyncio.gather(*(dispatcher.dispatch(action, p) for p in payloads))
+            results[name] = actions / (time.perf_counter() - start)
+            results[name.replace("_per_s", "_requests")] = dispatcher.requests
+            await dispatcher.close()
+
+        emails = max(1, actions // 4)
+        parameters = {"to": "user@localhost", "subject": "Alert"}
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(naive_executor, _naive_email, smtp.host, smtp.port, parameters, p)
+            for p in payloads[:emails]
+        ))
+        results["email_new_session_per_s"] = emails / (time.perf_counter() - start)
+
+        dispatcher = ActionDispatcher(executor=executor, max_latency=0, smtp_host=smtp.host, smtp_port=smtp.port)
+        action = SimpleNamespace(action_type=ACTION_EMAIL, parameters=parameters)
+        start = time.perf_counter()
+        await asyncio.gather(*(dispatcher.dispatch(action, p) for p in payloads[:emails]))
+        results["email_pooled_batched_per_s"] = emails / (time.perf_counter() - start)
+        await dispatcher.close()
+        results["smtp_sink_messages"] = smtp.messages
+    finally:
+        await webhook.stop()
+        await smtp.stop()
+        executor.shutdown(wait=True)
+        naive_executor.shutdown(wait=True)
+    return results
+
+
+if __name__ == "__main__":
+    print(asyncio.run(benchmark_dispatcher()))
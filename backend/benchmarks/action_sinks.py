@@ -0,0 +1,130 @@
+from typing import List, Optional
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_HTTP_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 2\r\n"
+    b"\r\n"
+    b"{}"
+)
+
+
+class WebhookSink:
+    """
+    ベンチマーク用のローカルWebhook受信サーバー（HTTP/1.1 keep-alive対応）
+
+    受け取ったリクエスト数と、JSON配列で届いたバッチを展開した件数を数える。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.items = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """サーバーを起動する（port=0の場合は空いているポートを使う）"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """サーバーを停止する"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+                try:
+                    payload = json.loads(body) if body else None
+                except ValueError:
+                    payload = None
+                self.items += len(payload) if isinstance(payload, list) else 1
+                writer.write(_HTTP_RESPONSE)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class SMTPSink:
+    """
+    ベンチマーク用のローカルSMTP受信サーバー
+
+    EHLO/HELO・MAIL・RCPT・DATA・RSET・NOOP・QUITだけに応答し、受け取ったメッセージ数を数える。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """サーバーを起動する（port=0の場合は空いているポートを使う）"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """サーバーを停止する"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"220 localhost ESMTP sink\r\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line[:4].upper()
+                replies: List[bytes] = []
+                if command == b"EHLO":
+                    replies.append(b"250-localhost\r\n250 8BITMIME\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await reader.readuntil(b"\r\n.\r\n")
+                    self.messages += 1
+                    replies.append(b"250 OK\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    replies.append(b"250 OK\r\n")
+                writer.writelines(replies)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
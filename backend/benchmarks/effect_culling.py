@@ -0,0 +1,74 @@
+from typing import Dict
+import time
+
+import numpy as np
+
+from app.core.effect_buffer import KIND_PARTICLE, KIND_SOUND, EffectBuffer
+from app.core.effect_culling import EffectCuller, PlayerSpatialIndex
+
+
+def benchmark_culling(
+    effect_count: int = 10_000,
+    player_count: int = 500,
+    world_size: float = 2_000.0,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    カリングのコストを計測する
+
+    Args:
+        effect_count: エフェクト数
+        player_count: プレイヤー数
+        world_size: ワールドの一辺（x/z方向）
+        seed: 乱数シード
+
+    Returns:
+        1エフェクトあたりの処理時間（マイクロ秒）と残存率
+    """
+    rng = np.random.default_rng(seed)
+    index = PlayerSpatialIndex()
+    for i, (x, z) in enumerate(rng.uniform(0, world_size, size=(player_count, 2)).tolist()):
+        index.update(f"player{i}", (x, 64.0, z))
+
+    positions = np.column_stack([
+        rng.uniform(0, world_size, effect_count),
+        np.full(effect_count, 64.0),
+        rng.uniform(0, world_size, effect_count)
+    ])
+    intensity = rng.uniform(0.1, 3.0, effect_count)
+    kinds = rng.integers(0, 3, effect_count)
+    buffer = EffectBuffer(
+        kind=kinds.astype(np.int8),
+        subtype=np.full(effect_count, "sparkle", dtype=object),
+        color=np.full(effect_count, "#FFFFFF", dtype=object),
+        duration=np.ones(effect_count),
+        intensity=intensity,
+        position=positions,
+        particle_count=np.where(kinds == KIND_PARTICLE, intensity * 100, 0).astype(np.int64),
+        spread_radius=np.where(kinds == KIND_PARTICLE, intensity * 2.0, np.nan),
+        falloff_distance=np.where(kinds == KIND_SOUND, intensity * 10.0, np.nan),
+        pitch=np.where(kinds == KIND_SOUND, 1.0, np.nan),
+        radius=np.where(kinds == 2, intensity * 5.0, np.nan),
+        attenuation=np.where(kinds == 2, 1.0 / (intensity + 1.0), np.nan),
+    )
+    culler = EffectCuller(index)
+
+    start = time.perf_counter()
+    kept = culler.cull_buffer(buffer)
+    buffer_elapsed = time.perf_counter() - start
+
+    records = [buffer[i] for i in range(effect_count)]
+    start = time.perf_counter()
+    kept_records = sum(1 for record in records if culler.cull_record(record) is not None)
+    record_elapsed = time.perf_counter() - start
+
+    return {
+        "buffer_us_per_effect": buffer_elapsed / effect_count * 1e6,
+        "record_us_per_effect": record_elapsed / effect_count * 1e6,
+        "kept_ratio": len(kept) / effect_count,
+        "kept_ratio_records": kept_records / effect_count,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_culling())
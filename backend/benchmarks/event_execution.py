@@ -0,0 +1,70 @@
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.core.event_execution import ProcessHandlerPool
+
+
+def _benchmark_handler(event: Any) -> float:
+    """ベンチマーク用のCPUバウンドなハンドラー（GILを保持したまま計算する）"""
+    closes = event.payload["closes"]
+    total = 0.0
+    for i in range(event.payload["window"], len(closes)):
+        total += float(closes[i]) - float(closes[i - event.payload["window"]])
+    return total
+
+
+def benchmark_execution(
+    events: int = 64,
+    samples: int = 200000,
+    workers: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    CPUバウンドなハンドラーのスループットをスレッドとプロセスで比較する
+
+    Args:
+        events: 処理するイベント数
+        samples: 1イベントあたりの価格配列の長さ
+        workers: ワーカー数（省略時はCPUコア数）
+
+    Returns:
+        実行方式ごとの1秒あたりの処理イベント数
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core.event_system import Event
+
+    workers = workers or os.cpu_count() or 1
+    closes = np.random.default_rng(0).normal(100.0, 1.0, samples)
+    batch = [Event(type="indicator", payload={"closes": closes, "window": 20}) for _ in range(events)]
+
+    async def run_threads() -> float:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(workers) as executor:
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                loop.run_in_executor(executor, _benchmark_handler, event) for event in batch
+            ))
+            return time.perf_counter() - start
+
+    async def run_processes() -> float:
+        pool = ProcessHandlerPool(workers)
+        pool.start()
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*(pool.run(_benchmark_handler, event) for event in batch))
+            return time.perf_counter() - start
+        finally:
+            pool.shutdown()
+
+    return {
+        "workers": workers,
+        "thread_events_per_second": events / asyncio.run(run_threads()),
+        "process_events_per_second": events / asyncio.run(run_processes()),
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_execution())
@@ -0,0 +1,51 @@
+from typing import Dict, Union
+from pathlib import Path
+import time
+
+from app.core.event_journal import EventJournal, read_journal
+
+
+def benchmark_journal(
+    directory: Union[str, Path],
+    events: int = 200000
+) -> Dict[str, float]:
+    """
+    ジャーナルへの追記性能を計測する
+
+    Args:
+        directory: 計測用のジャーナルディレクトリ
+        events: 追記するイベント数
+
+    Returns:
+        生産者側の1件あたりの時間（マイクロ秒）と書き込みスループット
+    """
+    from app.core.event_system import Event
+
+    batch = [
+        Event(type="price_change", payload={"symbol": f"S{i % 500}", "price": 100.0 + i % 7})
+        for i in range(events)
+    ]
+    journal = EventJournal(directory)
+    journal.start()
+    start = time.perf_counter()
+    for event in batch:
+        journal.append(event)
+    produced = time.perf_counter() - start
+    journal.close()
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    replayed = sum(1 for _ in read_journal(directory))
+    read_elapsed = time.perf_counter() - start
+
+    return {
+        "producer_us_per_event": produced / events * 1e6,
+        "append_events_per_second": events / elapsed,
+        "read_events_per_second": replayed / read_elapsed,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        print(benchmark_journal(tmp))
@@ -0,0 +1,59 @@
+from typing import Dict, List
+import asyncio
+import time
+
+from app.core.event_priority import PriorityScheduler
+
+
+def benchmark_priority(
+    bulk_jobs: int = 400,
+    alert_jobs: int = 20,
+    job_seconds: float = 0.002,
+    max_concurrency: int = 4
+) -> Dict[str, List[float]]:
+    """
+    大量の低優先度処理の中に投入した高優先度処理の待ち時間を比較する
+
+    Args:
+        bulk_jobs: 優先度5の処理数
+        alert_jobs: 優先度1の処理数
+        job_seconds: 1件あたりの処理時間
+        max_concurrency: 同時実行数
+
+    Returns:
+        FIFO実行時とスケジューラ使用時の高優先度処理の完了時間（ミリ秒のp50/p95）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def work() -> float:
+        time.sleep(job_seconds)
+        return time.perf_counter()
+
+    async def run(prioritized: bool) -> List[float]:
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        scheduler = PriorityScheduler(executor, max_concurrency)
+        loop = asyncio.get_running_loop()
+        futures = []
+        start = time.perf_counter()
+        for i in range(bulk_jobs + alert_jobs):
+            is_alert = i % (bulk_jobs // alert_jobs + 1) == 0
+            if prioritized:
+                future = scheduler.submit(work, priority=1 if is_alert else 5)
+            else:
+                future = loop.run_in_executor(executor, work)
+            if is_alert:
+                futures.append(future)
+        finished = await asyncio.gather(*futures)
+        scheduler.cancel_pending()
+        executor.shutdown(wait=True)
+        latencies = sorted((t - start) * 1000 for t in finished)
+        return [latencies[len(latencies) // 2], latencies[int((len(latencies) - 1) * 0.95)]]
+
+    return {
+        "fifo_alert_ms": asyncio.run(run(False)),
+        "priority_alert_ms": asyncio.run(run(True)),
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_priority())
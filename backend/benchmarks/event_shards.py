@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+from app.core.event_journal import encode_event
+from app.core.event_shards import (
+    DEFAULT_IDLE_TIMEOUT,
+    ShardedEventBus,
+    default_partition_key,
+    shard_for,
+)
+
+
+def benchmark_router(events: int = 200000, num_shards: int = 8) -> Dict[str, float]:
+    """
+    親プロセス側のキー計算・エンコード・振り分けの性能を計測する（リングへの書き込みは含まない）
+
+    Args:
+        events: イベント数
+        num_shards: シャード数
+
+    Returns:
+        1秒あたりの振り分けイベント数とシャードごとの偏り（最大/平均）
+    """
+    from app.core.event_system import Event
+
+    batch = [
+        Event(type="price_change", payload={"symbol": f"S{i % 5000}", "price": 100.0})
+        for i in range(events)
+    ]
+    counts = [0] * num_shards
+    start = time.perf_counter()
+    for event in batch:
+        encode_event(event)
+        counts[shard_for(default_partition_key(event), num_shards)] += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "events_per_second": events / elapsed,
+        "imbalance": max(counts) / (events / num_shards),
+    }
+
+
+def _harness_handler(event: Any) -> None:
+    """ハーネス用のCPUバウンドなハンドラー"""
+    total = 0
+    for i in range(event.payload["work"]):
+        total += i * i
+
+
+def _harness_setup(system: Any, index: int) -> None:
+    """ハーネス用のシャード初期化（ハンドラーはイベントループ上で直接実行する）"""
+    from app.core.event_execution import ExecutionMode
+    system.register_handler("price_change", _harness_handler, mode=ExecutionMode.INLINE)
+
+
+def run_scaling_harness(
+    events: int = 20000,
+    work: int = 2000,
+    max_shards: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    シャード数を増やしながらスループットを計測するローカルハーネス
+
+    Args:
+        events: 1回の計測で送るイベント数
+        work: 1イベントあたりの計算量（ループ回数）
+        max_shards: 最大シャード数（省略時はCPUコア数）
+
+    Returns:
+        シャード数ごとの1秒あたりの処理イベント数と1シャード時に対する倍率
+    """
+    from app.core.event_system import Event
+
+    max_shards = max_shards or os.cpu_count() or 1
+    batch = [
+        Event(type="price_change", payload={"symbol": f"S{i % 1024}", "work": work})
+        for i in range(events)
+    ]
+    shard_counts = sorted({1, *[2 ** p for p in range(1, max_shards.bit_length())], max_shards})
+    results = []
+    baseline = None
+
+    async def measure(bus: ShardedEventBus) -> float:
+        start = time.perf_counter()
+        await bus.publish_many(batch)
+        if not await bus.wait_idle():
+            raise RuntimeError(f"Shards did not finish within {DEFAULT_IDLE_TIMEOUT}s")
+        return time.perf_counter() - start
+
+    for num_shards in shard_counts:
+        bus = ShardedEventBus(num_shards, setup=_harness_setup)
+        bus.start()
+        try:
+            elapsed = asyncio.run(measure(bus))
+        finally:
+            bus.stop()
+        throughput = events / elapsed
+        baseline = baseline or throughput
+        results.append({
+            "shards": num_shards,
+            "events_per_second": throughput,
+            "speedup": throughput / baseline,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    print(benchmark_router())
+    for row in run_scaling_harness():
+        print(row)
@@ -0,0 +1,42 @@
+from typing import Dict
+import time
+
+from app.core.particle_simulation import EMITTER_SHAPES, SimulationSettings, simulate_trajectories
+
+
+def benchmark_simulation(
+    count: int = 2000,
+    frames: int = 200,
+    repeat: int = 5,
+    emitter: str = "sphere"
+) -> Dict[str, float]:
+    """
+    軌道計算のスループットを計測する
+
+    Args:
+        count: パーティクル数
+        frames: フレーム数
+        repeat: 計測回数
+        emitter: エミッタ形状
+
+    Returns:
+        1秒あたりのパーティクルフレーム数
+    """
+    settings = SimulationSettings(emitter=emitter, frames=frames)
+    simulate_trajectories(count, (0.0, 64.0, 0.0), 2.0, settings)
+    start = time.perf_counter()
+    for seed in range(repeat):
+        simulate_trajectories(
+            count, (0.0, 64.0, 0.0), 2.0,
+            SimulationSettings(emitter=emitter, frames=frames, seed=seed)
+        )
+    elapsed = time.perf_counter() - start
+    return {
+        "particle_frames_per_second": count * frames * repeat / elapsed,
+        "seconds_per_run": elapsed / repeat,
+    }
+
+
+if __name__ == "__main__":
+    for shape in EMITTER_SHAPES:
+        print(shape, benchmark_simulation(emitter=shape))
@@ -0,0 +1,89 @@
+from typing import Any, Dict, Iterable, List, Tuple
+import random
+import time
+
+from app.core.threshold_index import OP_BETWEEN, OP_GREATER_THAN, OP_LESS_THAN, TriggerIndex
+
+
+def _linear_match(entries: Iterable[Tuple[str, str, Any]], value: float) -> List[str]:
+    """索引を使わずに全条件を走査する（ベンチマークの比較用）"""
+    matched = []
+    for trigger_id, operator, threshold in entries:
+        if operator == OP_GREATER_THAN:
+            hit = value > threshold
+        elif operator == OP_LESS_THAN:
+            hit = value < threshold
+        elif operator == OP_BETWEEN:
+            hit = threshold[0] <= value <= threshold[1]
+        else:
+            hit = value == threshold
+        if hit:
+            matched.append(trigger_id)
+    return matched
+
+
+def benchmark_index(
+    triggers: int = 1_000_000,
+    symbols: int = 5000,
+    ticks: int = 100_000,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    閾値索引の構築とティックごとの照合を計測する
+
+    Args:
+        triggers: トリガー数
+        symbols: 銘柄数
+        ticks: 照合するティック数
+        seed: 乱数シード
+
+    Returns:
+        構築時間・1ティックあたりの照合時間・全走査との比較
+    """
+    rng = random.Random(seed)
+    operators = (OP_GREATER_THAN, OP_LESS_THAN, OP_BETWEEN)
+    index = TriggerIndex()
+    by_symbol: Dict[str, List[Tuple[str, str, Any]]] = {}
+
+    start = time.perf_counter()
+    for i in range(triggers):
+        symbol = f"S{rng.randrange(symbols)}"
+        operator = operators[i % 3]
+        if operator == OP_BETWEEN:
+            low = rng.uniform(50, 150)
+            value: Any = (low, low + rng.uniform(0.1, 5))
+        else:
+            # 現在値から離れた閾値が大半になるよう偏らせる
+            value = 100 + rng.choice((-1, 1)) * rng.expovariate(1 / 20)
+        index.add(i, symbol, "price", operator, value)
+        by_symbol.setdefault(symbol, []).append((str(i), operator, value))
+    build_elapsed = time.perf_counter() - start
+
+    tick_data = [(f"S{rng.randrange(symbols)}", rng.gauss(100, 2)) for _ in range(ticks)]
+    matched = 0
+    start = time.perf_counter()
+    for symbol, price in tick_data:
+        matched += len(index.match(symbol, "price", price))
+    indexed_elapsed = time.perf_counter() - start
+
+    scanned = tick_data[:min(ticks, 2000)]
+    start = time.perf_counter()
+    for symbol, price in scanned:
+        _linear_match(by_symbol.get(symbol, ()), price)
+    linear_elapsed = time.perf_counter() - start
+
+    for symbol, price in scanned[:200]:
+        expected = sorted(_linear_match(by_symbol.get(symbol, ()), price))
+        if sorted(index.match(symbol, "price", price)) != expected:
+            raise AssertionError(f"Index disagrees with a linear scan for {symbol} at {price}")
+
+    return {
+        "build_s": build_elapsed,
+        "indexed_us_per_tick": indexed_elapsed / ticks * 1e6,
+        "linear_us_per_tick": linear_elapsed / len(scanned) * 1e6,
+        "matches_per_tick": matched / ticks,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_index())
@@ -0,0 +1,127 @@
+from typing import Dict, Union
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+import json
+
+import numpy as np
+
+from app.core.trigger_backtest import (
+    COLUMNAR_META,
+    DEFAULT_CHUNK_SIZE,
+    SYMBOL_COLUMN,
+    TIMESTAMP_COLUMN,
+    iter_columnar_ticks,
+    run_backtest,
+)
+
+_NS_PER_SECOND = 1_000_000_000
+_NS_PER_HOUR = 3600 * _NS_PER_SECOND
+
+
+def write_synthetic_ticks(
+    directory: Union[str, Path],
+    symbols: int = 5000,
+    ticks: int = 1_000_000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: int = 0
+) -> None:
+    """
+    ランダムウォークの価格ティックを列指向ファイルに書き出す（ベンチマーク用）
+
+    Args:
+        directory: 出力先ディレクトリ
+        symbols: 銘柄数
+        ticks: ティック数
+        chunk_size: 1塊あたりの行数
+        seed: 乱数シード
+    """
+    rng = np.random.default_rng(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    open_memmap = np.lib.format.open_memmap
+    out_timestamps = open_memmap(directory / f"{TIMESTAMP_COLUMN}.npy", mode="w+", dtype=np.int64, shape=(ticks,))
+    out_symbols = open_memmap(directory / f"{SYMBOL_COLUMN}.npy", mode="w+", dtype=np.int32, shape=(ticks,))
+    out_prices = open_memmap(directory / "price.npy", mode="w+", dtype=np.float64, shape=(ticks,))
+    prices = np.full(symbols, 100.0)
+    start_ns = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * _NS_PER_SECOND)
+    # 1年分のティックが均等に並ぶ間隔
+    step_ns = 365 * 24 * _NS_PER_HOUR // ticks
+    for start in range(0, ticks, chunk_size):
+        end = min(ticks, start + chunk_size)
+        ids = rng.integers(0, symbols, end - start, dtype=np.int32)
+        steps = rng.standard_normal(end - start) * 0.2
+        chunk_prices = np.empty(end - start)
+        for i, (symbol, step) in enumerate(zip(ids.tolist(), steps.tolist())):
+            prices[symbol] += step
+            chunk_prices[i] = prices[symbol]
+        out_timestamps[start:end] = start_ns + np.arange(start, end, dtype=np.int64) * step_ns
+        out_symbols[start:end] = ids
+        out_prices[start:end] = chunk_prices
+    for column in (out_timestamps, out_symbols, out_prices):
+        column.flush()
+    (directory / COLUMNAR_META).write_text(
+        json.dumps({"symbols": [f"S{i}" for i in range(symbols)], "fields": ["price"]})
+    )
+
+
+def benchmark_backtest(
+    symbols: int = 5000,
+    ticks: int = 2_000_000,
+    triggers: int = 200,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    列指向ファイルとCSVに対するバックテストの処理速度を計測する
+
+    Args:
+        symbols: 銘柄数
+        ticks: ティック数
+        triggers: トリガー数（銘柄はランダムに選ぶ）
+        seed: 乱数シード
+
+    Returns:
+        それぞれの入力形式での1秒あたりの読み込みティック数と発火数
+    """
+    import random
+    import tempfile
+
+    rng = random.Random(seed)
+    conditions = ("greater_than", "less_than", "crosses_above", "crosses_below")
+    trigger_list = [
+        SimpleNamespace(
+            id=str(i), symbol=f"S{rng.randrange(symbols)}", type="price",
+            condition=conditions[i % len(conditions)], value=100 + rng.uniform(-3, 3),
+            parameters={}, is_active=False
+        )
+        for i in range(triggers)
+    ]
+    with tempfile.TemporaryDirectory() as workdir:
+        columnar = Path(workdir) / "ticks"
+        write_synthetic_ticks(columnar, symbols, ticks, seed=seed)
+        columnar_result = run_backtest(trigger_list, columnar)
+
+        # CSVは変換に時間がかかるため先頭の一部だけを書き出す
+        csv_path = Path(workdir) / "ticks.csv"
+        csv_rows = 0
+        with open(csv_path, "w") as f:
+            f.write("timestamp,symbol,price\n")
+            for timestamps, chunk_symbols, values in iter_columnar_ticks(columnar):
+                for ns, symbol, price in zip(timestamps.tolist(), chunk_symbols, values["price"].tolist()):
+                    f.write(f"{ns / _NS_PER_SECOND},{symbol},{price}\n")
+                csv_rows += len(timestamps)
+                if csv_rows >= min(ticks, 500_000):
+                    break
+        csv_result = run_backtest(trigger_list, csv_path)
+
+    return {
+        "columnar_ticks_per_s": ticks / columnar_result.elapsed,
+        "columnar_matched_ticks": columnar_result.ticks,
+        "columnar_fires": sum(columnar_result.fires.values()),
+        "csv_ticks_per_s": csv_rows / csv_result.elapsed,
+        "csv_matched_ticks": csv_result.ticks,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_backtest())
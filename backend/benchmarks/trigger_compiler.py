@@ -0,0 +1,77 @@
+from typing import Any, Dict
+import random
+import time
+
+from app.core.trigger_compiler import TriggerEvaluator, interpret_conditions
+from app.models.trigger import ConditionOperator, EventCondition, Trigger
+
+
+def _random_trigger(index: int, rng: Any) -> Trigger:
+    """ベンチマーク用のトリガーを生成する"""
+    conditions = [
+        EventCondition(field="symbol", operator=ConditionOperator.EQUALS, value=f"S{rng.randrange(50)}"),
+        EventCondition(field="price", operator=ConditionOperator.GREATER_THAN, value=rng.uniform(50, 150)),
+        EventCondition(field="volume", operator=ConditionOperator.BETWEEN, value=[1000, rng.randrange(2000, 9000)]),
+    ]
+    if rng.random() < 0.3:
+        conditions.append(EventCondition(
+            field="indicators.rsi", operator=ConditionOperator.LESS_THAN, value=rng.uniform(20, 80)
+        ))
+    if rng.random() < 0.2:
+        conditions.append(EventCondition(field="tags", operator=ConditionOperator.CONTAINS, value="earnings"))
+    rng.shuffle(conditions)
+    return Trigger(id=f"t{index}", name=f"trigger {index}", conditions=conditions, actions=[])
+
+
+def benchmark_compiler(triggers: int = 2000, events: int = 200, seed: int = 0) -> Dict[str, float]:
+    """
+    コンパイル済み評価関数と逐次解釈の性能を比較する
+
+    Args:
+        triggers: トリガー数
+        events: イベント数
+        seed: 乱数シード
+
+    Returns:
+        1評価あたりの時間（マイクロ秒）とコンパイル時間
+    """
+    rng = random.Random(seed)
+    trigger_list = [_random_trigger(i, rng) for i in range(triggers)]
+    payloads = [
+        {
+            "symbol": f"S{rng.randrange(50)}",
+            "price": rng.uniform(50, 150),
+            "volume": rng.randrange(0, 10000),
+            "indicators": {"rsi": rng.uniform(0, 100)},
+            "tags": ["earnings"] if rng.random() < 0.5 else [],
+        }
+        for _ in range(events)
+    ]
+
+    evaluator = TriggerEvaluator()
+    start = time.perf_counter()
+    compiled = [evaluator.get(trigger) for trigger in trigger_list]
+    compile_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive = [[interpret_conditions(t.conditions, p) for t in trigger_list] for p in payloads]
+    naive_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [[evaluate(p) for evaluate in compiled] for p in payloads]
+    compiled_elapsed = time.perf_counter() - start
+
+    if naive != fast:
+        raise AssertionError("Compiled evaluator disagrees with the interpreter")
+
+    evaluations = triggers * events
+    return {
+        "compile_us_per_trigger": compile_elapsed / triggers * 1e6,
+        "interpreted_us_per_eval": naive_elapsed / evaluations * 1e6,
+        "compiled_us_per_eval": compiled_elapsed / evaluations * 1e6,
+        "speedup": naive_elapsed / compiled_elapsed,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_compiler())
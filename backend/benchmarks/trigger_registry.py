@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Tuple
+import random
+import threading
+import time
+
+from app.core.threshold_index import OP_BETWEEN, OP_GREATER_THAN, OP_LESS_THAN, TriggerIndex
+from app.core.trigger_registry import TriggerRegistry
+
+
+def benchmark_registry(
+    triggers: int = 1_000_000,
+    symbols: int = 5000,
+    updates: int = 2000,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    100万件規模のトリガーを読み込んだ状態で、1件ずつの変更が反映されるまでの時間を計測する
+
+    別スレッドで照合を回し続け、変更中も照合が止まらないこと（照合の最大間隔）も計測する。
+    比較として同じトリガーをTriggerIndexで作り直す時間（全件再読み込み）も計測する。
+
+    Args:
+        triggers: トリガー数
+        symbols: 銘柄数
+        updates: 適用する変更の数
+        seed: 乱数シード
+
+    Returns:
+        一括構築時間・変更の反映時間（平均 / p99 / 最大）・変更中の照合の最大間隔・全件再構築時間
+    """
+    rng = random.Random(seed)
+    operators = (OP_GREATER_THAN, OP_LESS_THAN, OP_BETWEEN)
+
+    def condition(i: int) -> Tuple[str, Any]:
+        operator = operators[i % 3]
+        if operator == OP_BETWEEN:
+            low = rng.uniform(50, 150)
+            return operator, (low, low + rng.uniform(0.1, 5))
+        return operator, 100 + rng.choice((-1, 1)) * rng.expovariate(1 / 20)
+
+    class _Trigger:
+        __slots__ = ("id", "symbol", "type", "condition", "value", "parameters", "is_active")
+
+        def __init__(self, i: int):
+            self.id = i
+            self.symbol = f"S{rng.randrange(symbols)}"
+            self.type = "price"
+            self.condition, self.value = condition(i)
+            self.parameters = None
+            self.is_active = True
+
+    definitions = [_Trigger(i) for i in range(triggers)]
+    registry = TriggerRegistry()
+    start = time.perf_counter()
+    registry.load(definitions)
+    load_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    TriggerIndex().load(definitions)
+    rebuild_elapsed = time.perf_counter() - start
+
+    stop = threading.Event()
+    gaps: List[float] = []
+
+    def match_loop() -> None:
+        local = random.Random(seed + 1)
+        previous = time.perf_counter()
+        largest = 0.0
+        while not stop.is_set():
+            registry.match("S%d" % local.randrange(symbols), "price", local.gauss(100, 2))
+            now = time.perf_counter()
+            if now - previous > largest:
+                largest = now - previous
+            previous = now
+        gaps.append(largest)
+
+    reader = threading.Thread(target=match_loop, daemon=True)
+    reader.start()
+    latencies = []
+    for _ in range(updates):
+        i = rng.randrange(triggers)
+        if rng.random() < 0.1:
+            start = time.perf_counter()
+            registry.remove(i)
+        else:
+            operator, value = condition(i)
+            start = time.perf_counter()
+            registry.add(i, f"S{rng.randrange(symbols)}", "price", operator, value)
+        latencies.append(time.perf_counter() - start)
+    stop.set()
+    reader.join()
+
+    # 最終状態を全件走査と突き合わせる
+    snapshot = registry.snapshot()
+    for symbol in list(snapshot.symbols())[:50]:
+        price = rng.gauss(100, 2)
+        expected = []
+        for trigger_id, (entry_symbol, _, operator, key) in registry._entries.items():
+            if entry_symbol != symbol:
+                continue
+            if operator == OP_GREATER_THAN:
+                hit = price > key
+            elif operator == OP_LESS_THAN:
+                hit = price < key
+            else:
+                hit = key[0] <= price <= key[1]
+            if hit:
+                expected.append(trigger_id)
+        if sorted(registry.match(symbol, "price", price)) != sorted(expected):
+            raise AssertionError(f"Registry disagrees with a linear scan for {symbol} at {price}")
+
+    latencies.sort()
+    return {
+        "load_s": load_elapsed,
+        "full_rebuild_s": rebuild_elapsed,
+        "update_mean_ms": sum(latencies) / len(latencies) * 1e3,
+        "update_p99_ms": latencies[int(len(latencies) * 0.99)] * 1e3,
+        "update_max_ms": latencies[-1] * 1e3,
+        "max_match_gap_ms": gaps[0] * 1e3 if gaps else 0.0,
+        "version": registry.version,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_registry())
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List
+import time
+
+import numpy as np
+
+from app.core.threshold_index import OP_BETWEEN, OP_GREATER_THAN, OP_LESS_THAN
+from app.core.trigger_table import TriggerTable
+
+
+def benchmark_table(
+    triggers: int = 1_000_000,
+    symbols: int = 5000,
+    rounds: int = 20,
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    スナップショット評価の所要時間を計測する
+
+    Args:
+        triggers: トリガー数
+        symbols: 銘柄数
+        rounds: 評価回数
+        seed: 乱数シード
+
+    Returns:
+        構築時間・スナップショット作成時間・評価時間（ミリ秒）と発火数
+    """
+    rng = np.random.default_rng(seed)
+    table = TriggerTable(capacity=triggers)
+    names = [f"S{i}" for i in range(symbols)]
+    symbol_of = rng.integers(0, symbols, triggers)
+    # 閾値は大半が現在値から離れた未発火の位置にあるものとする
+    distances = np.abs(rng.standard_normal(triggers)) * 20
+    widths = rng.uniform(0.1, 5, triggers)
+    operators = (OP_GREATER_THAN, OP_LESS_THAN, OP_BETWEEN)
+
+    start = time.perf_counter()
+    for i in range(triggers):
+        operator = operators[i % 3]
+        if operator == OP_GREATER_THAN:
+            value: Any = 100 + distances[i]
+        elif operator == OP_LESS_THAN:
+            value = 100 - distances[i]
+        else:
+            value = (100 + distances[i] - widths[i], 100 + distances[i])
+        table.set(i, names[symbol_of[i]], "price", operator, value, is_active=(i % 10 != 0))
+    build_elapsed = time.perf_counter() - start
+
+    prices = {name: {"price": float(p)} for name, p in zip(names, 100 + rng.standard_normal(symbols) * 2)}
+    start = time.perf_counter()
+    snapshot = table.snapshot(prices)
+    snapshot_elapsed = time.perf_counter() - start
+
+    timings: List[float] = []
+    fired = table.evaluate(snapshot)
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fired = table.evaluate(snapshot)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "build_s": build_elapsed,
+        "snapshot_ms": snapshot_elapsed * 1e3,
+        "evaluate_ms_p50": float(np.median(timings)) * 1e3,
+        "evaluate_ms_min": min(timings) * 1e3,
+        "fired": len(fired),
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark_table())
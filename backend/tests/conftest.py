@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# backendディレクトリをインポートパスに追加して app パッケージを読み込めるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import smtplib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.action_dispatcher import (
+    ActionDeliveryError,
+    ActionDispatcher,
+    SMTPConnectionPool,
+    SMTPServer,
+    build_email,
+)
+from app.core.event_system import EventSystem
+
+
+class _Recorder(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    bodies = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        _Recorder.bodies.append(json.loads(body))
+        status = 500 if self.path == "/fail" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Recorder.bodies = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Recorder)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _action(action_type, **parameters):
+    return SimpleNamespace(action_type=action_type, parameters=parameters)
+
+
+class _FakeSMTP:
+    def __init__(self, fail_on):
+        self.fail_on = fail_on
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, message):
+        error = self.fail_on.get(message["Subject"])
+        if error is not None:
+            raise error
+        self.sent.append(message["Subject"])
+
+    def noop(self):
+        return (250, b"ok")
+
+    def close(self):
+        self.closed = True
+
+    def quit(self):
+        self.closed = True
+
+
+class _FakeSMTPPool(SMTPConnectionPool):
+    def __init__(self, fail_on, **kwargs):
+        super().__init__("localhost", 25, **kwargs)
+        self.fail_on = fail_on
+        self.connections = []
+
+    def _connect(self):
+        self.created += 1
+        connection = _FakeSMTP(self.fail_on)
+        self.connections.append(connection)
+        return connection
+
+
+def test_batched_webhooks_share_one_request(server):
+    async def scenario():
+        dispatcher = ActionDispatcher(batch_size=10, max_latency=1.0)
+        action = _action("webhook", url=f"{server}/hook", batch=True)
+        statuses = await asyncio.gather(*(dispatcher.dispatch(action, {"n": n}) for n in range(10)))
+        await dispatcher.close()
+        return statuses, dispatcher.stats()
+
+    statuses, stats = asyncio.run(scenario())
+    assert statuses == [200] * 10
+    assert _Recorder.bodies == [[{"n": n} for n in range(10)]]
+    assert stats["requests"] == 1 and stats["sent"] == 10
+
+
+def test_connections_are_reused_and_errors_raised(server):
+    async def scenario():
+        dispatcher = ActionDispatcher()
+        for n in range(3):
+            await dispatcher.dispatch(_action("api_call", url=f"{server}/api?n={n}"), {"n": n})
+        with pytest.raises(ActionDeliveryError):
+            await dispatcher.dispatch(_action("webhook", url=f"{server}/fail"), {})
+        with pytest.raises(ValueError):
+            await dispatcher.dispatch(_action("sms"), {})
+        await dispatcher.close()
+        return dispatcher.stats()
+
+    stats = asyncio.run(scenario())
+    pool = next(iter(stats["http_pools"].values()))
+    assert pool["created"] == 1 and pool["reused"] == 3
+    assert stats["sent"] == 3 and stats["failed"] == 2
+
+
+def test_smtp_batch_keeps_per_message_results():
+    pool = _FakeSMTPPool({
+        "refused": smtplib.SMTPRecipientsRefused({}),
+        "dropped": ConnectionResetError("reset"),
+    })
+    messages = [build_email("alerts@localhost", {"to": "a@example.com", "subject": s}, {})
+                for s in ("first", "refused", "second", "dropped", "never")]
+    errors = pool.send_batch(messages)
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], smtplib.SMTPRecipientsRefused)
+    assert all(isinstance(error, ConnectionResetError) for error in errors[3:])
+    assert pool.connections[0].sent == ["first", "second"] and pool.connections[0].closed
+
+
+def test_email_chunk_failure_only_fails_its_messages():
+    async def scenario():
+        dispatcher = ActionDispatcher(max_per_host=2, batch_size=4, max_latency=1.0)
+        dispatcher._smtp_pools[SMTPServer("localhost", 25)] = _FakeSMTPPool({"bad": smtplib.SMTPDataError(554, b"no")})
+        results = await asyncio.gather(*(
+            dispatcher.dispatch(_action("email", to="a@example.com", subject=subject), {})
+            for subject in ("a", "bad", "c", "d")
+        ), return_exceptions=True)
+        await dispatcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results[0] is None and results[2] is None and results[3] is None
+    assert isinstance(results[1], ActionDeliveryError)
+
+
+def test_smtp_credentials_reach_the_pool():
+    dispatcher = ActionDispatcher(smtp_username="alerts", smtp_password="secret", smtp_starttls=True)
+    server = SMTPServer("mail.example.com", 587, "alerts", "secret", True)
+    pool = dispatcher._smtp_pool(server)
+    assert (pool.username, pool.password, pool.starttls) == ("alerts", "secret", True)
+    # パスワードは統計のreprに出さない
+    assert "secret" not in repr(server)
+
+
+def test_execute_action_runs_dispatch_coroutines(server):
+    async def scenario():
+        system = EventSystem()
+        dispatcher = ActionDispatcher()
+        action = _action("webhook", url=f"{server}/hook")
+        action.priority, action.retry_count = 1, 0
+        status = await system.execute_action(action, dispatcher.dispatch, action, {"n": 1})
+        await dispatcher.close()
+        return status
+
+    assert asyncio.run(scenario()) == 200
+    assert _Recorder.bodies[-1] == {"n": 1}
@@ -0,0 +1,48 @@
+from app.core.effect_buffer import EffectBuffer, EffectRecord
+from app.core.effect_budget import EffectBudget
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _particle(count):
+    return EffectRecord("particle", "sparkle", "#FFFFFF", 1.0, 2.0, particle_count=count)
+
+
+def test_particles_scale_to_remaining_budget_and_reset_next_tick():
+    clock = _Clock()
+    budget = EffectBudget(particles_per_tick=100, tick_interval=1.0, clock=clock)
+    assert budget(_particle(60)).particle_count == 60
+    scaled = budget(_particle(80))
+    assert scaled.particle_count == 40
+    assert scaled.intensity == 1.0
+    assert budget(_particle(10)) is None
+
+    clock.now = 1.0
+    assert budget(_particle(80)).particle_count == 80
+    assert budget.scaled == 1 and budget.dropped == 1
+
+
+def test_sounds_and_lights_are_counted_per_tick():
+    budget = EffectBudget(sounds_per_tick=1, lights_per_tick=2, clock=_Clock())
+    sound = {"type": "sound", "volume": 1.0, "duration": 1.0}
+    light = {"type": "light", "intensity": 1.0, "duration": 1.0}
+    assert budget(sound) is sound
+    assert budget(sound) is None
+    assert [budget(light) is light for _ in range(3)] == [True, True, False]
+
+
+def test_buffer_budget_does_not_modify_the_input():
+    budget = EffectBudget(particles_per_tick=50, sounds_per_tick=1, clock=_Clock())
+    records = [_particle(50), _particle(50), EffectRecord("sound", "magic", None, 1.0, 1.0), EffectRecord("sound", "magic", None, 1.0, 1.0)]
+    buffer = EffectBuffer.from_records(records)
+    admitted = budget(buffer)
+    assert [record.particle_count for record in admitted if record.kind == "particle"] == [25, 25]
+    assert sum(record.kind == "sound" for record in admitted) == 1
+    assert list(buffer) == records
+    assert budget.utilization()["particles"] == 1.0
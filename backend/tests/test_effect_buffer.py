@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+
+from app.core.effect_buffer import EffectBuffer, EffectRecord, effect_duration, encode_effect
+
+RECORDS = [
+    EffectRecord("particle", "fire", "#FF0000", 1.0, 2.0, (1.0, 2.0, 3.0), 200, 4.0),
+    EffectRecord("sound", "magic", None, 2.0, 0.5, (0.0, 0.0, 0.0), falloff_distance=5.0, pitch=1.1),
+    EffectRecord("light", "spot", "#FFFFFF", 0.5, 1.0, (4.0, 5.0, 6.0), radius=5.0, attenuation=0.5),
+]
+
+
+def test_records_round_trip_through_buffer():
+    buffer = EffectBuffer.from_records(RECORDS)
+    assert len(buffer) == len(RECORDS)
+    assert list(buffer) == RECORDS
+    assert buffer.to_dicts() == [record.to_dict() for record in RECORDS]
+
+
+def test_concat_and_take_keep_rows():
+    buffer = EffectBuffer.concat([EffectBuffer.from_records(RECORDS[:1]), EffectBuffer.from_records(RECORDS[1:])])
+    assert list(buffer) == RECORDS
+    assert list(buffer.take(np.array([True, False, True]))) == [RECORDS[0], RECORDS[2]]
+
+
+def test_serialization_is_deferred_to_json_encoder():
+    buffer = EffectBuffer.from_records(RECORDS)
+    decoded = json.loads(json.dumps({"effects": buffer, "first": RECORDS[0]}, default=encode_effect))
+    assert decoded["first"]["particle_type"] == "fire"
+    assert [effect["type"] for effect in decoded["effects"]] == ["particle", "sound", "light"]
+    assert effect_duration(buffer) == 2.0
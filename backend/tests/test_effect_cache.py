@@ -0,0 +1,35 @@
+from app.core.effect_cache import EffectTemplateCache
+from app.core.effect_engine import EffectEngine, EffectParameters
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EffectTemplateCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    info = cache.info()
+    assert info["evictions"] == 1
+    assert info["size"] == 2
+    assert (info["hits"], info["misses"]) == (3, 1)
+
+
+def test_get_or_create_calls_factory_once():
+    cache = EffectTemplateCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_create("key", lambda: calls.append(1) or "template") == "template"
+    assert len(calls) == 1
+
+
+def test_engine_reuses_templates_and_seeded_streams_repeat():
+    params = EffectParameters("#FF0000", 1.0, 1.0)
+    first = EffectEngine(seed=42)
+    second = EffectEngine(seed=42)
+    sounds = [first.create_sound_effect(params, "magic") for _ in range(3)]
+    assert sounds == [second.create_sound_effect(params, "magic") for _ in range(3)]
+    assert first.cache_info()["hits"] == 2
+
+    assert first.spawn_rng(5).random() == second.spawn_rng(5).random()
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import numpy as np
+
+from app.core.effect_buffer import EffectBuffer, EffectRecord
+from app.core.effect_culling import EffectCuller, PlayerSpatialIndex
+from app.core.minecraft_bridge import MinecraftConnection
+
+
+def _index(rng, players=200, cell_size=64.0):
+    index = PlayerSpatialIndex(cell_size)
+    for i, (x, y, z) in enumerate(rng.uniform(-500, 500, (players, 3)).tolist()):
+        index.update(f"p{i}", (x, y, z))
+    return index
+
+
+def _brute_nearest(index, position):
+    positions = index.positions_array()
+    return float(np.sqrt(((positions - np.asarray(position)) ** 2).sum(axis=1)).min())
+
+
+def test_nearest_distance_matches_brute_force():
+    rng = np.random.default_rng(0)
+    index = _index(rng)
+    index.remove("p3")
+    for position in rng.uniform(-600, 600, (300, 3)).tolist():
+        expected = _brute_nearest(index, position)
+        found = index.nearest_distance(position, 100.0)
+        if expected <= 100.0:
+            assert found is not None and abs(found - expected) < 1e-9
+        else:
+            assert found is None
+
+
+def test_buffer_culling_agrees_with_per_record_culling():
+    rng = np.random.default_rng(1)
+    for cell_size in (16.0, 64.0, 200.0):
+        index = _index(rng, cell_size=cell_size)
+        records = []
+        for i, position in enumerate(rng.uniform(-600, 600, (500, 3)).tolist()):
+            kind = ("particle", "sound", "light")[i % 3]
+            records.append(EffectRecord(
+                kind, "sparkle", "#FFFFFF", 1.0, 1.0, tuple(position),
+                particle_count=100 if kind == "particle" else 0,
+                falloff_distance=float(rng.uniform(5, 150)) if kind == "sound" else None,
+            ))
+        culler = EffectCuller(index)
+        expected = [record for record in (culler.cull_record(r) for r in records) if record is not None]
+        assert list(culler.cull_buffer(EffectBuffer.from_records(records))) == expected
+
+
+def test_attach_keeps_other_bridge_handlers():
+    class _Socket:
+        def __init__(self, messages):
+            self._messages = iter(messages)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._messages)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    received = []
+
+    async def other_handler(data):
+        received.append(data["player"])
+
+    connection = MinecraftConnection()
+    connection.register_event_handler("player_join", other_handler)
+    index = PlayerSpatialIndex()
+    index.attach(connection)
+    connection.is_connected = True
+    connection.websocket = _Socket([
+        json.dumps({"type": "player_join", "data": {"player": "steve", "position": [1, 2, 3]}}),
+    ])
+    asyncio.run(connection.listen_events())
+
+    assert received == ["steve"]
+    assert len(index) == 1
+    index.detach(connection)
+    assert connection.event_handlers["player_join"] == [other_handler]
@@ -0,0 +1,39 @@
+import pytest
+
+from app.core.effect_engine import EffectEngine, EffectParameters
+
+
+def _single(engine, effect_type, params, subtype):
+    if effect_type == "particle":
+        return engine.create_particle_effect(params, subtype)
+    if effect_type == "sound":
+        return engine.create_sound_effect(params, subtype)
+    return engine.create_light_effect(params, subtype)
+
+
+def test_batch_matches_individual_effects():
+    types = ["particle", "sound", "light", "sound", "particle"]
+    subtypes = ["fire", "magic", "spot", "ambient", "sparkle"]
+    colors = ["#FF0000", "#00FF00", "#0000FF", "#FFFFFF", "#123456"]
+    durations = [1.0, 2.5, 0.5, 3.0, 1.5]
+    intensities = [0.5, 1.0, 2.0, 0.1, 3.0]
+    positions = [(float(i), 64.0, float(-i)) for i in range(len(types))]
+
+    batch = EffectEngine(seed=7).create_effect_batch(
+        types, colors, durations, intensities, positions, subtypes
+    )
+
+    engine = EffectEngine(seed=7)
+    expected = [
+        _single(engine, effect_type, EffectParameters(color, duration, intensity, position), subtype)
+        for effect_type, subtype, color, duration, intensity, position
+        in zip(types, subtypes, colors, durations, intensities, positions)
+    ]
+    assert len(batch) == len(types)
+    assert batch.to_dicts() == expected
+
+
+def test_batch_rejects_unsupported_subtype():
+    engine = EffectEngine(seed=0)
+    with pytest.raises(ValueError):
+        engine.create_effect_batch(["particle"], ["#FFFFFF"], [1.0], [1.0], subtypes=["lava"])
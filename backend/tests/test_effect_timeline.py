@@ -0,0 +1,69 @@
+import asyncio
+
+from app.core.effect_buffer import EffectBuffer, EffectRecord
+from app.core.effect_timeline import EffectScheduler, compile_timeline
+
+
+def _effect(name, duration=1.0):
+    return {"type": "sound", "name": name, "duration": duration}
+
+
+class _Connection:
+    def __init__(self):
+        self.sent = []
+
+    async def send_effect(self, effect):
+        self.sent.append(effect["name"])
+
+    async def send_effect_batch(self, buffer):
+        self.sent.extend(record.subtype for record in buffer)
+
+
+def test_compile_orders_nested_offsets_by_tick():
+    inner = {"type": "combined", "effects": [_effect("c"), _effect("d")], "start_offsets": [0.0, 0.1], "total_duration": 1.1}
+    combined = {
+        "type": "combined",
+        "effects": [_effect("a"), inner, _effect("b")],
+        "start_offsets": [0.2, 0.05, 0.0],
+        "total_duration": 1.2,
+    }
+    timeline = compile_timeline(combined, tick_interval=0.05)
+    assert timeline.ticks.tolist() == [0, 1, 3, 4]
+    assert [[effect["name"] for effect in group] for group in timeline.groups] == [["b"], ["c"], ["d"], ["a"]]
+    assert timeline.effect_count == 4
+
+
+def test_compile_splits_buffers_per_tick():
+    records = [EffectRecord("particle", name, "#FFFFFF", 1.0, 1.0) for name in ("x", "y", "z")]
+    combined = {
+        "type": "combined",
+        "effects": EffectBuffer.from_records(records),
+        "start_offsets": [0.1, 0.0, 0.1],
+        "total_duration": 1.0,
+    }
+    timeline = compile_timeline(combined, tick_interval=0.1)
+    assert timeline.ticks.tolist() == [0, 1]
+    assert [[record.subtype for record in group[0]] for group in timeline.groups] == [["y"], ["x", "z"]]
+
+
+def test_scheduler_releases_in_order_and_cancels():
+    async def scenario():
+        connection = _Connection()
+        scheduler = EffectScheduler(connection)
+        scheduler.start()
+        combined = {
+            "type": "combined",
+            "effects": [_effect("late"), _effect("early")],
+            "start_offsets": [0.02, 0.0],
+            "total_duration": 1.0,
+        }
+        scheduler.schedule(compile_timeline(combined, tick_interval=0.01))
+        cancelled = scheduler.schedule(compile_timeline(combined, tick_interval=0.01), delay=0.05)
+        assert scheduler.cancel(cancelled)
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        return connection.sent, scheduler.active_compositions
+
+    sent, active = asyncio.run(scenario())
+    assert sent == ["early", "late"]
+    assert active == 0
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.core.event_batching import BatchingHandler
+from app.core.event_guard import HandlerLimits
+from app.core.event_system import Event, EventSystem
+
+
+def test_batches_flush_on_size_and_latency():
+    async def scenario():
+        batches = []
+
+        async def handler(batch):
+            batches.append(list(batch))
+
+        batcher = BatchingHandler(handler, batch_size=3, max_latency=0.02)
+        for n in range(4):
+            await batcher.submit(n)
+        await asyncio.sleep(0)
+        full = list(batches)
+        await asyncio.sleep(0.05)
+        return full, batches, batcher.stats()
+
+    full, batches, stats = asyncio.run(scenario())
+    assert full == [[0, 1, 2]]
+    assert batches == [[0, 1, 2], [3]]
+    assert stats["invocations"] == 2 and stats["pending"] == 0
+
+
+def test_coalescing_keeps_latest_event_per_key():
+    async def scenario():
+        batches = []
+        batcher = BatchingHandler(batches.append, batch_size=10, max_latency=1.0, coalesce_key=lambda e: e[0])
+        for event in [("A", 1), ("B", 1), ("A", 2), ("A", 3)]:
+            await batcher.submit(event)
+        await batcher.flush()
+        return batches, batcher.stats()
+
+    batches, stats = asyncio.run(scenario())
+    assert batches == [[("B", 1), ("A", 3)]]
+    assert stats["coalesced"] == 2
+
+
+def test_failed_batch_goes_to_dead_letters():
+    async def scenario():
+        system = EventSystem()
+
+        def handler(batch):
+            raise RuntimeError("boom")
+
+        system.register_handler("price", handler, batch_size=2)
+        await system.process_event(Event("price", {"n": 1}))
+        await system.process_event(Event("price", {"n": 2}))
+        await system.flush_batches()
+        await asyncio.sleep(0.05)
+        letters = system.dead_letters()
+        failures = system.retry_stats()["handler_failures"]
+        system.shutdown()
+        return letters, failures
+
+    letters, failures = asyncio.run(scenario())
+    assert failures == 1
+    assert len(letters) == 1
+    assert [event.payload["n"] for event in letters[0].payload] == [1, 2]
+
+
+def test_batched_async_handler_is_guarded_by_timeout():
+    async def scenario():
+        system = EventSystem()
+
+        async def handler(batch):
+            await asyncio.sleep(1.0)
+
+        system.register_handler("price", handler, batch_size=1, limits=HandlerLimits(timeout=0.01))
+        await system.process_event(Event("price", {}))
+        await system.flush_batches()
+        await asyncio.sleep(0.05)
+        health = [info for info in system.handler_health() if info["batched"]]
+        system.shutdown()
+        return health
+
+    health = asyncio.run(scenario())
+    assert health[0]["timeouts"] == 1 and health[0]["in_flight"] == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from app.core.event_dispatch import HandlerRegistry
+
+
+def _names(entries):
+    return [entry.handler.__name__ for entry in entries]
+
+
+def test_resolve_merges_exact_and_prefix_handlers_in_registration_order():
+    registry = HandlerRegistry()
+
+    def all_events(event): pass
+    def effects(event): pass
+    def sparkle(event): pass
+    def effect_prefix(event): pass
+
+    registry.register("*", all_events)
+    registry.register("effect_sparkle", sparkle)
+    registry.register("effect_*", effects)
+    registry.register("eff*", effect_prefix)
+
+    assert _names(registry.resolve("effect_sparkle")) == ["all_events", "sparkle", "effects", "effect_prefix"]
+    assert _names(registry.resolve("effect_wave")) == ["all_events", "effects", "effect_prefix"]
+    assert _names(registry.resolve("price_change")) == ["all_events"]
+
+
+def test_unregister_replaces_snapshot_without_touching_old_one():
+    registry = HandlerRegistry()
+
+    def effects(event): pass
+
+    registry.register("effect_*", effects)
+    before = registry.table
+    assert _names(before.resolve("effect_wave")) == ["effects"]
+
+    assert registry.unregister("effect_*", effects)
+    assert not registry.unregister("effect_*", effects)
+    assert registry.resolve("effect_wave") == ()
+    assert _names(before.resolve("effect_wave")) == ["effects"]
+    assert registry.patterns() == {}
+
+
+def test_wildcard_only_allowed_at_the_end():
+    registry = HandlerRegistry()
+    with pytest.raises(ValueError):
+        registry.register("effect_*_wave", lambda event: None)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app.core.event_execution import SHARED_MEMORY_MIN_BYTES, ExecutionMode, ProcessHandlerPool
+from app.core.event_system import Event, EventSystem
+
+
+def sum_prices(event):
+    return float(event.payload["prices"].sum()), os.getpid()
+
+
+def crash(event):
+    os._exit(1)
+
+
+def test_large_arrays_are_passed_to_workers():
+    async def scenario():
+        pool = ProcessHandlerPool(max_workers=2)
+        await asyncio.gather(pool.ensure_started(), pool.ensure_started())
+        try:
+            prices = np.arange(SHARED_MEMORY_MIN_BYTES, dtype=np.float64)
+            total, pid = await pool.run(sum_prices, Event("prices", {"prices": prices}))
+            return total, pid, prices.sum(), pool.stats()
+        finally:
+            pool.shutdown()
+
+    total, pid, expected, stats = asyncio.run(scenario())
+    assert total == expected
+    assert pid != os.getpid()
+    assert stats == {"workers": 2, "submitted": 1, "failed": 0, "recycled": 0}
+
+
+def test_crashed_worker_recycles_the_pool():
+    async def scenario():
+        pool = ProcessHandlerPool(max_workers=1)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await pool.run(crash, Event("crash", {}))
+            result = await pool.run(sum_prices, Event("prices", {"prices": np.ones(4)}))
+            return result[0], pool.stats()
+        finally:
+            pool.shutdown()
+
+    total, stats = asyncio.run(scenario())
+    assert total == 4.0
+    assert stats["failed"] == 1 and stats["recycled"] == 1
+
+
+def test_background_pool_start_failure_is_logged(monkeypatch, caplog):
+    async def failing_start(self):
+        raise OSError("no workers")
+
+    monkeypatch.setattr(ProcessHandlerPool, "ensure_started", failing_start)
+
+    async def scenario():
+        system = EventSystem()
+        system.register_handler("prices", sum_prices, mode=ExecutionMode.PROCESS)
+        started = system._pool_start
+        await asyncio.gather(started, return_exceptions=True)
+        await asyncio.sleep(0)
+        system.shutdown()
+        return started
+
+    started = asyncio.run(scenario())
+    assert isinstance(started.exception(), OSError)
+    assert "Failed to start process handler pool: no workers" in caplog.text
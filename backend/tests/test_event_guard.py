@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.event_guard import CircuitBreaker, CircuitOpenError, CircuitState, HandlerGuard, HandlerLimits
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    breaker.record(False, 0.0)
+    assert breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state is CircuitState.OPEN and not breaker.allow()
+
+    clock.now = 10.0
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(False, 0.0)
+    assert breaker.state is CircuitState.OPEN and breaker.trips == 2
+
+    clock.now = 20.0
+    assert breaker.allow()
+    breaker.record(True, 0.0)
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_breaker_opens_on_consecutive_slow_calls():
+    breaker = CircuitBreaker(failure_threshold=None, slow_call_threshold=1.0, slow_call_limit=2)
+    breaker.record(True, 1.5)
+    breaker.record(True, 0.1)
+    breaker.record(True, 1.5)
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record(True, 2.0)
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_timeout_cancels_coroutine_and_releases_permit():
+    async def scenario():
+        guard = HandlerGuard("slow", HandlerLimits(timeout=0.02, max_concurrency=1))
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.call(slow, cancellable=True)
+        await asyncio.sleep(0)
+        result = await guard.call(lambda: asyncio.sleep(0, "next"), cancellable=True)
+        return cancelled, result, guard.health()
+
+    cancelled, result, health = asyncio.run(scenario())
+    assert cancelled == [True] and result == "next"
+    assert health["timeouts"] == 1 and health["in_flight"] == 0 and health["calls"] == 2
+
+
+def test_uncancellable_work_keeps_permit_until_it_finishes():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        guard = HandlerGuard("blocking", HandlerLimits(timeout=0.02, max_concurrency=1))
+        gate = threading.Event()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.call(lambda: loop.run_in_executor(None, gate.wait))
+        # スレッドが終わるまで実行枠は空かないため、次の呼び出しも枠待ちでタイムアウトする
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.call(lambda: asyncio.sleep(0))
+        in_flight = guard.in_flight
+        gate.set()
+        await asyncio.sleep(0.05)
+        result = await guard.call(lambda: asyncio.sleep(0, "free"))
+        return in_flight, result
+
+    assert asyncio.run(scenario()) == (1, "free")
+
+
+def test_open_circuit_rejects_calls():
+    async def scenario():
+        guard = HandlerGuard("failing", HandlerLimits(failure_threshold=1))
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await guard.call(fail)
+        with pytest.raises(CircuitOpenError):
+            await guard.call(fail)
+        return guard.health()
+
+    health = asyncio.run(scenario())
+    assert health["state"] == "open" and health["failures"] == 1 and health["rejected"] == 1
+
+
+def test_non_positive_concurrency_is_rejected():
+    with pytest.raises(ValueError):
+        HandlerGuard("bad", HandlerLimits(max_concurrency=0))
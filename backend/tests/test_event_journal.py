@@ -0,0 +1,85 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.event_journal import (
+    EventJournal,
+    list_segments,
+    read_journal,
+    replay,
+)
+from app.core.event_system import Event
+
+
+class _RecordingSystem:
+    def __init__(self):
+        self.events = []
+
+    async def process_event(self, event):
+        self.events.append(event)
+
+
+def test_events_round_trip_across_segments(tmp_path):
+    journal = EventJournal(tmp_path, segment_size=256)
+    events = [Event("price_change", {"symbol": "AAPL", "n": n, "prices": np.arange(3)}) for n in range(20)]
+    for event in events:
+        assert journal.append(event)
+    # エンコードはappend時点で行うため、後からの書き換えは記録に影響しない
+    events[0].payload["n"] = -1
+    journal.close()
+
+    restored = list(read_journal(tmp_path))
+    assert len(list_segments(tmp_path)) > 1
+    assert [event.payload["n"] for event in restored] == list(range(20))
+    assert restored[1].payload["prices"] == [0, 1, 2]
+    assert restored[1].ingress_ns == events[1].ingress_ns
+    assert restored[1].timestamp == events[1].timestamp
+
+
+def test_corrupted_tail_record_is_skipped(tmp_path):
+    journal = EventJournal(tmp_path, segment_size=4096)
+    for n in range(3):
+        journal.append(Event("tick", {"n": n}))
+    journal.close()
+
+    path = list_segments(tmp_path)[0]
+    data = bytearray(path.read_bytes())
+    # 最後のレコードの本体を壊す（CRCが一致しなくなる）
+    end = data.rindex(b"}")
+    data[end] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert [event.payload["n"] for event in read_journal(tmp_path)] == [0, 1]
+
+
+def test_append_drops_when_pending_records_are_full(tmp_path):
+    journal = EventJournal(tmp_path, max_pending=1)
+    assert journal.append(Event("tick", {}))
+    started = time.perf_counter()
+    assert not journal.append(Event("tick", {}))
+    # 満杯でもイベントループを止めずにすぐ戻る
+    assert time.perf_counter() - started < 0.005
+    stats = journal.stats()
+    assert stats["overflowed"] == 1 and stats["dropped"] == 1 and stats["pending"] == 1
+    journal.close()
+    assert journal.stats()["written"] == 1
+
+
+def test_replay_uses_timestamps_and_caps_gaps(tmp_path):
+    journal = EventJournal(tmp_path, segment_size=4096)
+    start = datetime(2024, 1, 1)
+    for n, offset in enumerate([0, 3600, 3600.02]):
+        journal.append(Event("tick", {"n": n}, timestamp=start + timedelta(seconds=offset)))
+    journal.close()
+
+    system = _RecordingSystem()
+    started = time.perf_counter()
+    count = asyncio.run(replay(system, tmp_path, speed=1.0, max_gap=0.05))
+    elapsed = time.perf_counter() - started
+
+    assert count == 3
+    assert [event.payload["n"] for event in system.events] == [0, 1, 2]
+    assert system.events[2].timestamp == start + timedelta(seconds=3600.02)
+    assert 0.06 <= elapsed < 1.0
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.event_priority import PriorityScheduler
+
+
+def _run_order(max_wait):
+    """1つの実行枠を塞いだ状態で優先度5と1の処理を交互に投入し、実行順を返す"""
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            scheduler = PriorityScheduler(executor, max_concurrency=1, max_wait=max_wait)
+            gate = threading.Event()
+            order = []
+            blocker = scheduler.submit(gate.wait, priority=3)
+            futures = [
+                scheduler.submit(order.append, f"{priority}-{n}", priority=priority)
+                for n in range(3) for priority in (5, 1)
+            ]
+            gate.set()
+            await asyncio.gather(blocker, *futures)
+            return order, scheduler.stats()
+
+    return asyncio.run(scenario())
+
+
+def test_higher_priority_lane_runs_first():
+    order, stats = _run_order(max_wait=60.0)
+    assert order == ["1-0", "1-1", "1-2", "5-0", "5-1", "5-2"]
+    assert stats["lanes"][1]["completed"] == 3 and stats["running"] == 0
+
+
+def test_overdue_jobs_run_in_arrival_order():
+    order, stats = _run_order(max_wait=0.0)
+    assert order == ["5-0", "1-0", "5-1", "1-1", "5-2", "1-2"]
+    assert stats["lanes"][5]["aged"] == 3
+
+
+def test_cancel_pending_and_priority_validation():
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            scheduler = PriorityScheduler(executor, max_concurrency=1)
+            gate = threading.Event()
+            blocker = scheduler.submit(gate.wait)
+            pending = scheduler.submit(print, priority=2)
+            with pytest.raises(ValueError):
+                scheduler.submit(print, priority=6)
+            cancelled = scheduler.cancel_pending()
+            gate.set()
+            await blocker
+            return cancelled, pending.cancelled()
+
+    assert asyncio.run(scenario()) == (1, True)
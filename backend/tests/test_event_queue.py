@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.event_queue import BoundedEventQueue, OverflowPolicy
+from app.core.event_system import Event, EventSystem
+
+
+def test_drop_policies_keep_the_expected_items():
+    async def scenario():
+        oldest = BoundedEventQueue(2, OverflowPolicy.DROP_OLDEST)
+        newest = BoundedEventQueue(2, OverflowPolicy.DROP_NEWEST)
+        for item in range(4):
+            oldest.put_nowait(item)
+            newest.put_nowait(item)
+        return (
+            [await oldest.get() for _ in range(2)],
+            [await newest.get() for _ in range(2)],
+            oldest.stats(),
+            newest.stats(),
+        )
+
+    kept_oldest, kept_newest, oldest_stats, newest_stats = asyncio.run(scenario())
+    assert kept_oldest == [2, 3]
+    assert kept_newest == [0, 1]
+    assert oldest_stats["dropped_oldest"] == 2 and oldest_stats["high_watermark"] == 2
+    assert newest_stats["dropped_newest"] == 2 and newest_stats["published"] == 2
+
+
+def test_block_policy_waits_for_space():
+    async def scenario():
+        queue = BoundedEventQueue(1)
+        await queue.put("first")
+        blocked = asyncio.ensure_future(queue.put("second"))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        assert await queue.get() == "first"
+        await blocked
+        return waiting, await queue.get()
+
+    assert asyncio.run(scenario()) == (True, "second")
+
+
+def test_invalid_max_size_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedEventQueue(0)
+
+
+def test_workers_process_published_events_and_drain_on_stop():
+    async def scenario():
+        system = EventSystem()
+        seen = []
+
+        async def handler(event):
+            await asyncio.sleep(0)
+            seen.append(event.payload["n"])
+
+        system.register_handler("tick", handler)
+        system.start_workers(num_workers=3, max_queue_size=4)
+        for n in range(20):
+            await system.publish(Event("tick", {"n": n}))
+        await system.stop_workers(drain=True)
+        stats = system.queue_stats()
+        system.shutdown()
+        return seen, stats
+
+    seen, stats = asyncio.run(scenario())
+    assert sorted(seen) == list(range(20))
+    assert stats["processed"] == 20 and stats["workers"] == 0
+    assert stats["high_watermark"] <= 4
+
+
+def test_publish_requires_running_workers():
+    system = EventSystem()
+    try:
+        with pytest.raises(RuntimeError):
+            system.publish_nowait(Event("tick", {}))
+    finally:
+        system.shutdown()
@@ -0,0 +1,109 @@
+import asyncio
+import random
+
+import pytest
+
+from app.core.event_retry import DeadLetterStore, RetryManager, RetryPolicy
+from app.core.timer_wheel import TimerWheel
+
+
+def test_timer_wheel_fires_each_timer_on_its_tick():
+    wheel = TimerWheel(tick=1.0, slots=8, autostart=False)
+    fired = []
+    for delay in (1, 3, 8, 9, 20):
+        wheel.schedule(delay, fired.append, delay)
+    cancelled = wheel.schedule(5, fired.append, 5)
+    assert wheel.cancel(cancelled) and not wheel.cancel(cancelled)
+
+    wheel.advance(2)
+    assert fired == [1]
+    wheel.advance(7)
+    assert fired == [1, 3, 8, 9]
+    wheel.advance(10)
+    assert fired == [1, 3, 8, 9]
+    wheel.advance(1)
+    assert fired == [1, 3, 8, 9, 20]
+    assert len(wheel) == 0 and wheel.fired == 5
+
+
+def test_timer_wheel_large_advance_matches_single_steps():
+    rng = random.Random(1)
+    delays = [rng.uniform(0.0, 50.0) for _ in range(200)]
+    stepped = TimerWheel(tick=1.0, slots=16, autostart=False)
+    jumped = TimerWheel(tick=1.0, slots=16, autostart=False)
+    stepped_fired, jumped_fired = [], []
+    for n, delay in enumerate(delays):
+        stepped.schedule(delay, stepped_fired.append, n)
+        jumped.schedule(delay, jumped_fired.append, n)
+    for _ in range(60):
+        stepped.advance()
+    for ticks in (7, 1, 30, 22):
+        jumped.advance(ticks)
+    assert stepped_fired == jumped_fired
+    assert sorted(stepped_fired) == list(range(200))
+
+
+def test_backoff_delay_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+    rng = random.Random(0)
+    for attempt in range(1, 10):
+        assert 0.0 <= policy.delay(attempt, rng) <= min(3.0, 0.5 * 2 ** (attempt - 1))
+
+
+def test_retry_succeeds_without_holding_a_task_while_waiting():
+    async def scenario():
+        wheel = TimerWheel(tick=0.01, autostart=False)
+        manager = RetryManager(wheel=wheel, seed=0)
+        calls = []
+
+        async def attempt():
+            calls.append(len(calls))
+            if len(calls) < 3:
+                raise RuntimeError("temporary")
+            return "ok"
+
+        future = manager.submit("action", attempt, RetryPolicy(max_retries=3, base_delay=0.1))
+        while not future.done():
+            await asyncio.sleep(0)
+            wheel.advance(wheel.slots)
+        return future.result(), len(calls), manager.stats()
+
+    result, calls, stats = asyncio.run(scenario())
+    assert (result, calls) == ("ok", 3)
+    assert stats == {"scheduled": 2, "succeeded": 1, "waiting": 0, "dead_letters": 0}
+
+
+def test_exhausted_retries_are_dead_lettered_and_replayable():
+    async def scenario():
+        wheel = TimerWheel(tick=0.01, autostart=False)
+        manager = RetryManager(wheel=wheel, seed=0)
+        healthy = []
+
+        async def attempt():
+            if not healthy:
+                raise RuntimeError("down")
+            return "recovered"
+
+        future = manager.submit("action", attempt, RetryPolicy(max_retries=1), payload={"id": 7})
+        while not future.done():
+            await asyncio.sleep(0)
+            wheel.advance(wheel.slots)
+        with pytest.raises(RuntimeError):
+            future.result()
+        letter = manager.dead_letters.list()[0]
+        healthy.append(True)
+        result = await manager.dead_letters.replay(letter.letter_id)
+        return letter, result, len(manager.dead_letters)
+
+    letter, result, remaining = asyncio.run(scenario())
+    assert letter.attempts == 2 and letter.payload == {"id": 7}
+    assert letter.error == "RuntimeError: down"
+    assert (result, remaining) == ("recovered", 0)
+
+
+def test_dead_letter_store_evicts_oldest():
+    store = DeadLetterStore(max_size=2)
+    for n in range(3):
+        store.add("action", n, RuntimeError("x"), 1)
+    assert [letter.payload for letter in store.list()] == [1, 2]
+    assert store.evicted == 1
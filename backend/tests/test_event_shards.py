@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import time
+
+from app.core.event_shards import SharedRingBuffer, ShardedEventBus, shard_for
+from app.core.event_system import Event
+
+
+def record_events(directory, system, index):
+    """シャードごとに処理したイベントをファイルに追記するハンドラーを登録する"""
+    def handler(event):
+        with open(directory / f"{index}.log", "a") as f:
+            f.write(f"{event.payload['symbol']},{event.payload['n']}\n")
+    system.register_handler("tick", handler, mode="inline")
+
+
+def slow_events(system, index):
+    system.register_handler("tick", lambda event: time.sleep(0.01), mode="inline")
+
+
+def test_ring_buffer_wraps_and_reports_partial_writes():
+    ring = SharedRingBuffer(capacity=32)
+    try:
+        # 1フレーム14バイト（長さ4バイト + 本体）なので3フレーム目は入らず、空いた後の書き込みは末尾で折り返す
+        assert ring.put_batch([b"a" * 10, b"b" * 10, b"c" * 10]) == 2
+        assert ring.get_batch(max_frames=1) == [b"a" * 10]
+        assert ring.put_batch([b"c" * 10]) == 1
+        assert ring.get_batch() == [b"b" * 10, b"c" * 10]
+        assert len(ring) == 0
+    finally:
+        ring.close()
+
+
+def test_shard_assignment_is_stable():
+    assert shard_for("AAPL", 8) == shard_for("AAPL", 8)
+    assert {shard_for(f"SYM{n}", 4) for n in range(100)} == {0, 1, 2, 3}
+
+
+def test_events_for_a_key_are_processed_in_order(tmp_path):
+    async def scenario():
+        bus = ShardedEventBus(num_shards=2, setup=functools.partial(record_events, tmp_path), ring_size=4096)
+        bus.start()
+        try:
+            events = [Event("tick", {"symbol": f"SYM{n % 5}", "n": n}) for n in range(300)]
+            assert await bus.publish_many(events) == 300
+            assert await bus.wait_idle(timeout=10.0)
+            return bus.stats()
+        finally:
+            bus.stop()
+
+    stats = asyncio.run(scenario())
+    assert sum(stats["processed"]) == 300
+    seen = {}
+    for path in tmp_path.glob("*.log"):
+        for line in path.read_text().splitlines():
+            symbol, n = line.split(",")
+            seen.setdefault(symbol, []).append(int(n))
+    assert sorted(seen) == [f"SYM{n}" for n in range(5)]
+    for symbol, numbers in seen.items():
+        assert numbers == sorted(numbers) and len(numbers) == 60
+
+
+def test_publish_nowait_rejects_when_ring_is_full():
+    async def scenario():
+        bus = ShardedEventBus(num_shards=1, setup=slow_events, ring_size=256)
+        bus.start()
+        try:
+            results = [bus.publish_nowait(Event("tick", {"n": n})) for n in range(50)]
+            await bus.publish(Event("tick", {"n": 50}), timeout=10.0)
+            idle = await bus.wait_idle(timeout=10.0)
+            return results, idle, bus.stats()
+        finally:
+            bus.stop()
+
+    results, idle, stats = asyncio.run(scenario())
+    assert not all(results)
+    assert idle
+    assert stats["rejected"] == [results.count(False)]
+    assert stats["processed"] == stats["published"] == [results.count(True) + 1]
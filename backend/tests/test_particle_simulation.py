@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.core.effect_buffer import EffectRecord
+from app.core.particle_simulation import (
+    CHUNK_HEADER,
+    CHUNK_MAGIC,
+    SimulatedParticleEffect,
+    SimulationSettings,
+    TrajectoryCache,
+    simulate_trajectories,
+)
+
+
+def test_drag_free_motion_has_constant_gravity_acceleration():
+    settings = SimulationSettings(frames=30, drag=0.0)
+    positions = simulate_trajectories(50, (0.0, 64.0, 0.0), 2.0, settings).astype(np.float64)
+    acceleration = np.diff(positions, n=2, axis=1) / settings.frame_interval ** 2
+    assert np.allclose(acceleration, settings.gravity, atol=1e-2)
+
+
+def test_drag_slows_particles_compared_to_free_motion():
+    free = simulate_trajectories(50, (0.0, 0.0, 0.0), 0.0, SimulationSettings(emitter="ring", drag=0.0, gravity=(0.0, 0.0, 0.0)))
+    damped = simulate_trajectories(50, (0.0, 0.0, 0.0), 0.0, SimulationSettings(emitter="ring", drag=2.0, gravity=(0.0, 0.0, 0.0)))
+    assert np.all(np.linalg.norm(damped[:, -1], axis=1) < np.linalg.norm(free[:, -1], axis=1))
+
+
+def test_cache_translates_cached_trajectories():
+    settings = SimulationSettings(emitter="cone", seed=3)
+    cache = TrajectoryCache()
+    first = cache.get(20, (10.0, 64.0, -5.0), 1.0, settings)
+    second = cache.get(20, (0.0, 0.0, 0.0), 1.0, settings)
+    assert np.allclose(first, simulate_trajectories(20, (10.0, 64.0, -5.0), 1.0, settings), atol=1e-4)
+    assert np.allclose(first - second, (10.0, 64.0, -5.0), atol=1e-4)
+    assert cache.info()["hits"] == 1
+
+
+def test_chunks_decode_back_to_relative_positions():
+    settings = SimulationSettings(frames=25)
+    origin = (1.0, 2.0, 3.0)
+    trajectories = simulate_trajectories(8, origin, 1.0, settings)
+    effect = SimulatedParticleEffect(
+        EffectRecord("particle", "sparkle", "#FFFFFF", 1.0, 1.0, origin, 8), trajectories, settings.frame_interval
+    )
+    frames = []
+    for chunk in effect.iter_chunks(frames_per_chunk=10):
+        magic, start, count, particles, _ = CHUNK_HEADER.unpack_from(chunk)
+        assert magic == CHUNK_MAGIC and start == len(frames) and particles == 8
+        frames.extend(np.frombuffer(chunk[CHUNK_HEADER.size:], dtype="<f2").reshape(count, particles, 3))
+    decoded = np.asarray(frames, dtype=np.float32).transpose(1, 0, 2) + np.asarray(origin, dtype=np.float32)
+    assert np.allclose(decoded, trajectories, atol=0.05)
+
+
+def test_unknown_emitter_is_rejected():
+    with pytest.raises(ValueError):
+        simulate_trajectories(1, (0.0, 0.0, 0.0), 0.0, SimulationSettings(emitter="cube"))
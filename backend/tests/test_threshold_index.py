@@ -0,0 +1,87 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.threshold_index import IntervalTree, TriggerIndex
+
+OPERATORS = ("greater_than", "less_than", "between", "equals")
+
+
+def _linear_match(conditions, symbol, field, value):
+    matched = set()
+    for trigger_id, (cond_symbol, cond_field, operator, threshold) in conditions.items():
+        if (cond_symbol, cond_field) != (symbol, field):
+            continue
+        if (
+            (operator == "greater_than" and value > threshold)
+            or (operator == "less_than" and value < threshold)
+            or (operator == "between" and threshold[0] <= value <= threshold[1])
+            or (operator == "equals" and value == threshold)
+        ):
+            matched.add(trigger_id)
+    return matched
+
+
+def _random_condition(rng):
+    operator = rng.choice(OPERATORS)
+    if operator == "between":
+        low = rng.randint(0, 100)
+        threshold = (low, low + rng.randint(0, 30))
+    else:
+        threshold = rng.randint(0, 100)
+    return rng.choice(["AAPL", "MSFT"]), rng.choice(["price", "volume"]), operator, threshold
+
+
+def test_index_matches_linear_scan_through_updates():
+    rng = random.Random(7)
+    index = TriggerIndex()
+    conditions = {}
+    for step in range(3000):
+        trigger_id = str(rng.randrange(300))
+        if rng.random() < 0.2:
+            assert index.remove(trigger_id) == (conditions.pop(trigger_id, None) is not None)
+        else:
+            conditions[trigger_id] = _random_condition(rng)
+            symbol, field, operator, threshold = conditions[trigger_id]
+            index.add(trigger_id, symbol, field, operator, threshold)
+        if step % 10 == 0:
+            symbol, field = rng.choice(["AAPL", "MSFT"]), rng.choice(["price", "volume"])
+            value = rng.choice([rng.randint(-5, 135), rng.uniform(-5, 135)])
+            assert set(index.match(symbol, field, value)) == _linear_match(conditions, symbol, field, value)
+    assert len(index) == len(conditions)
+    assert index.stats()["triggers"] == len(conditions)
+
+
+def test_sync_trigger_skips_inactive_and_crossing_conditions():
+    index = TriggerIndex()
+    trigger = SimpleNamespace(
+        id=1, symbol="AAPL", type="price_threshold", condition="greater_than",
+        value=100, parameters={"field": "price"}, is_active=True
+    )
+    assert index.sync_trigger(trigger)
+    assert index.match_tick("AAPL", {"price": 101, "volume": 5}) == ["1"]
+
+    trigger.condition = "crosses_above"
+    assert not index.sync_trigger(trigger)
+    assert 1 not in index
+
+    trigger.condition, trigger.is_active = "less_than", False
+    assert not index.sync_trigger(trigger) and len(index) == 0
+
+
+def test_interval_tree_copies_leave_original_unchanged():
+    tree = IntervalTree(seed=0)
+    for n in range(50):
+        tree.insert(n, n + 10, str(n))
+    added = tree.inserted(0, 100, "wide")
+    removed = tree.removed(5, "5")
+    assert sorted(tree.stab(12), key=int) == [str(n) for n in range(2, 13)]
+    assert "wide" in added.stab(12) and "wide" not in tree.stab(12)
+    assert "5" not in removed.stab(12) and "5" in tree.stab(12)
+    assert (len(tree), len(added), len(removed)) == (50, 51, 49)
+
+
+def test_invalid_range_is_rejected():
+    with pytest.raises(ValueError):
+        TriggerIndex().add(1, "AAPL", "price", "between", [10, 5])
@@ -0,0 +1,98 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.tracing import SpanRecorder, current_trace
+
+
+def test_ring_buffer_keeps_newest_spans_in_order():
+    recorder = SpanRecorder(capacity=4)
+    for n in range(6):
+        recorder.record("handler", n, n + 10, trace_id=n)
+    assert list(recorder.snapshot()["trace_id"]) == [2, 3, 4, 5]
+
+
+def test_concurrent_stage_registration_assigns_distinct_codes():
+    recorder = SpanRecorder()
+    barrier = threading.Barrier(8)
+
+    def worker(stage):
+        barrier.wait()
+        for n in range(100):
+            recorder.record(stage, 0, n)
+
+    threads = [threading.Thread(target=worker, args=(f"stage-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = recorder.stage_stats()
+    assert sorted(stats) == [f"stage-{i}" for i in range(8)]
+    assert all(stage["count"] == 100 for stage in stats.values())
+
+
+def test_snapshot_never_sees_unwritten_slots():
+    recorder = SpanRecorder(capacity=1 << 20)
+    stop = threading.Event()
+    # スレッドの切り替えを頻繁にして、払い出しと書き込みの間に割り込まれやすくする
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def worker():
+        while not stop.is_set():
+            recorder.record("handler", 1, 2, trace_id=1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        sizes = []
+        for _ in range(50):
+            spans = recorder.snapshot()
+            assert np.all(spans["end_ns"] == 2) and np.all(spans["trace_id"] == 1)
+            sizes.append(len(spans))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
+    assert sizes == sorted(sizes)
+
+
+def test_span_records_only_inside_a_trace():
+    recorder = SpanRecorder()
+    with recorder.span("dispatch"):
+        pass
+    assert len(recorder.snapshot()) == 0
+
+    trace = recorder.new_trace(0, "price_change")
+    token = current_trace.set(trace)
+    try:
+        with recorder.span("dispatch"):
+            pass
+    finally:
+        current_trace.reset(token)
+    spans = recorder.snapshot()
+    assert list(spans["trace_id"]) == [trace.trace_id]
+
+
+def test_stats_and_export(tmp_path):
+    recorder = SpanRecorder()
+    for ms in range(1, 101):
+        recorder.record("send", 0, ms * 1_000_000, trace_id=ms)
+    stats = recorder.stage_stats()["send"]
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == pytest.approx(np.percentile(np.arange(1, 101), 50))
+    assert stats["max_ms"] == 100.0
+
+    lines = recorder.export(tmp_path / "spans.csv").read_text().splitlines()
+    assert lines[0] == "trace_id,stage,start_ns,end_ns,duration_ns"
+    assert lines[1] == "1,send,0,1000000,1000000"
+    assert len(lines) == 101
+
+
+def test_invalid_capacity_is_rejected():
+    with pytest.raises(ValueError):
+        SpanRecorder(capacity=0)
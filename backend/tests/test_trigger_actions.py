@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.event_system import EventSystem
+from app.core.trigger_actions import TriggerActionRunner, trigger_actions
+from app.models.trigger import ActionType, Trigger, TriggerAction
+
+
+class _GatedDispatcher:
+    """送信開始の順番を記録し、ゲートが開くまで完了しないディスパッチャー"""
+
+    def __init__(self, fail_first=0):
+        self.gate = asyncio.Event()
+        self.started = []
+        self.fail_first = fail_first
+
+    async def dispatch(self, action, payload):
+        self.started.append(payload["trigger_id"])
+        if self.fail_first:
+            self.fail_first -= 1
+            raise ConnectionError("refused")
+        await self.gate.wait()
+        return 200
+
+
+def _trigger(trigger_id, priority, retry_count=0):
+    action = TriggerAction(action_type=ActionType.WEBHOOK, parameters={}, priority=priority, retry_count=retry_count)
+    return Trigger(id=trigger_id, name=trigger_id, conditions=[], actions=[action])
+
+
+def test_priority_one_action_overtakes_queued_priority_five_actions():
+    async def scenario():
+        dispatcher = _GatedDispatcher()
+        runner = TriggerActionRunner(dispatcher, EventSystem())
+        runner.load_triggers([_trigger(f"low-{n}", 5) for n in range(8)] + [_trigger("urgent", 1)])
+        for n in range(8):
+            runner.fire(f"low-{n}", {"trigger_id": f"low-{n}"})
+        runner.fire("urgent", {"trigger_id": "urgent"})
+        # 実行枠（4）が低優先度で埋まり、残りはレーンで待っている
+        for _ in range(10):
+            await asyncio.sleep(0)
+        running = list(dispatcher.started)
+        dispatcher.gate.set()
+        await runner.drain()
+        return running, dispatcher.started, runner.stats()
+
+    running, started, stats = asyncio.run(scenario())
+    assert running == ["low-0", "low-1", "low-2", "low-3"]
+    assert started[4] == "urgent"
+    assert stats["scheduled"] == 9 and stats["failed"] == 0 and stats["running"] == 0
+
+
+def test_failed_action_is_retried_with_its_retry_count():
+    async def scenario():
+        dispatcher = _GatedDispatcher(fail_first=1)
+        dispatcher.gate.set()
+        system = EventSystem()
+        runner = TriggerActionRunner(dispatcher, system)
+        runner.sync_trigger(_trigger("t1", 2, retry_count=1))
+        results = await asyncio.gather(*runner.fire("t1", {"trigger_id": "t1"}))
+        return results, dispatcher.started
+
+    results, started = asyncio.run(scenario())
+    assert results == [200] and started == ["t1", "t1"]
+
+
+def test_actions_follow_trigger_updates():
+    runner = TriggerActionRunner(SimpleNamespace(dispatch=None), EventSystem())
+    api_trigger = SimpleNamespace(
+        id=7, is_active=True,
+        parameters={"actions": [{"action_type": "email", "parameters": {"to": "a@example.com"}, "priority": 4}]}
+    )
+    assert runner.sync_trigger(api_trigger) == 1
+    assert trigger_actions(api_trigger)[0].priority == 4
+
+    api_trigger.is_active = False
+    assert runner.sync_trigger(api_trigger) == 0
+    assert len(runner) == 0
+    assert not runner.remove(7)
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.trigger_backtest import convert_csv_to_columnar, iter_csv_ticks, run_backtest
+
+
+def _trigger(condition, value, symbol="AAPL", field="price", actions=1, trigger_id=None, **parameters):
+    return SimpleNamespace(
+        id=trigger_id, symbol=symbol, type="price_threshold", condition=condition, value=value,
+        parameters={"field": field, **parameters}, actions=[object()] * actions, is_active=False
+    )
+
+
+def _write_ticks(path):
+    lines = ["timestamp,symbol,price,volume"]
+    for n in range(200):
+        # 1時間に20ティック、AAPLは100を中心に上下し、MSFTは対象外
+        seconds = n * 180
+        price = 100 + (10 if n % 4 < 2 else -10)
+        lines.append(f"{seconds},AAPL,{price},{n}")
+        lines.append(f"{seconds},MSFT,500,")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_csv_and_columnar_sources_give_the_same_result(tmp_path):
+    csv_path = tmp_path / "ticks.csv"
+    _write_ticks(csv_path)
+    assert convert_csv_to_columnar(csv_path, tmp_path / "columns", chunk_size=33) == 400
+
+    triggers = [
+        _trigger("crosses_above", 100, actions=2),
+        _trigger("greater_than", 105),
+        _trigger("greater_than", 199, field="volume", trigger_id=7),
+    ]
+    from_csv = run_backtest(triggers, csv_path, chunk_size=17)
+    from_columns = run_backtest(triggers, tmp_path / "columns", chunk_size=50)
+
+    assert from_csv.to_dict() | {"elapsed": 0} == from_columns.to_dict() | {"elapsed": 0}
+    assert from_csv.ticks == 200
+    # 4ティック周期で1回上抜けする（最初の値では発火しない）
+    assert from_csv.fires == {"0": 49, "1": 100, "7": 0}
+    assert from_csv.first_tick == datetime(1970, 1, 1, tzinfo=timezone.utc)
+    assert sum(from_csv.actions_per_hour.values()) == 49 * 2 + 100
+    assert len(from_csv.actions_per_hour) == 10
+
+
+def test_cooldown_uses_tick_time_and_fire_times_are_capped(tmp_path):
+    csv_path = tmp_path / "ticks.csv"
+    _write_ticks(csv_path)
+    result = run_backtest([_trigger("greater_than", 105, cooldown=3600)], csv_path, max_timestamps=3)
+    assert result.fires == {"0": 10}
+    assert [t.hour for t in result.fire_times["0"]] == [0, 1, 2]
+
+
+def test_csv_reader_filters_symbols_and_parses_iso_timestamps(tmp_path):
+    csv_path = tmp_path / "ticks.csv"
+    csv_path.write_text(
+        "timestamp,symbol,price\n"
+        "2024-01-01T00:00:00,AAPL,1.5\n"
+        "2024-01-01T00:00:01,MSFT,2.5\n"
+        "2024-01-01T00:00:02,AAPL,\n"
+    )
+    chunks = list(iter_csv_ticks(csv_path, symbols={"AAPL"}))
+    assert len(chunks) == 1
+    timestamps, symbols, values = chunks[0]
+    assert symbols == ["AAPL", "AAPL"]
+    assert timestamps[1] - timestamps[0] == 2_000_000_000
+    assert values["price"][0] == 1.5 and np.isnan(values["price"][1])
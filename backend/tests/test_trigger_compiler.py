@@ -0,0 +1,80 @@
+import random
+from datetime import datetime
+
+from app.core.trigger_compiler import TriggerEvaluator, compile_conditions, interpret_conditions
+from app.models.trigger import ConditionOperator, EventCondition, Trigger
+
+
+def _random_trigger(index, rng):
+    conditions = [
+        EventCondition(field="symbol", operator=ConditionOperator.EQUALS, value=f"S{rng.randrange(50)}"),
+        EventCondition(field="price", operator=ConditionOperator.GREATER_THAN, value=rng.uniform(50, 150)),
+        EventCondition(field="volume", operator=ConditionOperator.BETWEEN, value=[1000, rng.randrange(2000, 9000)]),
+        EventCondition(field="indicators.rsi", operator=ConditionOperator.LESS_THAN, value=rng.uniform(20, 80)),
+        EventCondition(field="tags", operator=ConditionOperator.CONTAINS, value="earnings"),
+    ]
+    rng.shuffle(conditions)
+    return Trigger(id=f"t{index}", name=f"trigger {index}", conditions=conditions[:rng.randrange(1, 6)], actions=[])
+
+
+def _payload(rng):
+    return {
+        "symbol": f"S{rng.randrange(50)}",
+        "price": rng.uniform(50, 150),
+        "volume": rng.randrange(0, 10000),
+        "indicators": {"rsi": rng.uniform(0, 100)},
+        "tags": ["earnings"] if rng.random() < 0.5 else [],
+    }
+
+
+def test_compiled_and_interpreted_evaluation_agree():
+    rng = random.Random(1)
+    triggers = [_random_trigger(i, rng) for i in range(200)]
+    payloads = [_payload(rng) for _ in range(50)]
+    # フィールドが欠けている・型が合わないデータも含める
+    payloads += [{}, {"symbol": "S1", "price": "high"}, {"symbol": "S1", "price": 100, "indicators": None}]
+
+    for trigger in triggers:
+        compiled = compile_conditions(trigger.conditions)
+        for payload in payloads:
+            assert compiled(payload) == interpret_conditions(trigger.conditions, payload)
+
+
+def test_tolerance_and_between_conditions():
+    conditions = [
+        EventCondition(field="price", operator=ConditionOperator.EQUALS, value=100,
+                       additional_params={"tolerance": 0.5}),
+        EventCondition(field="volume", operator=ConditionOperator.BETWEEN, value=[10, 20]),
+    ]
+    compiled = compile_conditions(conditions)
+    assert compiled({"price": 100.4, "volume": 10})
+    assert not compiled({"price": 100.6, "volume": 10})
+    assert not compiled({"price": 100, "volume": 21})
+
+
+def test_cache_is_invalidated_when_updated_at_changes():
+    evaluator = TriggerEvaluator()
+    trigger = Trigger(
+        id="t1", name="price",
+        conditions=[EventCondition(field="price", operator=ConditionOperator.GREATER_THAN, value=100)],
+        actions=[], created_at=datetime(2024, 1, 1)
+    )
+    assert evaluator.evaluate(trigger, {"price": 150})
+    assert evaluator.get(trigger) is evaluator.get(trigger)
+
+    # 同じIDでもupdated_atが変われば新しい条件でコンパイルし直す
+    updated = trigger.copy(update={
+        "conditions": [EventCondition(field="price", operator=ConditionOperator.GREATER_THAN, value=200)],
+        "updated_at": datetime(2024, 1, 2),
+    })
+    assert not evaluator.evaluate(updated, {"price": 150})
+    assert evaluator.get(updated) is not evaluator.get(trigger)
+    assert evaluator.cache_info()["size"] == 2
+
+
+def test_matching_skips_inactive_triggers():
+    evaluator = TriggerEvaluator()
+    condition = EventCondition(field="symbol", operator=ConditionOperator.EQUALS, value="AAPL")
+    active = Trigger(id="a", name="a", conditions=[condition], actions=[])
+    inactive = Trigger(id="b", name="b", conditions=[condition], actions=[], is_active=False)
+    assert evaluator.matching([active, inactive], {"symbol": "AAPL"}) == [active]
@@ -0,0 +1,76 @@
+import random
+from types import SimpleNamespace
+
+from app.core.trigger_firing import DisarmedTriggers, FiringGate, FiringPolicy, FiringRule
+from app.core.trigger_matcher import TriggerMatcher
+
+
+def _trigger(trigger_id, condition, value, user_id=None, **parameters):
+    return SimpleNamespace(
+        id=trigger_id, symbol="AAPL", type="price_threshold", condition=condition, value=value,
+        parameters={"field": "price", **parameters}, is_active=True, user_id=user_id
+    )
+
+
+def test_cooldown_suppresses_until_it_expires():
+    matcher = TriggerMatcher()
+    matcher.sync_trigger(_trigger(1, "greater_than", 100, cooldown=10))
+    fired = [matcher.on_tick("AAPL", {"price": 101.0}, now) for now in (0.0, 5.0, 9.9, 10.3, 11.0)]
+    assert fired == [["1"], [], [], ["1"], []]
+    assert matcher.gate.stats()["suppressed"] == {"cooldown": 3}
+
+
+def test_hysteresis_waits_for_value_to_move_back():
+    matcher = TriggerMatcher()
+    matcher.sync_trigger(_trigger(1, "greater_than", 100, hysteresis=5))
+    prices = [101.0, 102.0, 97.0, 103.0, 95.0, 101.0]
+    fired = [matcher.on_tick("AAPL", {"price": price}, n) for n, price in enumerate(prices)]
+    assert fired == [["1"], [], [], [], [], ["1"]]
+
+
+def test_user_rate_limit_uses_a_sliding_window():
+    matcher = TriggerMatcher(policy=FiringPolicy(user_rate_limit=2, user_rate_window=60.0))
+    for trigger_id in range(3):
+        matcher.sync_trigger(_trigger(trigger_id, "greater_than", 100, user_id="u1"))
+    assert len(matcher.on_tick("AAPL", {"price": 101.0}, 0.0)) == 2
+    assert matcher.on_tick("AAPL", {"price": 101.0}, 30.0) == []
+    assert len(matcher.on_tick("AAPL", {"price": 101.0}, 61.0)) == 2
+    assert matcher.gate.stats()["users_limited"] == 1
+
+
+def test_rearm_levels_close_strict_bounds():
+    rule = FiringRule("1", "AAPL", "price", "between", [10.0, 20.0], None, 1.0, None)
+    below, above = rule.rearm_levels()
+    assert below < 9.0 and above > 21.0
+    disarmed = DisarmedTriggers()
+    disarmed.add("1", below, above)
+    assert disarmed.rearm(9.0) == [] and disarmed.rearm(21.0) == []
+    assert disarmed.rearm(8.99) == ["1"] and len(disarmed) == 0
+
+
+def test_disarmed_triggers_match_a_linear_scan():
+    rng = random.Random(5)
+    for _ in range(100):
+        disarmed = DisarmedTriggers()
+        levels = {}
+        for n in range(rng.randint(1, 40)):
+            low = rng.choice([None, float(rng.randint(0, 50))])
+            high = None if low is not None and rng.random() < 0.5 else float(rng.randint(51, 100))
+            levels[str(n)] = (low, high)
+            disarmed.add(str(n), low, high)
+        for _ in range(5):
+            value = float(rng.randint(-10, 110))
+            expected = {
+                trigger_id for trigger_id, (low, high) in levels.items()
+                if (low is not None and value <= low) or (high is not None and value >= high)
+            }
+            assert set(disarmed.rearm(value)) == expected
+            for trigger_id in expected:
+                del levels[trigger_id]
+            assert set(disarmed.levels) == set(levels)
+
+
+def test_triggers_without_rules_are_always_admitted():
+    gate = FiringGate()
+    assert not gate.configure(_trigger(1, "greater_than", 100))
+    assert gate.filter(["1", "1"]) == ["1", "1"]
@@ -0,0 +1,95 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+from app.core.trigger_matcher import CrossingStateStore, TriggerMatcher
+
+
+def _trigger(trigger_id, condition, value, symbol="AAPL", field="price", **parameters):
+    return SimpleNamespace(
+        id=trigger_id, symbol=symbol, type="price_threshold", condition=condition,
+        value=value, parameters={"field": field, **parameters}, is_active=True
+    )
+
+
+def _reference_crossings(thresholds, values):
+    """ティックごとに全トリガーの側を更新する素朴な実装"""
+    sides = {trigger_id: 0 for trigger_id in thresholds}
+    fired_per_tick = []
+    for value in values:
+        fired = set()
+        for trigger_id, (direction, threshold) in thresholds.items():
+            side = 1 if value > threshold else -1 if value < threshold else sides[trigger_id]
+            if sides[trigger_id] and side != sides[trigger_id] and side == direction:
+                fired.add(trigger_id)
+            sides[trigger_id] = side
+        fired_per_tick.append(fired)
+    return fired_per_tick
+
+
+def test_crossings_match_reference_on_a_random_walk():
+    rng = random.Random(11)
+    store = CrossingStateStore(capacity=2)
+    thresholds = {}
+    for n in range(60):
+        operator = rng.choice(["crosses_above", "crosses_below"])
+        threshold = float(rng.randint(90, 110))
+        store.add(n, "AAPL", "price", operator, threshold)
+        thresholds[str(n)] = (1 if operator == "crosses_above" else -1, threshold)
+
+    values, price = [], 100.0
+    for _ in range(500):
+        price += rng.choice([-2.0, -1.0, 0.0, 1.0, 2.0])
+        values.append(price)
+    expected = _reference_crossings(thresholds, values)
+    actual = [set(store.on_value("AAPL", "price", value)) for value in values]
+    assert actual == expected
+    assert any(expected)
+
+
+def test_saved_state_restores_sides_and_last_values(tmp_path):
+    path = tmp_path / "crossings.npz"
+    store = CrossingStateStore()
+    store.add("up", "AAPL", "price", "crosses_above", 100)
+    store.add("down", "AAPL", "price", "crosses_below", 100)
+    store.on_value("AAPL", "price", 95.0)
+    store.save(path)
+
+    restored = CrossingStateStore()
+    restored.add("up", "AAPL", "price", "crosses_above", 100)
+    restored.add("down", "AAPL", "price", "crosses_below", 105)
+    assert restored.load(path) == 1
+    assert restored.last_value("AAPL", "price") == 95.0
+    # 閾値が同じトリガーは保存した側から、変わったトリガーは直前の値から側を決め直す
+    assert restored.on_value("AAPL", "price", 101.0) == ["up"]
+    assert restored.on_value("AAPL", "price", 104.0) == []
+    assert restored.stats()["unknown_side"] == 0
+
+
+def test_first_value_and_new_triggers_do_not_fire():
+    store = CrossingStateStore()
+    store.add("up", "AAPL", "price", "crosses_above", 100)
+    assert store.on_value("AAPL", "price", 105.0) == []
+    store.add("late", "AAPL", "price", "crosses_above", 102)
+    assert store.on_value("AAPL", "price", 90.0) == []
+    assert sorted(store.on_value("AAPL", "price", 110.0)) == ["late", "up"]
+
+
+def test_matcher_combines_thresholds_and_crossings(tmp_path):
+    matcher = TriggerMatcher()
+    assert matcher.load_triggers([
+        _trigger(1, "greater_than", 100),
+        _trigger(2, "crosses_above", 100),
+        _trigger(3, "crosses_below", 50, field="volume"),
+    ]) == 3
+    assert matcher.on_tick("AAPL", {"price": 99.0, "volume": 60.0}, now=0.0) == []
+    assert sorted(matcher.on_tick("AAPL", {"price": 101.0, "volume": 40.0}, now=1.0)) == ["1", "2", "3"]
+
+    path = tmp_path / "state" / "crossings.npz"
+    asyncio.run(matcher.save_state_async(path))
+    restarted = TriggerMatcher()
+    restarted.sync_trigger(_trigger(2, "crosses_above", 100))
+    assert restarted.load_state(path) == 1
+    assert restarted.load_state(tmp_path / "missing.npz") == 0
+    assert restarted.on_tick("AAPL", {"price": 99.0}, now=2.0) == []
+    assert restarted.on_tick("AAPL", {"price": 101.0}, now=3.0) == ["2"]
@@ -0,0 +1,111 @@
+import random
+import threading
+from types import SimpleNamespace
+
+from app.core.trigger_registry import TriggerRegistry, _bucket
+
+
+def _linear_match(conditions, symbol, field, value):
+    matched = set()
+    for trigger_id, (cond_symbol, cond_field, operator, threshold) in conditions.items():
+        if (cond_symbol, cond_field) != (symbol, field):
+            continue
+        if (
+            (operator == "greater_than" and value > threshold)
+            or (operator == "less_than" and value < threshold)
+            or (operator == "between" and threshold[0] <= value <= threshold[1])
+            or (operator == "equals" and value == threshold)
+        ):
+            matched.add(trigger_id)
+    return matched
+
+
+def _random_condition(rng):
+    operator = rng.choice(["greater_than", "less_than", "between", "equals"])
+    if operator == "between":
+        low = rng.randint(0, 100)
+        threshold = (low, low + rng.randint(0, 30))
+    else:
+        threshold = rng.randint(0, 100)
+    return rng.choice(["AAPL", "MSFT", "GOOG"]), rng.choice(["price", "volume"]), operator, threshold
+
+
+def _trigger(trigger_id, symbol, field, operator, value, is_active=True):
+    return SimpleNamespace(
+        id=trigger_id, symbol=symbol, type="price_threshold", condition=operator,
+        value=value, parameters={"field": field}, is_active=is_active
+    )
+
+
+def test_registry_matches_linear_scan_through_updates():
+    rng = random.Random(13)
+    registry = TriggerRegistry()
+    conditions = {}
+    for step in range(3000):
+        trigger_id = str(rng.randrange(300))
+        version = registry.version
+        if rng.random() < 0.2:
+            removed = registry.remove(trigger_id)
+            assert removed == (conditions.pop(trigger_id, None) is not None)
+            assert registry.version == version + removed
+        else:
+            conditions[trigger_id] = _random_condition(rng)
+            assert registry.add(trigger_id, *conditions[trigger_id]) == version + 1
+        if step % 10 == 0:
+            symbol, field = rng.choice(["AAPL", "MSFT", "GOOG"]), rng.choice(["price", "volume"])
+            value = rng.randint(-5, 135)
+            assert set(registry.match(symbol, field, value)) == _linear_match(conditions, symbol, field, value)
+    assert registry.stats()["triggers"] == len(conditions)
+
+
+def test_snapshots_are_isolated_and_share_untouched_buckets():
+    registry = TriggerRegistry()
+    registry.load([_trigger(n, f"SYM{n}", "price", "greater_than", 100) for n in range(50)])
+    before = registry.snapshot()
+    registry.add("new", "SYM3", "price", "less_than", 10)
+    registry.remove("4")
+    after = registry.snapshot()
+
+    assert before.match_tick("SYM3", {"price": 5.0}) == []
+    assert after.match_tick("SYM3", {"price": 5.0}) == ["new"]
+    assert before.match_tick("SYM4", {"price": 101.0}) == ["4"]
+    assert after.match_tick("SYM4", {"price": 101.0}) == []
+    touched = {_bucket("SYM3"), _bucket("SYM4")}
+    for index, (old, new) in enumerate(zip(before.buckets, after.buckets)):
+        assert (old is new) == (index not in touched)
+    assert after.version == before.version + 2
+
+
+def test_load_skips_inactive_and_crossing_triggers():
+    registry = TriggerRegistry()
+    assert registry.load([
+        _trigger(1, "AAPL", "price", "greater_than", 100),
+        _trigger(2, "AAPL", "price", "crosses_above", 100),
+        _trigger(3, "AAPL", "price", "greater_than", 100, is_active=False),
+    ]) == 1
+    assert not registry.sync_trigger(_trigger(1, "AAPL", "price", "greater_than", 100, is_active=False))
+    assert len(registry) == 0 and len(registry.snapshot()) == 0
+
+
+def test_matching_continues_while_triggers_change():
+    registry = TriggerRegistry()
+    registry.add("base", "AAPL", "price", "greater_than", 0)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                assert "base" in registry.match_tick("AAPL", {"price": 50.0})
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for n in range(2000):
+        registry.add(n % 100, "AAPL", "price", "less_than", n % 60)
+        if n % 3 == 0:
+            registry.remove((n + 50) % 100)
+    stop.set()
+    thread.join()
+    assert errors == []
@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+
+from app.core.threshold_index import TriggerIndex
+from app.core.trigger_table import TriggerTable
+
+SYMBOLS = [f"SYM{n}" for n in range(20)]
+FIELDS = ["price", "volume", "change"]
+
+
+def _random_condition(rng):
+    operator = rng.choice(["greater_than", "less_than", "between", "equals"])
+    if operator == "between":
+        low = rng.randint(0, 100)
+        value = [low, low + rng.randint(0, 30)]
+    else:
+        value = rng.randint(0, 100)
+    return rng.choice(SYMBOLS), rng.choice(FIELDS), operator, value
+
+
+def test_vectorized_evaluation_matches_threshold_index():
+    rng = random.Random(3)
+    table = TriggerTable(capacity=4)
+    index = TriggerIndex()
+    active = {}
+    for _ in range(2000):
+        trigger_id = rng.randrange(600)
+        if rng.random() < 0.15:
+            table.remove(trigger_id)
+            index.remove(trigger_id)
+            continue
+        condition = _random_condition(rng)
+        is_active = rng.random() < 0.9
+        table.set(trigger_id, *condition, is_active=is_active)
+        if is_active:
+            index.add(trigger_id, *condition)
+        else:
+            index.remove(trigger_id)
+        active[trigger_id] = is_active
+
+    for _ in range(20):
+        values = {
+            symbol: {field: float(rng.randint(-5, 135)) for field in rng.sample(FIELDS, 2)}
+            for symbol in rng.sample(SYMBOLS, 12)
+        }
+        expected = {
+            trigger_id
+            for symbol, fields in values.items()
+            for trigger_id in index.match_tick(symbol, fields)
+        }
+        assert set(table.evaluate(values)) == expected
+        assert set(table.evaluate(table.snapshot(values))) == expected
+
+
+def test_new_fields_restride_existing_rows():
+    table = TriggerTable()
+    table.set("a", "AAPL", "price", "greater_than", 100)
+    for n in range(20):
+        table.set(f"f{n}", "AAPL", f"field{n}", "less_than", 0)
+    assert list(table.evaluate({"AAPL": {"price": 101.0, "field19": -1.0}})) == ["a", "f19"]
+
+
+def test_rows_are_reused_and_readable():
+    table = TriggerTable(capacity=2)
+    table.set(1, "AAPL", "price", "between", [10, 20])
+    table.set(2, "AAPL", "price", "crosses_above", 15)
+    assert table.row(1) == {
+        "id": "1", "symbol": "AAPL", "field": "price", "operator": "between",
+        "value": [10.0, 20.0], "is_active": True,
+    }
+    # クロス条件はスナップショット評価では発火しない
+    assert list(table.evaluate({"AAPL": {"price": 15.0}})) == ["1"]
+    assert table.remove(2) and not table.remove(2)
+    table.set(3, "AAPL", "price", "equals", 15)
+    stats = table.stats()
+    assert stats["triggers"] == 2 and stats["capacity"] == 2
+    assert sorted(table.evaluate({"AAPL": {"price": 15.0}})) == ["1", "3"]
+    assert table.evaluate({"MSFT": {"price": np.nan}}).size == 0